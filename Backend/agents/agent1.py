@@ -1,12 +1,33 @@
 import os
-from groq import Groq
 from dotenv import load_dotenv
+from agents.llm_cache import cached_client
+from agents.model_client import get_model_client
+from db.executor import run_db
 from db.query import games as game_functions
 from db.query import playedGames as played_games_functions
 
+try:
+    from groq import APIError as GroqError, Groq
+except ImportError:
+    GroqError = Groq = None
+
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+MODEL = "llama-3.3-70b-versatile"
+
+_client = None
+
+def get_client():
+    """
+    Synchronous Groq client (through the LLM cache), created on first use
+    The async agents use agents.model_client instead and don't need groq
+    """
+    global _client
+    if _client is None:
+        if Groq is None:
+            raise RuntimeError("groq is not installed; use the async agents or pip install groq")
+        _client = cached_client(Groq(api_key=os.getenv("GROQ_API_KEY")))
+    return _client
 
 def query_games_with_played_status(game_ids: list, user_id: int):
     """
@@ -26,16 +47,10 @@ def get_user_context(user_id: int):
         "played_count": len(played_games)
     }
 
-def agent1_process_request(prompt: str, user_id: int):
+def build_agent1_messages(prompt: str, user_id: int, user_context: dict):
     """
-    Agent 1: Database Oracle
-    Receives requests from Agent 2 and returns relevant game data
+    Chat messages for Agent 1: the user's played games plus Agent 2's request
     """
-    
-    # Get user context
-    user_context = get_user_context(user_id)
-    
-    # Build context for Agent 1
     context = f"""
 You are Agent 1, the Database Oracle for a game recommendation system.
 You have access to a games database with 30 games across various genres and platforms.
@@ -49,19 +64,41 @@ Current request from Agent 2: {prompt}
 
 Respond with relevant information from the database.
 """
+    return [
+        {"role": "system", "content": "You are Agent 1, a database oracle that provides game information."},
+        {"role": "user", "content": context}
+    ]
+
+def agent1_process_request(prompt: str, user_id: int):
+    """
+    Agent 1: Database Oracle
+    Receives requests from Agent 2 and returns relevant game data
+    """
+    
+    # Get user context
+    user_context = get_user_context(user_id)
     
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": "You are Agent 1, a database oracle that provides game information."},
-            {"role": "user", "content": context}
-        ],
+    response = get_client().chat.completions.create(
+        model=MODEL,
+        messages=build_agent1_messages(prompt, user_id, user_context),
         temperature=0.1,  # Keep it factual
         max_tokens=1000
     )
     
     return response.choices[0].message.content
 
+async def agent1_process_request_async(prompt: str, user_id: int):
+    """
+    Agent 1 on the shared async model client (see agents/model_client.py)
+    """
+    user_context = await run_db(get_user_context, user_id)
+    return await get_model_client().chat(
+        MODEL,
+        build_agent1_messages(prompt, user_id, user_context),
+        temperature=0.1,  # Keep it factual
+        max_tokens=1000
+    )
+
 # Test function
 if __name__ == "__main__":
     # Test Agent 1
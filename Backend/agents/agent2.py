@@ -1,29 +1,52 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
+import asyncio
 import json
+import logging
+import os
 import re
-from groq import Groq
-from agents.agent1 import get_user_context
+from agents.agent1 import Groq, GroqError, get_client, get_user_context
+from agents.model_client import ModelError, get_model_client
+from agents.recommender import get_recommender, series_id
+from agents.title_matcher import get_title_matcher, normalize_title
+from db.executor import run_db
 from db.query import games as game_functions
 
-# Configure Groq
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+MODEL = "llama-3.3-70b-versatile"
+# Where candidates come from: "local" (agents/recommender.py, no model call) or "llm"
+CANDIDATES = os.getenv("AGENT2_CANDIDATES", "local")
+# Seconds the model gets to pick and explain local candidates before the local picks are used as they are
+EXPLAIN_TIMEOUT = float(os.getenv("AGENT2_EXPLAIN_TIMEOUT", "10"))
+# Seconds the model gets to suggest candidates (AGENT2_CANDIDATES=llm) before the local recommender's are used
+CANDIDATE_TIMEOUT = float(os.getenv("AGENT2_CANDIDATE_TIMEOUT", "10"))
 
-def agent2_generate_recommendations(user_query: str, user_id: int, num_recommendations: int = 5):
-    """
-    Agent 2: Recommendation Engine (using Groq)
-    Takes user query, gets context from Agent 1, generates game recommendations
-    """
-    
-    # Step 1: Get user context from Agent 1
-    user_context = get_user_context(user_id)
+logger = logging.getLogger(__name__)
+
+def complete(prompt, temperature, max_tokens, timeout):
+    """Text of one completion from the sync Groq client; ModelError if groq is missing, fails or times out"""
+    if Groq is None:
+        raise ModelError("groq is not installed")
+    try:
+        response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+    except GroqError as e:
+        raise ModelError(str(e)) from e
+    return response.choices[0].message.content
+
+def model_unavailable(error, fallback):
+    """Note that the model failed and the local recommender's `fallback` is used instead"""
+    logger.warning("Model unavailable, using local %s: %s", fallback, error)
+
+def build_candidate_prompt(user_query, user_context):
     played_game_names = [game['game_name'] for game in user_context['played_games']]
     played_genres = list(set([game['genre'] for game in user_context['played_games']]))
-    
-    # Step 2: Generate candidate games
-    candidate_prompt = f"""
+    return f"""
 Generate 15 game titles that match this request:
 
 User query: "{user_query}"
@@ -33,56 +56,110 @@ User enjoys: {', '.join(played_genres)}
 Return ONLY a JSON array of titles:
 ["Game 1", "Game 2", ...]
 """
-    
-    candidate_response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": candidate_prompt}],
-        temperature=0.7,
-        max_tokens=500
-    )
-    
-    candidate_text = candidate_response.choices[0].message.content.strip()
+
+def parse_candidates(candidate_text):
+    candidate_text = candidate_text.strip()
     candidate_text = candidate_text.replace('```json', '').replace('```', '').strip()
-    
+
     try:
         candidate_games = json.loads(candidate_text)
-    except:
-        print(f"Failed to parse candidates: {candidate_text}")
+    except ValueError:
+        candidate_games = None
+    # Only a list of titles will do; anything else leaves it to the local recommender
+    if not isinstance(candidate_games, list):
+        logger.debug("Failed to parse candidates: %s", candidate_text)
         candidate_games = []
-    
-    print(f"\n🤖 Agent 2 generated {len(candidate_games)} candidates:")
-    print(candidate_games[:5], "...")
-    
-    # Step 3: Match with database
-    all_games = game_functions.get_all_games()
-    matching_games = []
-    
+    candidate_games = [title for title in candidate_games if isinstance(title, str)]
+
+    logger.debug("Agent 2 generated %d candidates: %s ...", len(candidate_games), candidate_games[:5])
+    return candidate_games
+
+def match_candidates(candidate_games, user_context, num_recommendations):
+    """Step 3: catalog games for the candidate titles, topped up with unplayed games"""
+    played_ids = {game['game_id'] for game in user_context['played_games']}
+
+    # Index lookups instead of scanning every game
+    matcher = get_title_matcher()
+    matched_ids = []
+
     for candidate in candidate_games:
-        for db_game in all_games:
-            if candidate.lower() in db_game['game_name'].lower() or db_game['game_name'].lower() in candidate.lower():
-                if db_game['game_name'] not in played_game_names:
-                    matching_games.append(db_game)
-                    break
-    
-    print(f"\n📊 Found {len(matching_games)} matching games in database")
-    
-    # Add more unplayed games if needed
+        if not isinstance(candidate, str):
+            continue
+        match = matcher.match(candidate, exclude=played_ids.union(matched_ids))
+        if match:
+            matched_ids.append(match[0])
+
+    matching_games = game_functions.get_games_by_ids(matched_ids)
+    logger.debug("Found %d matching games in database", len(matching_games))
+    return add_unplayed_games(matching_games, played_ids.union(matched_ids), num_recommendations)
+
+def add_unplayed_games(matching_games, seen, num_recommendations):
+    """Top up to 10 games from the catalog when fewer than num_recommendations matched"""
     if len(matching_games) < num_recommendations:
-        unplayed_games = [g for g in all_games if g['game_name'] not in played_game_names]
-        for game in unplayed_games:
-            if game not in matching_games:
-                matching_games.append(game)
+        page = game_functions.list_games(limit=10 + len(seen))
+        for game in page['items']:
             if len(matching_games) >= 10:
                 break
-    
-    # Step 4: Generate final recommendations
+            if game['id'] not in seen:
+                matching_games.append(game)
+    return matching_games
+
+def rating_weight(rating):
+    """How much a played game steers local candidates: 5 stars pulls hardest, 1 star pushes away"""
+    return 2 / 3 if rating is None else (rating - 2) / 3
+
+def local_candidates(user_query, user_context, num_recommendations):
+    """Steps 2 and 3 without the model: the 10 catalog games closest to the played games and the query.
+
+    Each game gets a "why_local" reason, used when the model can't explain the picks.
+    """
+    played = {game['game_id']: rating_weight(game.get('rating')) for game in user_context['played_games']}
+    picks = get_recommender().recommend(played, user_query, 10)
+    because = {game_id: played_id for game_id, _, played_id in picks}
+
+    games = game_functions.get_games_by_ids([game_id for game_id, _, _ in picks] + [id for id in because.values() if id])
+    by_id = {game['id']: game for game in games}
+    matching_games = [by_id[game_id] for game_id, _, _ in picks if game_id in by_id]
+    logger.debug("Recommender found %d candidates", len(matching_games))
+
+    # Copies: topped-up rows come from the catalog cache and are shared
+    matching_games = add_unplayed_games(matching_games, set(played).union(because), num_recommendations)
+    return [
+        dict(game, why_local=describe_pick(game, by_id.get(because.get(game['id'])), user_query))
+        for game in matching_games
+    ]
+
+def describe_pick(game, played_game, user_query):
+    """One-sentence reason for a local pick, from what it shares with the played game behind it"""
+    if played_game is None:
+        kind = f"{game['genre']} game" if game['genre'] else "game"
+        return f"A {kind} that fits \"{user_query}\"." if user_query else f"A {kind} from the catalog."
+    shared = []
+    if series_id(game) is not None and series_id(game) == series_id(played_game):
+        shared.append("same series")
+    if game['genre'] and game['genre'] == played_game['genre']:
+        shared.append(f"also {game['genre']}")
+    if game['publisher'] == played_game['publisher']:
+        shared.append(f"also from {game['publisher']}")
+    details = f" ({', '.join(shared)})" if shared else ""
+    return f"You played {played_game['game_name']}{details}."
+
+def local_recommendations(matching_games, user_query, num_recommendations):
+    """Final picks without the model: the first candidates, with the recommender's reasons"""
+    return [
+        {"title": game['game_name'], "why_recommended": game.get('why_local') or describe_pick(game, None, user_query)}
+        for game in matching_games[:num_recommendations]
+    ]
+
+def build_final_prompt(user_query, user_context, matching_games, num_recommendations):
+    played_game_names = [game['game_name'] for game in user_context['played_games']]
     game_list = json.dumps([{
         'title': g['game_name'],
         'genre': g['genre'],
         'description': g['description']
     } for g in matching_games[:10]], indent=2)
-    
-    final_prompt = f"""
+
+    return f"""
 Select {num_recommendations} games from this list for: "{user_query}"
 
 User played: {', '.join(played_game_names[:5])}
@@ -95,46 +172,279 @@ Return ONLY valid JSON array. Keep explanations to ONE SHORT sentence each:
   {{"title": "Game Name", "why_recommended": "Brief reason"}}
 ]
 """
-    
-    final_response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": final_prompt}],
-        temperature=0.3,
-        max_tokens=2000
-    )
-    
-    final_text = final_response.choices[0].message.content.strip()
+
+def parse_recommendations(final_text):
+    final_text = final_text.strip()
     final_text = final_text.replace('```json', '').replace('```', '').strip()
-    
-    print(f"\n🔍 Raw response:\n{final_text[:200]}...\n")
-    
+
+    logger.debug("Raw response: %s...", final_text[:200])
+
     json_match = re.search(r'\[.*\]', final_text, re.DOTALL)
     if json_match:
         final_text = json_match.group(0)
-    
+
     try:
         recommendations = json.loads(final_text)
     except Exception as e:
-        print(f"❌ Failed to parse: {e}")
+        logger.debug("Failed to parse recommendations: %s", e)
         recommendations = []
-    
+    return recommendations
+
+class JSONArrayStream:
+    """
+    Parses a JSON array arriving in pieces: feed() returns the elements completed so far
+    Text before the first "[" (such as a ```json fence) and after the closing "]" is ignored,
+    as are elements that aren't valid JSON
+    """
+
+    def __init__(self):
+        self._element = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._closed = False
+
+    def feed(self, text):
+        elements = []
+        for char in text:
+            if self._closed:
+                break
+            if self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+                continue
+            if self._in_string:
+                self._element.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        elements += self._flush()
+                continue
+            if char == '"':
+                self._in_string = True
+                self._element.append(char)
+            elif char in "[{":
+                self._depth += 1
+                self._element.append(char)
+            elif char in "]}":
+                if self._depth == 1:
+                    elements += self._flush()
+                    self._closed = True
+                    continue
+                self._depth -= 1
+                self._element.append(char)
+                if self._depth == 1:
+                    elements += self._flush()
+            elif char == "," and self._depth == 1:
+                elements += self._flush()
+            else:
+                self._element.append(char)
+        return elements
+
+    def _flush(self):
+        text = "".join(self._element).strip()
+        self._element = []
+        if not text:
+            return []
+        try:
+            return [json.loads(text)]
+        except ValueError:
+            return []
+
+def agent2_generate_recommendations(user_query: str, user_id: int, num_recommendations: int = 5):
+    """
+    Agent 2: Recommendation Engine (using Groq)
+    Takes user query, gets context from Agent 1, generates game recommendations
+    Candidates come from the local recommender unless AGENT2_CANDIDATES=llm
+    """
+    # Step 1: Get user context from Agent 1
+    user_context = get_user_context(user_id)
+
+    matching_games = None
+    if CANDIDATES == "llm":
+        # Step 2: Generate candidate games
+        try:
+            candidate_text = complete(build_candidate_prompt(user_query, user_context),
+                                      temperature=0.7, max_tokens=500, timeout=CANDIDATE_TIMEOUT)
+            candidate_games = parse_candidates(candidate_text)
+
+            # Step 3: Match with database (no usable titles: the local recommender's instead)
+            if candidate_games:
+                matching_games = match_candidates(candidate_games, user_context, num_recommendations)
+        except ModelError as e:
+            model_unavailable(e, "candidates")
+
+    if matching_games is None:
+        # Steps 2 and 3: Candidates from the local recommender, no model call
+        matching_games = local_candidates(user_query, user_context, num_recommendations)
+
+    # Step 4: Generate final recommendations
+    try:
+        final_text = complete(build_final_prompt(user_query, user_context, matching_games, num_recommendations),
+                              temperature=0.3, max_tokens=2000, timeout=EXPLAIN_TIMEOUT)
+        recommendations = parse_recommendations(final_text)
+    except ModelError as e:
+        # groq errors, timeouts or groq not installed: the candidates are answer enough
+        model_unavailable(e, "picks")
+        recommendations = []
+
     return {
         "query": user_query,
         "user_id": user_id,
-        "recommendations": recommendations
+        "recommendations": recommendations or local_recommendations(matching_games, user_query, num_recommendations)
     }
 
+async def agent2_generate_recommendations_async(user_query: str, user_id: int, num_recommendations: int = 5):
+    """
+    Agent 2 on the shared async model client (see agents/model_client.py)
+    Same steps; database work runs on the db executor, and the title index
+    is checked (or rebuilt) while the candidate completion is in flight
+    """
+    model = get_model_client()
+
+    # Step 1: Get user context from Agent 1
+    user_context = await run_db(get_user_context, user_id)
+
+    matching_games = None
+    if CANDIDATES == "llm":
+        # Step 2: Generate candidate games
+        try:
+            candidate_text, _ = await asyncio.gather(
+                model.chat(
+                    MODEL,
+                    [{"role": "user", "content": build_candidate_prompt(user_query, user_context)}],
+                    temperature=0.7,
+                    max_tokens=500,
+                    deadline=CANDIDATE_TIMEOUT
+                ),
+                run_db(get_title_matcher)
+            )
+            candidate_games = parse_candidates(candidate_text)
+
+            # Step 3: Match with database (no usable titles: the local recommender's instead)
+            if candidate_games:
+                matching_games = await run_db(match_candidates, candidate_games, user_context, num_recommendations)
+        except ModelError as e:
+            model_unavailable(e, "candidates")
+
+    if matching_games is None:
+        # Steps 2 and 3: Candidates from the local recommender, no model call
+        matching_games = await run_db(local_candidates, user_query, user_context, num_recommendations)
+
+    # Step 4: Generate final recommendations (the candidates answer if the model fails or is too slow)
+    try:
+        final_text = await model.chat(
+            MODEL,
+            [{"role": "user", "content": build_final_prompt(user_query, user_context, matching_games, num_recommendations)}],
+            temperature=0.3,
+            max_tokens=2000,
+            deadline=EXPLAIN_TIMEOUT
+        )
+        recommendations = parse_recommendations(final_text)
+    except ModelError as e:
+        model_unavailable(e, "picks")
+        recommendations = []
+
+    return {
+        "query": user_query,
+        "user_id": user_id,
+        "recommendations": recommendations or local_recommendations(matching_games, user_query, num_recommendations)
+    }
+
+async def agent2_stream_recommendations(user_query: str, user_id: int, num_recommendations: int = 5):
+    """
+    Agent 2 as a stream of (event, data) pairs, each sent as soon as it is known:
+    ("candidate", {"title"}) per candidate title, ("matches", {"games"}) once they are
+    looked up, ("recommendation", {"title", "why_recommended", "game_id"}) per final pick,
+    then ("done", {"count"}). Picks the model doesn't deliver in time come from the candidates
+    """
+    model = get_model_client()
+
+    # Step 1: Get user context from Agent 1
+    user_context = await run_db(get_user_context, user_id)
+
+    matching_games = None
+    if CANDIDATES == "llm":
+        # Step 2: Stream candidate games (the title index is checked meanwhile)
+        index_ready = asyncio.ensure_future(run_db(get_title_matcher))
+        candidates = JSONArrayStream()
+        candidate_games = []
+        try:
+            async for piece in model.stream_chat(
+                MODEL,
+                [{"role": "user", "content": build_candidate_prompt(user_query, user_context)}],
+                temperature=0.7,
+                max_tokens=500,
+                deadline=CANDIDATE_TIMEOUT
+            ):
+                for title in candidates.feed(piece):
+                    if isinstance(title, str):
+                        candidate_games.append(title)
+                        yield "candidate", {"title": title}
+            await index_ready
+
+            # Step 3: Match with database (no usable titles: the local recommender's instead)
+            if candidate_games:
+                matching_games = await run_db(match_candidates, candidate_games, user_context, num_recommendations)
+        except ModelError as e:
+            model_unavailable(e, "candidates")
+        finally:
+            index_ready.cancel()
+
+    if matching_games is None:
+        # Steps 2 and 3: Candidates from the local recommender, no model call
+        matching_games = await run_db(local_candidates, user_query, user_context, num_recommendations)
+        for game in matching_games[:10]:
+            yield "candidate", {"title": game['game_name']}
+
+    yield "matches", {"games": [
+        {"id": g['id'], "game_name": g['game_name'], "genre": g['genre']} for g in matching_games[:10]
+    ]}
+
+    # Step 4: Stream final recommendations, one event per pick
+    by_title = {normalize_title(g['game_name']): g['id'] for g in matching_games}
+    picks = JSONArrayStream()
+    sent = set()
+    try:
+        async for piece in model.stream_chat(
+            MODEL,
+            [{"role": "user", "content": build_final_prompt(user_query, user_context, matching_games, num_recommendations)}],
+            temperature=0.3,
+            max_tokens=2000,
+            deadline=EXPLAIN_TIMEOUT
+        ):
+            for pick in picks.feed(piece):
+                if not isinstance(pick, dict) or not pick.get("title"):
+                    continue
+                title = normalize_title(str(pick["title"]))
+                if len(sent) < num_recommendations and title not in sent:
+                    sent.add(title)
+                    yield "recommendation", dict(pick, game_id=by_title.get(title))
+    except ModelError as e:
+        model_unavailable(e, "picks")
+
+    for pick in local_recommendations(matching_games, user_query, num_recommendations):
+        title = normalize_title(pick["title"])
+        if len(sent) < num_recommendations and title not in sent:
+            sent.add(title)
+            yield "recommendation", dict(pick, game_id=by_title.get(title))
+    yield "done", {"count": len(sent)}
+
 # Test function
 if __name__ == "__main__":
     print("🎮 Testing Agent 2: Game Recommendation Engine\n")
-    
+
     result = agent2_generate_recommendations(
         user_query="I want a challenging action RPG with great boss fights",
         user_id=1,
         num_recommendations=5
     )
-    
+
     print("\n✨ FINAL RECOMMENDATIONS:\n")
     for i, rec in enumerate(result['recommendations'], 1):
         print(f"{i}. {rec['title']}")
-        print(f"   Why: {rec['why_recommended']}\n")
\ No newline at end of file
+        print(f"   Why: {rec['why_recommended']}\n")
@@ -0,0 +1,250 @@
+"""
+Cache for model completions.
+
+The agents send the same prompt again whenever a user repeats a query
+and their played list hasn't changed. Completions are stored under a
+hash of the model, the normalized messages, the temperature and any
+other request parameters, so identical requests are answered locally.
+
+Backends (LLM_CACHE):
+- "memory": in-process LRU bounded by entry count (the default)
+- "sqlite": the llm_cache table (migration 7), shared by every worker
+  and kept across restarts, bounded by total response size
+- "off": every call goes to the model
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from db.client import execute_query, fetch_one, run_write
+from db.utils.lru_cache import TTLCache, MISSING
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE", "memory")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Client options that change how a request is sent, not what it asks for
+TRANSPORT_PARAMS = {"timeout", "extra_headers"}
+
+def normalize_prompt(text):
+    """Collapse whitespace, so indentation and blank lines don't change the key"""
+    return " ".join(text.split())
+
+def cache_key(model, messages, temperature, **params):
+    """Content address of a chat completion request (transport options left out)"""
+    request = {
+        "model": model,
+        "messages": [
+            {"role": message["role"], "content": normalize_prompt(message["content"])}
+            for message in messages
+        ],
+        "temperature": temperature,
+        "params": {name: value for name, value in params.items() if name not in TRANSPORT_PARAMS},
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+class MemoryBackend:
+    """Completions in a TTL/LRU cache inside this process"""
+
+    def __init__(self, maxsize=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        """(response, latency) or None"""
+        entry = self._cache.get(key)
+        return None if entry is MISSING else entry
+
+    def set(self, key, model, response, latency):
+        self._cache.set(key, (response, latency))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        stats = self._cache.stats()
+        return {
+            "backend": "memory",
+            "size": stats["size"],
+            "maxsize": stats["maxsize"],
+            "ttl": stats["ttl"],
+            "evictions": stats["evictions"],
+            "expirations": stats["expirations"],
+        }
+
+class SQLiteBackend:
+    """Completions in the llm_cache table, evicted least recently used first past `max_bytes`.
+
+    Database errors (such as an unmigrated database) count as misses, so
+    the agents keep working without the cache.
+    """
+
+    def __init__(self, max_bytes=LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self.errors = 0
+
+    def get(self, key):
+        now = time.time()
+        try:
+            row = fetch_one(
+                "SELECT response, latency FROM llm_cache WHERE key = ? AND expires_at > ?", [key, now]
+            )
+            if row is None:
+                return None
+            execute_query("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", [now, key])
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+        return row['response'], row['latency']
+
+    def set(self, key, model, response, latency):
+        now = time.time()
+
+        def store(conn):
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, model, response, latency, size, expires_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [key, model, response, latency, len(response.encode()), now + self.ttl, now]
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", [now])
+            # Keep the most recently used entries that fit in max_bytes
+            return conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY last_used_at DESC, key) AS total
+                        FROM llm_cache
+                    ) WHERE total > ?
+                )
+                """,
+                [self.max_bytes]
+            ).rowcount
+
+        try:
+            self.evictions += run_write(store)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self):
+        execute_query("DELETE FROM llm_cache")
+
+    def stats(self):
+        try:
+            row = fetch_one("SELECT COUNT(*) AS size, COALESCE(SUM(size), 0) AS bytes FROM llm_cache")
+        except sqlite3.Error:
+            row = {"size": None, "bytes": None}
+        return {
+            "backend": "sqlite",
+            "size": row['size'],
+            "bytes": row['bytes'],
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+class LLMCache:
+    """Completion cache with hit/miss counters and the model time hits saved"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    def get(self, key):
+        """Cached response text for `key`, or None"""
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += entry[1]
+        return entry[0]
+
+    def set(self, key, model, response, latency):
+        """Store a response that took `latency` seconds to produce"""
+        self.backend.set(key, model, response, latency)
+
+    def get_or_create(self, create, model, messages, temperature, **params):
+        """Cached response for the request, or create() timed and stored"""
+        key = cache_key(model, messages, temperature, **params)
+        response = self.get(key)
+        if response is None:
+            start = time.perf_counter()
+            response = create()
+            self.set(key, model, response, time.perf_counter() - start)
+        return response
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "latency_saved_seconds": round(self.latency_saved, 3),
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+def completion(content):
+    """Minimal chat completion object: completion.choices[0].message.content"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class CachedChatClient:
+    """Groq/OpenAI-style client whose chat.completions.create() goes through an LLMCache.
+
+    Only the message text is kept, so cached answers come back as
+    completion() objects rather than the client's own response type.
+    """
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature=1.0, **params):
+        def call():
+            response = self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **params
+            )
+            return response.choices[0].message.content
+
+        return completion(self.cache.get_or_create(call, model, messages, temperature, **params))
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """The process-wide cache for LLM_CACHE, or None when it is "off" """
+    global _llm_cache
+    if LLM_CACHE_BACKEND == "off":
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                if LLM_CACHE_BACKEND not in ("memory", "sqlite"):
+                    raise ValueError(f"Unknown LLM_CACHE: {LLM_CACHE_BACKEND}")
+                backend = SQLiteBackend() if LLM_CACHE_BACKEND == "sqlite" else MemoryBackend()
+                _llm_cache = LLMCache(backend)
+    return _llm_cache
+
+def cached_client(client):
+    """Wrap a model client with the process-wide cache (unless LLM_CACHE=off)"""
+    cache = get_llm_cache()
+    return client if cache is None else CachedChatClient(client, cache)
+
+def llm_cache_stats():
+    """Cache counters, or None while nothing has used it"""
+    with _llm_cache_lock:
+        return _llm_cache.stats() if _llm_cache is not None else None
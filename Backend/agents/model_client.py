@@ -0,0 +1,286 @@
+"""
+Async client for OpenAI-compatible chat completion APIs (Groq by default).
+
+One AsyncModelClient per process shares a pool of keep-alive connections
+and caps how many completions are in flight, so many recommendation
+requests can run at once without opening a socket each or tripping the
+provider's rate limits. Every call has a deadline covering the wait for
+a slot, each attempt and the backoff between them; failed attempts
+(connection errors, timeouts, 429, 5xx and malformed responses) are
+retried with jittered exponential backoff. Completions go through the
+LLM cache.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import httpx
+from agents.llm_cache import cache_key, get_llm_cache
+from db.executor import run_db
+
+MODEL_BASE_URL = os.getenv("MODEL_BASE_URL", "https://api.groq.com/openai/v1")
+# Seconds a whole call may take, retries included, and one attempt may take
+MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", "30"))
+MODEL_ATTEMPT_TIMEOUT = float(os.getenv("MODEL_ATTEMPT_TIMEOUT", "15"))
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "3"))
+# Completions in flight at once; also the size of the connection pool
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", "8"))
+# Backoff before retry n is random between 0 and min(cap, base * 2**n) seconds
+MODEL_RETRY_BASE = float(os.getenv("MODEL_RETRY_BASE", "0.25"))
+MODEL_RETRY_CAP = float(os.getenv("MODEL_RETRY_CAP", "4"))
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class ModelError(Exception):
+    """A completion failed for good: deadline passed, retries used up or the request was rejected"""
+
+class AsyncModelClient:
+    def __init__(self, base_url=MODEL_BASE_URL, api_key=None, timeout=MODEL_TIMEOUT,
+                 attempt_timeout=MODEL_ATTEMPT_TIMEOUT, max_retries=MODEL_MAX_RETRIES,
+                 concurrency=MODEL_CONCURRENCY, retry_base=MODEL_RETRY_BASE, retry_cap=MODEL_RETRY_CAP,
+                 cache=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.concurrency = concurrency
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.cache = cache
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+            timeout=httpx.Timeout(attempt_timeout, connect=min(attempt_timeout, 5.0)),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._in_flight = 0
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_misses = 0
+
+    async def chat(self, model, messages, temperature=1.0, deadline=None, **params):
+        """Completion text for the request, from the LLM cache when it has it.
+
+        `deadline` is in seconds (default: the client's timeout). Raises
+        ModelError if no completion arrives in time.
+        """
+        key = None
+        if self.cache is not None:
+            key = cache_key(model, messages, temperature, **params)
+            cached = await run_db(self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        timeout = self.timeout if deadline is None else deadline
+        start = time.perf_counter()
+        self.calls += 1
+        try:
+            content = await asyncio.wait_for(self._complete_in_slot(model, messages, temperature, params), timeout)
+        except asyncio.TimeoutError:
+            self.deadline_misses += 1
+            raise ModelError(f"No completion within {timeout:g}s") from None
+        except ModelError:
+            self.failures += 1
+            raise
+
+        if self.cache is not None:
+            await run_db(self.cache.set, key, model, content, time.perf_counter() - start)
+        return content
+
+    async def stream_chat(self, model, messages, temperature=1.0, deadline=None, **params):
+        """Yield the completion text in pieces as the model produces it.
+
+        Same deadline, retries and cache as chat(); a cached completion
+        comes back as one piece. Retries only happen before the first
+        piece: once text has been yielded, a failure raises ModelError.
+        """
+        key = None
+        if self.cache is not None:
+            key = cache_key(model, messages, temperature, **params)
+            cached = await run_db(self.cache.get, key)
+            if cached is not None:
+                yield cached
+                return
+
+        timeout = self.timeout if deadline is None else deadline
+        expires = asyncio.get_running_loop().time() + timeout
+        start = time.perf_counter()
+        self.calls += 1
+        parts = []
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), _remaining(expires))
+            self._in_flight += 1
+            pieces = self._stream(model, messages, temperature, params, expires)
+            try:
+                async for piece in pieces:
+                    parts.append(piece)
+                    yield piece
+            finally:
+                await pieces.aclose()
+                self._in_flight -= 1
+                self._semaphore.release()
+        except asyncio.TimeoutError:
+            self.deadline_misses += 1
+            raise ModelError(f"No complete answer within {timeout:g}s") from None
+        except ModelError:
+            self.failures += 1
+            raise
+
+        if self.cache is not None:
+            await run_db(self.cache.set, key, model, "".join(parts), time.perf_counter() - start)
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (from 0)"""
+        return random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** attempt))
+
+    async def _complete_in_slot(self, model, messages, temperature, params):
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                return await self._complete(model, messages, temperature, params)
+            finally:
+                self._in_flight -= 1
+
+    async def _complete(self, model, messages, temperature, params):
+        payload = dict(params, model=model, messages=messages, temperature=temperature)
+        for attempt in range(self.max_retries + 1):
+            self.attempts += 1
+            delay = None
+            try:
+                response = await self._http.post("/chat/completions", json=payload)
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if response.status_code == 200:
+                    try:
+                        return _message_content(response.text)
+                    except ModelError as e:
+                        error = e
+                else:
+                    error = ModelError(f"Model API returned {response.status_code}: {response.text[:200]}")
+                    if response.status_code not in RETRY_STATUSES:
+                        raise error
+                    delay = _retry_after(response)
+
+            if attempt == self.max_retries:
+                raise ModelError(f"Model call failed after {attempt + 1} attempts: {error!r}") from error
+            self.retries += 1
+            await asyncio.sleep(self.backoff(attempt) if delay is None else delay)
+
+    async def _stream(self, model, messages, temperature, params, expires):
+        payload = dict(params, model=model, messages=messages, temperature=temperature, stream=True)
+        request = self._http.build_request("POST", "/chat/completions", json=payload)
+        for attempt in range(self.max_retries + 1):
+            self.attempts += 1
+            delay = None
+            started = False
+            try:
+                response = await asyncio.wait_for(self._http.send(request, stream=True), _remaining(expires))
+                try:
+                    if response.status_code == 200:
+                        lines = response.aiter_lines()
+                        while True:
+                            line = await asyncio.wait_for(_next_line(lines), _remaining(expires))
+                            if line is None:
+                                return
+                            # Server-sent events: "data: {chunk}" lines, ending with "data: [DONE]"
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            try:
+                                piece = _delta_content(data)
+                            except ModelError as e:
+                                # Text already yielded can't be taken back; before that, start over
+                                if started:
+                                    raise
+                                error = e
+                                break
+                            if piece:
+                                started = True
+                                yield piece
+                    else:
+                        await response.aread()
+                        error = ModelError(f"Model API returned {response.status_code}: {response.text[:200]}")
+                        if response.status_code not in RETRY_STATUSES:
+                            raise error
+                        delay = _retry_after(response)
+                finally:
+                    await response.aclose()
+            except httpx.TransportError as e:
+                if started:
+                    raise ModelError(f"Model stream broke off: {e!r}") from e
+                error = e
+
+            if attempt == self.max_retries:
+                raise ModelError(f"Model call failed after {attempt + 1} attempts: {error!r}") from error
+            self.retries += 1
+            await asyncio.wait_for(asyncio.sleep(self.backoff(attempt) if delay is None else delay), _remaining(expires))
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self._in_flight,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deadline_misses": self.deadline_misses,
+        }
+
+    async def close(self):
+        await self._http.aclose()
+
+def _remaining(expires):
+    """Seconds left until the loop time `expires`"""
+    return max(0.0, expires - asyncio.get_running_loop().time())
+
+async def _next_line(lines):
+    """The next line of an async line iterator, or None once it runs out"""
+    try:
+        return await lines.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def _message_content(body):
+    """Text of a completion response body; ModelError if it isn't one"""
+    try:
+        return json.loads(body)["choices"][0]["message"]["content"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise ModelError(f"Malformed model response: {body[:200]!r}") from e
+
+def _delta_content(data):
+    """Text of one streamed chunk (None if it carries none); ModelError if it isn't one"""
+    try:
+        return json.loads(data)["choices"][0]["delta"].get("content")
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ModelError(f"Malformed model stream chunk: {data[:200]!r}") from e
+
+def _retry_after(response):
+    """Seconds from a Retry-After header (delta form only), or None"""
+    try:
+        return max(0.0, float(response.headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+_model_client = None
+
+def get_model_client():
+    """The process-wide AsyncModelClient, created on first use"""
+    global _model_client
+    if _model_client is None:
+        _model_client = AsyncModelClient(api_key=os.getenv("GROQ_API_KEY"), cache=get_llm_cache())
+    return _model_client
+
+async def close_model_client():
+    global _model_client
+    if _model_client is not None:
+        await _model_client.close()
+        _model_client = None
+
+def model_client_stats():
+    """Client counters, or None while no completion has been requested"""
+    return _model_client.stats() if _model_client is not None else None
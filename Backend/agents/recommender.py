@@ -0,0 +1,437 @@
+"""
+Content-based recommendations from the catalog alone, without a model call.
+
+Every game becomes a feature vector: one-hot genre (and its words),
+publisher, franchise, system and release era, plus TF-IDF weighted words
+of the title, genre and description, hashed into RECOMMENDER_DIMENSIONS
+float32 columns. Rows are L2-normalized, so a dot product is cosine similarity.
+The RECOMMENDER_NEIGHBORS most similar games of every game are
+precomputed and saved with the vectors as .npy files, which are loaded
+memory-mapped: workers share the pages and a restart doesn't rebuild.
+
+get_recommender() follows the games catalog_versions counter like the
+title matcher. After a write only the added, changed and removed games
+(found by a per-game content hash) are vectorized again, and only the
+neighbor lists they can affect are recomputed. Word weights (IDF) are
+kept from the last full build until RECOMMENDER_REBUILD_RATIO of the
+catalog has changed. Build it ahead of time with:
+
+    python -m agents.recommender
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+import numpy as np
+from agents.title_matcher import normalize_title
+from db.catalog_cache import catalog_versions
+from db.client import DB_PATH
+from db.query import games as game_functions
+
+RECOMMENDER_DIR = os.getenv("RECOMMENDER_DIR", os.path.splitext(DB_PATH)[0] + "-recommender")
+RECOMMENDER_DIMENSIONS = int(os.getenv("RECOMMENDER_DIMENSIONS", "1024"))
+RECOMMENDER_NEIGHBORS = int(os.getenv("RECOMMENDER_NEIGHBORS", "50"))
+# Share of the catalog written since the last full build that triggers another one
+RECOMMENDER_REBUILD_RATIO = float(os.getenv("RECOMMENDER_REBUILD_RATIO", "0.2"))
+
+logger = logging.getLogger(__name__)
+
+# Weight of each feature block in a game's vector
+# Franchise names that mark a game as not part of any series
+PLACEHOLDER_FRANCHISES = {"standalone", "none"}
+BLOCK_WEIGHTS = {"genre": 1.0, "franchise": 1.0, "text": 1.0, "publisher": 0.5, "system": 0.4, "era": 0.4}
+# With a query, games matching it rank first; closeness to the played games
+# multiplies a match's score by up to 1 + PROFILE_BOOST
+PROFILE_BOOST = 1.0
+# Rows compared at once when computing neighbors
+BLOCK_ROWS = 1024
+
+STOPWORDS = frozenset("a an and as at by for from game games in into is it its of on or the to with".split())
+
+ARRAYS = ("ids", "hashes", "vectors", "neighbors", "scores")
+META_FILE = "recommender.json"
+# Seconds after which files no metadata names are treated as left over from an interrupted save
+ABANDONED_AFTER = 600
+
+def words(text):
+    return [word for word in normalize_title(text or "").split() if len(word) > 1 and word not in STOPWORDS]
+
+def game_words(game):
+    return words(game['game_name']) + words(game['genre']) + words(game['description'])
+
+def series_id(game):
+    """The game's franchise_id, or None when it has none or only a placeholder franchise"""
+    if game['franchise_id'] is None or normalize_title(game.get('franchise_name') or "") in PLACEHOLDER_FRANCHISES:
+        return None
+    return game['franchise_id']
+
+def game_blocks(game):
+    """{block: {feature: weight}} for the categorical features of a game"""
+    blocks = {}
+    genre = normalize_title(game['genre'] or "")
+    if genre:
+        blocks["genre"] = {f"genre:{genre}": 1.0}
+        blocks["genre"].update((f"genre_word:{word}", 0.5) for word in genre.split())
+    if game['publisher']:
+        blocks["publisher"] = {f"publisher:{normalize_title(game['publisher'])}": 1.0}
+    series = series_id(game)
+    if series is not None:
+        blocks["franchise"] = {f"franchise:{series}": 1.0}
+    if game['system_id'] is not None:
+        blocks["system"] = {f"system:{game['system_id']}": 1.0}
+    if game['release_year']:
+        # Five-year eras; the neighboring eras count half so 1999 and 2001 stay close
+        era = game['release_year'] // 5
+        blocks["era"] = {f"era:{era}": 1.0, f"era:{era - 1}": 0.5, f"era:{era + 1}": 0.5}
+    return blocks
+
+def content_hash(game):
+    """64-bit hash of the columns a game's vector is built from"""
+    content = json.dumps([game[column] for column in
+                          ("franchise_id", "franchise_name", "system_id", "publisher", "game_name", "genre", "release_year", "description")])
+    return int.from_bytes(hashlib.blake2b(content.encode(), digest_size=8).digest(), "little", signed=True)
+
+def nearest(vectors, rows, k):
+    """(positions, scores) of the k vectors most similar to each of `rows` (itself excluded), best first"""
+    positions = np.empty((len(rows), k), dtype=np.int64)
+    scores = np.empty((len(rows), k), dtype=np.float32)
+    if k == 0:
+        return positions, scores
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = rows[start:start + BLOCK_ROWS]
+        similarity = vectors[block] @ vectors.T
+        similarity[np.arange(len(block)), block] = -np.inf
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        positions[start:start + len(block)], scores[start:start + len(block)] = best_first(
+            top, np.take_along_axis(similarity, top, axis=1), k)
+    return positions, scores
+
+def scaled(scores):
+    """Scores divided by the highest one, when it is positive"""
+    top = scores.max(initial=0.0)
+    return scores / top if top > 0 else scores
+
+def best_first(candidates, scores, k):
+    """The k highest-scoring candidates of every row, best first"""
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+class ContentRecommender:
+    """Game vectors, content hashes and nearest neighbors in id order. Immutable once built; safe to share."""
+
+    def __init__(self, ids, hashes, vectors, neighbors, scores, document_frequencies, documents, version, stale=0):
+        self.ids = ids
+        self.hashes = hashes
+        self.vectors = vectors
+        self.neighbors = neighbors
+        self.scores = scores
+        self.document_frequencies = document_frequencies
+        self.documents = documents
+        self.version = version
+        # Games written since the last full build
+        self.stale = stale
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dimensions(self):
+        return self.vectors.shape[1]
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    @classmethod
+    def build(cls, games, version, dimensions=RECOMMENDER_DIMENSIONS, neighbors=RECOMMENDER_NEIGHBORS):
+        """Vectors and neighbors for `games` (rows of get_game_features(), in id order) from scratch"""
+        frequencies = Counter()
+        for game in games:
+            frequencies.update(set(game_words(game)))
+        recommender = cls(
+            np.array([game['id'] for game in games], dtype=np.int64),
+            np.array([content_hash(game) for game in games], dtype=np.int64),
+            None, None, None, dict(frequencies), len(games), version
+        )
+        recommender.vectors = recommender.vectorize(games, dimensions)
+        k = min(neighbors, max(len(games) - 1, 0))
+        positions, recommender.scores = nearest(recommender.vectors, np.arange(len(games)), k)
+        recommender.neighbors = recommender.ids[positions]
+        return recommender
+
+    def updated(self, games, version):
+        """A recommender for the current `games`, redoing only what their changes affect"""
+        ids = np.array([game['id'] for game in games], dtype=np.int64)
+        hashes = np.array([content_hash(game) for game in games], dtype=np.int64)
+        old = self.positions(ids)
+        same = old >= 0
+        same[same] = self.hashes[old[same]] == hashes[same]
+        changed = np.flatnonzero(~same)
+        removed = np.setdiff1d(self.ids, ids, assume_unique=True)
+        written = len(changed) + len(removed)
+        if written == 0:
+            return ContentRecommender(self.ids, self.hashes, self.vectors, self.neighbors, self.scores,
+                                      self.document_frequencies, self.documents, version, self.stale)
+
+        k = min(RECOMMENDER_NEIGHBORS, max(len(games) - 1, 0))
+        if self.stale + written > RECOMMENDER_REBUILD_RATIO * len(games) or k != self.k:
+            return ContentRecommender.build(games, version, self.dimensions, k)
+
+        kept = np.flatnonzero(same)
+        vectors = np.empty((len(games), self.dimensions), dtype=np.float32)
+        vectors[kept] = self.vectors[old[kept]]
+        vectors[changed] = self.vectorize([games[i] for i in changed], self.dimensions)
+        neighbors = np.empty((len(games), k), dtype=np.int64)
+        scores = np.empty((len(games), k), dtype=np.float32)
+        neighbors[kept] = self.neighbors[old[kept]]
+        scores[kept] = self.scores[old[kept]]
+
+        # Lists holding a written game may lose it or see its score move: redo
+        # them. The others can only gain written games, so merge those in.
+        written_ids = np.concatenate([ids[changed], removed])
+        redo = np.isin(neighbors[kept], written_ids).any(axis=1)
+        redo = np.concatenate([changed, kept[redo]])
+        merge = np.setdiff1d(kept, redo, assume_unique=True)
+
+        positions, scores[redo] = nearest(vectors, redo, k)
+        neighbors[redo] = ids[positions]
+        for start in range(0, len(merge), BLOCK_ROWS):
+            block = merge[start:start + BLOCK_ROWS]
+            similarity = vectors[block] @ vectors[changed].T
+            candidates = np.concatenate([neighbors[block], np.broadcast_to(ids[changed], similarity.shape)], axis=1)
+            neighbors[block], scores[block] = best_first(candidates, np.concatenate([scores[block], similarity], axis=1), k)
+
+        return ContentRecommender(ids, hashes, vectors, neighbors, scores,
+                                  self.document_frequencies, self.documents, version, self.stale + written)
+
+    def idf(self, word):
+        return math.log((1 + self.documents) / (1 + self.document_frequencies.get(word, 0))) + 1
+
+    def vectorize(self, games, dimensions):
+        """L2-normalized float32 rows for `games`: each block normalized, weighted and hashed"""
+        matrix = np.zeros((len(games), dimensions), dtype=np.float32)
+        for row, game in enumerate(games):
+            blocks = game_blocks(game)
+            counts = Counter(game_words(game))
+            if counts:
+                blocks["text"] = {f"word:{word}": (1 + math.log(count)) * self.idf(word) for word, count in counts.items()}
+            self._add_blocks(matrix[row], blocks)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    def query_vector(self, query):
+        """Vector for free text against titles, genres and descriptions; None if no word of it is in the catalog"""
+        query_words = {word for word in words(query) if word in self.document_frequencies}
+        if not query_words:
+            return None
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        self._add_blocks(vector, {"text": {f"word:{word}": self.idf(word) for word in query_words}})
+        return vector / np.linalg.norm(vector)
+
+    @staticmethod
+    def _add_blocks(row, blocks):
+        dimensions = len(row)
+        for block, features in blocks.items():
+            scale = BLOCK_WEIGHTS[block] / math.sqrt(sum(weight * weight for weight in features.values()))
+            for feature, weight in features.items():
+                # Signed feature hashing: collisions cancel out on average instead of adding up
+                bucket = zlib.crc32(feature.encode())
+                row[bucket % dimensions] += (scale if bucket & 0x80000000 else -scale) * weight
+
+    def positions(self, ids):
+        """Row of each game id, -1 for ids not in the catalog"""
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions == len(self.ids)] = 0
+        found = len(self.ids) > 0 and self.ids[positions] == ids
+        return np.where(found, positions, -1)
+
+    def recommend(self, played, query="", count=10, exclude=()):
+        """Up to `count` (game id, score, because) for a user, best first.
+
+        `played` maps played game ids to weights, negative for games the
+        user disliked; each adds its precomputed neighbors. `query` words
+        are scored against every game and, when any is in the catalog,
+        decide which games qualify. `because` is the played game that
+        contributed most, or None. Played games and `exclude` are skipped.
+        """
+        profile = np.zeros(len(self.ids), dtype=np.float32)
+        strongest = np.zeros(len(self.ids), dtype=np.float32)
+        because = np.full(len(self.ids), -1, dtype=np.int64)
+        for game_id, position in zip(played, self.positions(list(played))):
+            if position < 0:
+                continue
+            weight = played[game_id]
+            targets = self.positions(self.neighbors[position])
+            contribution = weight * self.scores[position]
+            profile[targets] += contribution
+            stronger = contribution > strongest[targets]
+            strongest[targets[stronger]] = contribution[stronger]
+            because[targets[stronger]] = game_id
+
+        scores = profile
+        query = self.query_vector(query)
+        if query is not None:
+            # Disliked games can cancel a match's boost but never make it negative
+            scores = scaled(self.vectors @ query) * (1 + PROFILE_BOOST * np.clip(scaled(profile), -1, None))
+
+        skipped = self.positions(list(played) + list(exclude))
+        scores[skipped[skipped >= 0]] = -np.inf
+        count = min(count, len(scores))
+        if count == 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (int(self.ids[position]), float(scores[position]), int(because[position]) if because[position] >= 0 else None)
+            for position in top if scores[position] > 0
+        ]
+
+    def save(self, directory):
+        """Write the arrays under `directory` and return the recommender loaded back memory-mapped.
+
+        Each save writes a new set of files and then swaps the metadata
+        file that names them, so other processes never load a mix. Only
+        the build it replaced is deleted: workers saving at the same time
+        must not remove each other's files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        build = uuid.uuid4().hex[:12]
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{build}.{name}.npy"), getattr(self, name))
+        meta = {
+            "build": build,
+            "version": self.version,
+            "documents": self.documents,
+            "stale": self.stale,
+            "document_frequencies": self.document_frequencies,
+        }
+        # Mapped before anyone can see it: once open, a racing save deleting
+        # the files doesn't take them away from us
+        saved = ContentRecommender.from_meta(directory, meta) or self
+        previous = read_meta(directory)
+        temporary = os.path.join(directory, f"{build}.{META_FILE}")
+        with open(temporary, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary, os.path.join(directory, META_FILE))
+
+        replaced = previous["build"] if previous else None
+        for name in os.listdir(directory):
+            owner = name.split(".", 1)[0]
+            if owner == build or name == META_FILE:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                # Files of a save that lost the race to a newer one are left
+                # behind; anything that old is no longer anybody's
+                if owner == replaced or time.time() - os.path.getmtime(path) > ABANDONED_AFTER:
+                    os.remove(path)
+            except OSError:
+                # Gone already, or still mapped by a process on a platform
+                # that won't delete open files; a later save removes it
+                pass
+        return saved
+
+    @classmethod
+    def load(cls, directory):
+        """The recommender saved under `directory`, memory-mapped; None if there is none or settings changed"""
+        meta = read_meta(directory)
+        for _ in range(3):
+            if meta is None:
+                return None
+            recommender = cls.from_meta(directory, meta)
+            if recommender is not None:
+                return recommender
+            # Replaced and deleted while we were opening it: follow the new build
+            latest = read_meta(directory)
+            if latest is None or latest["build"] == meta["build"]:
+                return None
+            meta = latest
+        return None
+
+    @classmethod
+    def from_meta(cls, directory, meta):
+        """The build `meta` names, memory-mapped; None if its files are gone or settings changed"""
+        try:
+            arrays = {name: np.load(os.path.join(directory, f"{meta['build']}.{name}.npy"), mmap_mode="r")
+                      for name in ARRAYS}
+            recommender = cls(**arrays, document_frequencies=meta["document_frequencies"], documents=meta["documents"],
+                              version=meta["version"], stale=meta["stale"])
+        except (OSError, ValueError, KeyError):
+            return None
+        if recommender.dimensions != RECOMMENDER_DIMENSIONS or recommender.k > RECOMMENDER_NEIGHBORS:
+            return None
+        return recommender
+
+def read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+_recommender = None
+_recommender_lock = threading.Lock()
+_stats = {"full_builds": 0, "updates": 0, "loads": 0, "last_update_ms": None}
+
+def games_version():
+    return catalog_versions()["games"]["version"]
+
+def get_recommender():
+    """The ContentRecommender for the current catalog, brought up to date after games are written"""
+    global _recommender
+    if _recommender is not None and games_version() == _recommender.version:
+        return _recommender
+    with _recommender_lock:
+        version = games_version()
+        if _recommender is not None and version == _recommender.version:
+            return _recommender
+
+        # Another worker may already have saved this version
+        saved = ContentRecommender.load(RECOMMENDER_DIR)
+        if saved is not None and _recommender is not None and saved.version == version:
+            _stats["loads"] += 1
+            _recommender = saved
+            return _recommender
+
+        # Otherwise diff against what we have; on first use that is the saved
+        # copy, which may come from before a restart or from another database
+        start = time.perf_counter()
+        current = _recommender or saved
+        games = game_functions.get_game_features()
+        if current is None:
+            recommender = ContentRecommender.build(games, version)
+        else:
+            recommender = current.updated(games, version)
+        # A diff that found nothing to redo keeps the arrays it started from
+        if current is None or recommender.ids is not current.ids:
+            _stats["full_builds" if recommender.stale == 0 else "updates"] += 1
+        if saved is not None and recommender.ids is saved.ids and recommender.version == saved.version:
+            _recommender = recommender
+        else:
+            try:
+                _recommender = recommender.save(RECOMMENDER_DIR)
+            except OSError as e:
+                # Serve from memory; the next update tries to save again
+                logger.warning("Could not save the recommender to %s: %s", RECOMMENDER_DIR, e)
+                _recommender = recommender
+        _stats["last_update_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return _recommender
+
+def recommender_stats():
+    """Catalog size and build counters, or None until the recommender is first used"""
+    if _recommender is None:
+        return None
+    return dict(_stats, games=len(_recommender), dimensions=_recommender.dimensions,
+                neighbors=_recommender.k, stale=_recommender.stale)
+
+if __name__ == "__main__":
+    recommender = get_recommender()
+    print(f"{len(recommender)} games, {recommender.k} neighbors each, saved under {RECOMMENDER_DIR}")
+    print(recommender_stats())
@@ -0,0 +1,193 @@
+"""
+Resolve loosely written game titles (as an LLM suggests them) to catalog games.
+
+"Zelda Ocarina of Time", "FINAL FANTASY 7" and "Hades II: Deluxe Edition"
+should all find the game the catalog spells differently. TitleMatcher
+indexes normalized title tokens weighted by rarity, so a lookup only
+visits titles sharing the name's rarest tokens instead of scanning the
+catalog. get_title_matcher() builds it once and rebuilds it when the
+games table changes (its catalog_versions counter, so writes from other
+processes count too).
+"""
+import math
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from db.catalog_cache import catalog_versions
+from db.query import games as game_functions
+
+# Lowest score (0-1) a title needs to count as a match
+MIN_SCORE = float(os.getenv("TITLE_MATCH_MIN_SCORE", "0.6"))
+# A title must hold at least this share of the name's token weight to be scored
+MIN_SHARED = 0.5
+# Unknown tokens are replaced by a catalog token at least this similar (trigram Dice)
+MIN_TOKEN_SIMILARITY = 0.5
+
+ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8",
+    "ix": "9", "xi": "11", "xii": "12", "xiii": "13", "xiv": "14", "xv": "15", "xvi": "16",
+}
+
+# "Title: Subtitle", "Title - Subtitle", "Title – Subtitle"
+SUBTITLE_SEPARATOR = re.compile(r"\s*[:–—]\s*|\s+-\s+")
+
+def normalize_title(title):
+    """Lowercase words without accents or punctuation; roman numerals become digits"""
+    text = unicodedata.normalize("NFKD", title.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"['’]", "", text).replace("&", " and ")
+    return " ".join(ROMAN_NUMERALS.get(word, word) for word in re.findall(r"[^\W_]+", text))
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleMatcher:
+    """Token index over catalog titles with IDF-weighted fuzzy scoring.
+
+    A title's score for a name combines the share of the smaller side's
+    token weight they have in common with the Dice coefficient, so both
+    "name inside title" and "title inside name" score high and the
+    closest length wins. Immutable once built; safe to share.
+    """
+
+    def __init__(self, games, min_score=MIN_SCORE):
+        """`games`: rows with id and game_name, in id order"""
+        self.min_score = min_score
+        self.ids = []
+        self.titles = []
+        self.exact = {}
+        postings = defaultdict(list)
+        for game in games:
+            position = len(self.ids)
+            normalized = normalize_title(game['game_name'])
+            self.ids.append(game['id'])
+            self.titles.append(normalized)
+            self.exact.setdefault(normalized, position)
+            for token in set(normalized.split()):
+                postings[token].append(position)
+
+        count = len(self.ids)
+        self.postings = {token: array("l", positions) for token, positions in postings.items()}
+        self.idf = {token: math.log(1 + count / len(positions)) for token, positions in postings.items()}
+        self.unknown_weight = math.log(1 + 2 * count)
+        self.weights = array("d", (sum(self.idf[token] for token in set(title.split())) for title in self.titles))
+
+        # Trigrams of the vocabulary, to correct tokens the catalog doesn't have
+        self.token_grams = defaultdict(list)
+        for token in self.postings:
+            for gram in trigrams(token):
+                self.token_grams[gram].append(token)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def match(self, name, exclude=()):
+        """(game id, score) of the best title for `name`, or None if nothing reaches min_score.
+
+        Games whose id is in `exclude` are skipped. A name with a subtitle
+        that matches nothing is retried without it.
+        """
+        best = self._match(normalize_title(name), exclude)
+        if best is None:
+            main = SUBTITLE_SEPARATOR.split(name.strip(), maxsplit=1)[0]
+            if main and main != name.strip():
+                best = self._match(normalize_title(main), exclude)
+        return best
+
+    def closest_token(self, token):
+        """(catalog token, similarity) closest to an unknown token, or None"""
+        if len(token) < 4 or token.isdigit():
+            return None
+        grams = trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.token_grams.get(gram, ()))
+        best = None
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(grams) + len(candidate) + 1)
+            if similarity >= MIN_TOKEN_SIMILARITY and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def _match(self, normalized, exclude):
+        if not normalized:
+            return None
+        position = self.exact.get(normalized)
+        if position is not None and self.ids[position] not in exclude:
+            return self.ids[position], 1.0
+
+        # Weight each catalog token of the name counts for when a title shares it
+        terms = {}
+        name_weight = 0.0
+        for token in set(normalized.split()):
+            if token not in self.idf:
+                close = self.closest_token(token)
+                if close is None:
+                    name_weight += self.unknown_weight
+                    continue
+                token, similarity = close
+                weight = self.idf[token] * similarity
+            else:
+                weight = self.idf[token]
+            name_weight += self.idf[token]
+            terms[token] = max(terms.get(token, 0.0), weight)
+
+        # Rarest tokens first: once the weight left to probe is below what a
+        # title needs, titles missing every probed token can't qualify
+        needed = MIN_SHARED * name_weight
+        order = sorted(terms, key=lambda token: len(self.postings[token]))
+        remaining = sum(terms.values())
+        shared = defaultdict(float)
+        probed = 0
+        for token in order:
+            if remaining < needed:
+                break
+            weight = terms[token]
+            for position in self.postings[token]:
+                shared[position] += weight
+            remaining -= weight
+            probed += 1
+        unprobed = order[probed:]
+
+        best = None
+        for position, weight in shared.items():
+            if weight + remaining < needed:
+                continue
+            game_id = self.ids[position]
+            if game_id in exclude:
+                continue
+            if unprobed:
+                tokens = set(self.titles[position].split())
+                weight += sum(terms[token] for token in unprobed if token in tokens)
+            if weight < needed:
+                continue
+            title_weight = self.weights[position]
+            score = (weight / min(name_weight, title_weight) + 2 * weight / (name_weight + title_weight)) / 2
+            if score >= self.min_score and (best is None or (score, -game_id) > (best[1], -best[0])):
+                best = (game_id, score)
+        return best
+
+_matcher = None
+_matcher_version = None
+_matcher_lock = threading.Lock()
+
+def games_version():
+    return catalog_versions()["games"]["version"]
+
+def get_title_matcher():
+    """The TitleMatcher for the current catalog, rebuilt after games are written"""
+    global _matcher, _matcher_version
+    if _matcher is not None and games_version() == _matcher_version:
+        return _matcher
+    with _matcher_lock:
+        # Read the counter before the titles: a write landing in between
+        # only means one more rebuild on the next call
+        version = games_version()
+        if _matcher is None or version != _matcher_version:
+            _matcher = TitleMatcher(game_functions.get_game_titles())
+            _matcher_version = version
+        return _matcher
@@ -0,0 +1,88 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, status
+from db.catalog_cache import catalog_versions
+from db.executor import run_db
+
+# Cache-Control for catalog reads. They need a token, so only the client may
+# cache them; by default it revalidates every time, which is cheap with ETags
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "private, no-cache")
+
+# Tables each catalog resource reads (rows embed franchise and system names)
+CATALOG_SOURCES = {
+    "games": ("games", "franchises", "systems"),
+    "franchises": ("franchises", "systems"),
+    "systems": ("systems",),
+}
+
+def row_etag(row):
+    """ETag from a row's content, so it changes only when the row (or a joined name) does.
+
+    Weak, like the collection tags: JSON and MessagePack bodies share it.
+    """
+    digest = hashlib.blake2b(repr(sorted(row.items())).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(header, etag):
+    """If-None-Match comparison; weak and strong tags match alike (RFC 9110 weak comparison)"""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+class CatalogValidators:
+    """ETag and Last-Modified for a catalog response, from the catalog_versions counters.
+
+    Read them before the data: a write landing in between then only makes
+    the validators look older than the body, so the next request gets a
+    200 instead of a stale 304.
+    """
+
+    def __init__(self, resource, versions):
+        sources = [versions[table] for table in CATALOG_SOURCES[resource]]
+        self.etag = f'W/"{resource}-' + ".".join(str(source['version']) for source in sources) + '"'
+        self.last_modified = max(_parse_timestamp(source['updated_at']) for source in sources)
+
+    def check(self, request, row=None):
+        """Raise 304 if the client's copy is current, else return the headers for the response.
+
+        With `row`, the ETag is that row's own content hash instead of the
+        collection's counters.
+        """
+        etag = row_etag(row) if row is not None else self.etag
+        headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+        # A change later in the same second would share this Last-Modified,
+        # so it is only sent once that second is over
+        if self.last_modified < datetime.now(timezone.utc).replace(microsecond=0):
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            current = etag_matches(if_none_match, etag)
+        else:
+            current = "Last-Modified" in headers and _not_modified_since(
+                request.headers.get("if-modified-since"), self.last_modified
+            )
+        if current:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return headers
+
+async def catalog_validators(resource):
+    return CatalogValidators(resource, await run_db(catalog_versions))
+
+def _parse_timestamp(value):
+    """SQLite CURRENT_TIMESTAMP text as an aware UTC datetime"""
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+def _not_modified_since(header, last_modified):
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
@@ -0,0 +1,174 @@
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("API_COMPRESSION", "1") == "1"
+# Smaller bodies are sent as they are; compressing them saves next to nothing
+COMPRESSION_MIN_SIZE = int(os.getenv("API_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("API_COMPRESSION_GZIP_LEVEL", "5"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("API_COMPRESSION_BROTLI_QUALITY", "4"))
+# Comma-separated path prefixes that are never compressed
+COMPRESSION_EXCLUDE_PATHS = tuple(
+    prefix.strip() for prefix in os.getenv("API_COMPRESSION_EXCLUDE_PATHS", "").split(",") if prefix.strip()
+)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+)
+
+def skip_compression(endpoint):
+    """Route decorator: never compress this route's responses"""
+    endpoint.skip_compression = True
+    return endpoint
+
+def choose_encoding(accept_encoding):
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None for identity"""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        offered[coding.lower()] = q
+
+    wildcard = offered.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = None
+    for coding in candidates:
+        q = offered.get(coding, wildcard)
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=True):
+        # A sync flush makes each streamed chunk decodable as soon as it arrives
+        data = self._compressor.compress(data)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self):
+        return self._compressor.flush()
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush=True):
+        data = self._compressor.process(data)
+        return data + self._compressor.flush() if flush else data
+
+    def finish(self):
+        return self._compressor.finish()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip.
+
+    Whole responses smaller than `minimum_size` pass through untouched;
+    streamed responses are compressed chunk by chunk. Responses that are
+    already encoded, aren't a compressible type, come from a path in
+    `exclude_paths` or from a route marked with @skip_compression are
+    left alone.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=COMPRESSION_GZIP_LEVEL,
+                 brotli_quality=COMPRESSION_BROTLI_QUALITY, exclude_paths=COMPRESSION_EXCLUDE_PATHS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.exclude_paths and scope["path"].startswith(self.exclude_paths)):
+            return await self.app(scope, receive, send)
+        accept_encoding = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), None
+        )
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        await self.app(scope, receive, _CompressedSend(self, scope, send, encoding))
+
+    def compressor(self, encoding):
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+class _CompressedSend:
+    """The `send` callable handed to the app for one response"""
+
+    def __init__(self, middleware, scope, send, encoding):
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible(message["headers"])
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            return await self.send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                await self.send(self.start)
+                return await self.send(message)
+
+            self.compressor = self.middleware.compressor(self.encoding)
+            if not more_body:
+                data = self.compressor.compress(body, flush=False) + self.compressor.finish()
+                await self.send(self._compressed_start(len(data)))
+                return await self.send({"type": "http.response.body", "body": data})
+            await self.send(self._compressed_start())
+
+        data = self.compressor.compress(body) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _compressed_start(self, length=None):
+        headers = [(name, value) for name, value in self.start["headers"] if name != b"content-length"]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return dict(self.start, headers=headers)
+
+    def _compressible(self, headers):
+        endpoint = self.scope.get("endpoint")
+        if getattr(endpoint, "skip_compression", False):
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,38 @@
+from fastapi import HTTPException, status, Header
+from typing import Optional
+from db.executor import run_db
+from db.query import users as user_functions
+
+# Dependency to get current user from token
+async def get_current_user(authorization: Optional[str] = Header(None)):
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header required"
+        )
+    
+    # Expected format: "Bearer <token>"
+    try:
+        scheme, token = authorization.split()
+        if scheme.lower() != "bearer":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication scheme"
+            )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format"
+        )
+    
+    # Cache hits are answered on the event loop; only misses need a worker
+    user = user_functions.get_cached_token_user(token)
+    if user is None:
+        user = await run_db(user_functions.verify_user_token, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    
+    return user
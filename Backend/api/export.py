@@ -0,0 +1,67 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import threading
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from db.client import POOL_SIZE
+from db.executor import run_db
+
+# Each running export holds a pooled connection until it finishes, so only
+# this many run at once; the rest wait here instead of starving the pool
+EXPORT_CONCURRENCY = int(os.getenv("DB_EXPORT_CONCURRENCY", str(max(1, POOL_SIZE // 2))))
+_export_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Dependency for the shared ?format= query parameter
+def export_format(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    return format
+
+def encode_ndjson(columns, rows):
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows).encode()
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+async def encode_rows(rows, format):
+    """Yield an opened RowStream as encoded chunks, one per fetched batch"""
+    columns = await run_db(rows.open)
+    if format == "csv":
+        yield encode_csv([columns])
+    while True:
+        batch = await run_db(rows.fetch)
+        if not batch:
+            break
+        yield encode_csv(batch) if format == "csv" else encode_ndjson(columns, batch)
+
+class ExportResponse(StreamingResponse):
+    """Stream a RowStream as an NDJSON or CSV download.
+
+    Starlette abandons the body iterator when the client disconnects, so
+    the export slot and the stream's connection are released here instead.
+    """
+
+    def __init__(self, rows, format, filename):
+        self.rows = rows
+        super().__init__(
+            encode_rows(rows, format),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+        )
+
+    async def __call__(self, scope, receive, send):
+        async with _export_slots:
+            try:
+                await super().__call__(scope, receive, send)
+            finally:
+                # May run while being cancelled, and a fetch may still be
+                # running in a db worker, so release on a thread of its own
+                threading.Thread(target=self.rows.close, daemon=True).start()
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from pydantic import BaseModel
-from typing import Optional
+from api.caching import catalog_validators
+from api.dependencies import get_current_user
+from api.pagination import page_params, paginated_response
+from api.responses import respond
+from db.executor import run_db
 from db.query import franchises as franchise_functions
-from db.query import users as user_functions
 
 router = APIRouter(prefix="/api", tags=["franchises"])
 
@@ -17,44 +20,13 @@ class UpdateFranchiseRequest(BaseModel):
     franchise_name: str
     franchise_img: str
 
-# Dependency to get current user from token
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
-        )
-    
-    # Expected format: "Bearer <token>"
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user = user_functions.verify_user_token(token)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    return user
-
 # POST /api/franchises - Create new franchise (requires authentication)
 @router.post("/franchises")
 async def create_franchise(
     franchise_data: CreateFranchiseRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    new_franchise = franchise_functions.create_franchise(
+    new_franchise = await run_db(franchise_functions.create_franchise,
         franchise_data.system_id,
         franchise_data.franchise_name,
         franchise_data.franchise_img
@@ -62,16 +34,27 @@ async def create_franchise(
     
     return new_franchise
 
-# GET /api/franchises - Get all franchises (requires authentication)
+# GET /api/franchises - Get a page of franchises (requires authentication)
 @router.get("/franchises")
-async def get_all_franchises(current_user: dict = Depends(get_current_user)):
-    franchises = franchise_functions.get_all_franchises()
-    return {"franchises": franchises}
+async def get_all_franchises(
+    request: Request,
+    sort: str = "id",
+    page: dict = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    headers = (await catalog_validators("franchises")).check(request)
+    response = await paginated_response(
+        "franchises", page, sort,
+        franchise_functions.list_franchises,
+        franchise_functions.count_franchises
+    )
+    return respond(response, headers)
 
 # GET /api/franchises/{id} - Get franchise by ID (requires authentication)
 @router.get("/franchises/{id}")
-async def get_franchise(id: int, current_user: dict = Depends(get_current_user)):
-    franchise = franchise_functions.get_franchise(id)
+async def get_franchise(id: int, request: Request, current_user: dict = Depends(get_current_user)):
+    validators = await catalog_validators("franchises")
+    franchise = await run_db(franchise_functions.get_franchise, id)
     
     if not franchise:
         raise HTTPException(
@@ -79,7 +62,7 @@ async def get_franchise(id: int, current_user: dict = Depends(get_current_user))
             detail="Franchise not found"
         )
     
-    return franchise
+    return respond(franchise, validators.check(request, franchise))
 
 # PUT /api/franchises/{id} - Update franchise (requires authentication)
 @router.put("/franchises/{id}")
@@ -88,21 +71,19 @@ async def update_franchise(
     franchise_data: UpdateFranchiseRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if franchise exists
-    franchise = franchise_functions.get_franchise(id)
-    if not franchise:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Franchise not found"
-        )
-    
-    # Update franchise
-    updated_franchise = franchise_functions.update_franchise(
+    # Update franchise (None if it doesn't exist)
+    updated_franchise = await run_db(franchise_functions.update_franchise,
         id,
         franchise_data.system_id,
         franchise_data.franchise_name,
         franchise_data.franchise_img
     )
+
+    if not updated_franchise:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Franchise not found"
+        )
     
     return updated_franchise
 
@@ -112,13 +93,11 @@ async def delete_franchise(
     id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if franchise exists
-    franchise = franchise_functions.get_franchise(id)
-    if not franchise:
+    result = await run_db(franchise_functions.delete_franchise, id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Franchise not found"
         )
     
-    result = franchise_functions.delete_franchise(id)
     return result
\ No newline at end of file
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
-from pydantic import BaseModel
-from typing import Optional
+from functools import partial
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from api.caching import catalog_validators
+from api.dependencies import get_current_user
+from api.export import ExportResponse, export_format
+from api.pagination import page_params, paginated_response
+from api.responses import respond
+from db.executor import run_db
 from db.query import games as game_functions
-from db.query import users as user_functions
 
 router = APIRouter(prefix="/api", tags=["games"])
 
+# Most ids accepted by GET /api/games?ids= and POST /api/games/batch
+MAX_IDS_GET = 200
+MAX_IDS_BATCH = 5000
+
 # Pydantic models for request validation
 class CreateGameRequest(BaseModel):
     franchise_id: Optional[int] = None
@@ -17,6 +27,44 @@ class CreateGameRequest(BaseModel):
     release_year: Optional[int] = None
     description: Optional[str] = None
 
+class GameIdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_IDS_BATCH)
+
+def parse_ids(ids):
+    """Parse "1,2,3" into [1, 2, 3]"""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not parsed or len(parsed) > MAX_IDS_GET:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must list between 1 and {MAX_IDS_GET} games; use POST /api/games/batch for more"
+        )
+    return parsed
+
+def game_fields(fields: Optional[str] = None):
+    """Parse ?fields=id,game_name into a tuple of whitelisted game fields (None = all)"""
+    if fields is None:
+        return None
+    parsed = tuple(dict.fromkeys(part.strip() for part in fields.split(",") if part.strip()))
+    unknown = [name for name in parsed if name not in game_functions.GAME_FIELDS]
+    if not parsed or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be a comma-separated list of: {', '.join(game_functions.GAME_FIELDS)}"
+        )
+    return parsed
+
+async def games_by_ids(ids, headers=None, fields=None):
+    """Games in request order, plus the ids that don't exist"""
+    games = await run_db(game_functions.get_games_by_ids, ids, fields)
+    found = {game['id'] for game in games}
+    return respond({"games": games, "missing": [id for id in dict.fromkeys(ids) if id not in found]}, headers)
+
 class UpdateGameRequest(BaseModel):
     franchise_id: Optional[int] = None
     system_id: int
@@ -27,44 +75,13 @@ class UpdateGameRequest(BaseModel):
     release_year: Optional[int] = None
     description: Optional[str] = None
 
-# Dependency to get current user from token
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
-        )
-    
-    # Expected format: "Bearer <token>"
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user = user_functions.verify_user_token(token)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    return user
-
 # POST /api/games - Create new game (requires authentication)
 @router.post("/games")
 async def create_game(
     game_data: CreateGameRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    new_game = game_functions.create_game(
+    new_game = await run_db(game_functions.create_game,
         game_data.franchise_id,
         game_data.system_id,
         game_data.publisher,
@@ -77,16 +94,100 @@ async def create_game(
     
     return new_game
 
-# GET /api/games - Get all games (requires authentication)
+# GET /api/games - Get a page of games, optionally filtered (requires authentication)
+# With ?ids=1,2,3 it returns exactly those games instead, in that order
 @router.get("/games")
-async def get_all_games(current_user: dict = Depends(get_current_user)):
-    games = game_functions.get_all_games()
-    return {"games": games}
+async def get_all_games(
+    request: Request,
+    ids: Optional[str] = None,
+    franchise_id: Optional[int] = None,
+    system_id: Optional[int] = None,
+    genre: Optional[str] = None,
+    publisher: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    sort: str = "id",
+    page: dict = Depends(page_params),
+    fields: Optional[tuple] = Depends(game_fields),
+    current_user: dict = Depends(get_current_user)
+):
+    headers = (await catalog_validators("games")).check(request)
+    if ids is not None:
+        return await games_by_ids(parse_ids(ids), headers, fields)
+
+    filters = {
+        "franchise_id": franchise_id,
+        "system_id": system_id,
+        "genre": genre,
+        "publisher": publisher,
+        "year_min": year_min,
+        "year_max": year_max,
+    }
+    response = await paginated_response(
+        "games", page, sort,
+        partial(game_functions.list_games, fields=fields),
+        game_functions.count_games,
+        filters=filters
+    )
+    return respond(response, headers)
+
+# GET /api/games/export - Stream every matching game as NDJSON or CSV (requires authentication)
+@router.get("/games/export")
+async def export_games(
+    franchise_id: Optional[int] = None,
+    system_id: Optional[int] = None,
+    genre: Optional[str] = None,
+    publisher: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    format: str = Depends(export_format),
+    fields: Optional[tuple] = Depends(game_fields),
+    current_user: dict = Depends(get_current_user)
+):
+    filters = {
+        "franchise_id": franchise_id,
+        "system_id": system_id,
+        "genre": genre,
+        "publisher": publisher,
+        "year_min": year_min,
+        "year_max": year_max,
+    }
+    return ExportResponse(game_functions.export_games(filters, fields), format, "games")
+
+# POST /api/games/batch - Get many games by id, in request order (requires authentication)
+@router.post("/games/batch")
+async def get_games_batch(
+    batch: GameIdsRequest,
+    fields: Optional[tuple] = Depends(game_fields),
+    current_user: dict = Depends(get_current_user)
+):
+    return await games_by_ids(batch.ids, fields=fields)
+
+# GET /api/games/search - Full-text search (requires authentication)
+# Declared before /games/{id} so "search" isn't parsed as an id
+@router.get("/games/search")
+async def search_games(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: dict = Depends(page_params),
+    fields: Optional[tuple] = Depends(game_fields),
+    current_user: dict = Depends(get_current_user)
+):
+    headers = (await catalog_validators("games")).check(request)
+    try:
+        result = await run_db(game_functions.search_games, q, page["limit"], page["after"], fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return respond({"games": result["items"], "next_cursor": result["next_cursor"]}, headers)
 
 # GET /api/games/{id} - Get game by ID (requires authentication)
 @router.get("/games/{id}")
-async def get_game(id: int, current_user: dict = Depends(get_current_user)):
-    game = game_functions.get_game(id)
+async def get_game(id: int, request: Request, current_user: dict = Depends(get_current_user)):
+    validators = await catalog_validators("games")
+    game = await run_db(game_functions.get_game, id)
     
     if not game:
         raise HTTPException(
@@ -94,25 +195,29 @@ async def get_game(id: int, current_user: dict = Depends(get_current_user)):
             detail="Game not found"
         )
     
-    return game
+    return respond(game, validators.check(request, game))
 
 # GET /api/games/franchise/{franchise_id} - Get games by franchise (requires authentication)
 @router.get("/games/franchise/{franchise_id}")
 async def get_games_by_franchise(
     franchise_id: int,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
-    games = game_functions.get_games_by_franchise(franchise_id)
-    return {"games": games}
+    headers = (await catalog_validators("games")).check(request)
+    games = await run_db(game_functions.get_games_by_franchise, franchise_id)
+    return respond({"games": games}, headers)
 
 # GET /api/games/genre/{genre} - Get games by genre (requires authentication)
 @router.get("/games/genre/{genre}")
 async def get_games_by_genre(
     genre: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
-    games = game_functions.get_games_by_genre(genre)
-    return {"games": games}
+    headers = (await catalog_validators("games")).check(request)
+    games = await run_db(game_functions.get_games_by_genre, genre)
+    return respond({"games": games}, headers)
 
 # PUT /api/games/{id} - Update game (requires authentication)
 @router.put("/games/{id}")
@@ -121,16 +226,8 @@ async def update_game(
     game_data: UpdateGameRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if game exists
-    game = game_functions.get_game(id)
-    if not game:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Game not found"
-        )
-    
-    # Update game
-    updated_game = game_functions.update_game(
+    # Update game (None if it doesn't exist)
+    updated_game = await run_db(game_functions.update_game,
         id,
         game_data.franchise_id,
         game_data.system_id,
@@ -141,6 +238,12 @@ async def update_game(
         game_data.release_year,
         game_data.description
     )
+
+    if not updated_game:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game not found"
+        )
     
     return updated_game
 
@@ -150,13 +253,11 @@ async def delete_game(
     id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if game exists
-    game = game_functions.get_game(id)
-    if not game:
+    result = await run_db(game_functions.delete_game, id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Game not found"
         )
     
-    result = game_functions.delete_game(id)
     return result
\ No newline at end of file
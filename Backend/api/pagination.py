@@ -0,0 +1,31 @@
+from fastapi import HTTPException, status, Query
+from typing import Optional
+from api.responses import respond
+from db.executor import run_db
+from db.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Dependency for the shared limit/after/count query parameters
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern="^(exact|approx)$")
+):
+    return {"limit": limit, "after": after, "count": count}
+
+async def paginated_response(key, page, sort, list_fn, count_fn, *args, **kwargs):
+    """Fetch one page with list_fn(*args, limit, after, sort, **kwargs) and shape the response
+
+    Extra keyword arguments (such as filters) are passed to count_fn as well.
+    """
+    try:
+        result = await run_db(list_fn, *args, limit=page["limit"], after=page["after"], sort=sort, **kwargs)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    response = {key: result["items"], "next_cursor": result["next_cursor"]}
+    if page["count"]:
+        response["total"] = await run_db(count_fn, *args, mode=page["count"], **kwargs)
+    return respond(response)
@@ -1,4 +1,17 @@
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, HTTPException, status
+from agents.llm_cache import llm_cache_stats
+from agents.model_client import model_client_stats
+from agents.recommender import recommender_stats
+from db.catalog_cache import catalog_cache_stats
+from db.client import pool_stats
+from db.executor import run_db
+from db.query.users import auth_cache_stats
+from db.utils.password_utils import password_stats
+from db.writer import writer_stats
+
+# GET /stats describes server internals, so it is off unless asked for
+STATS_ENABLED = os.getenv("STATS_ENABLED", "0") == "1"
 
 router = APIRouter(tags=["health"])
 
@@ -9,4 +22,25 @@ async def ping():
     Keep-alive endpoint to prevent Render from spinning down.
     Used by UptimeRobot to ping the server every 5 minutes.
     """
-    return {"status": "alive"}
\ No newline at end of file
+    return {"status": "alive"}
+
+# GET /stats - Runtime counters for the database layer (only with STATS_ENABLED=1)
+@router.get("/stats")
+async def stats():
+    """Connection pool, password hashing, cache, group-commit writer, LLM cache, model client and recommender counters"""
+    if not STATS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    return {
+        "db_pool": pool_stats(),
+        "passwords": password_stats(),
+        "auth_cache": auth_cache_stats(),
+        "catalog_cache": catalog_cache_stats(),
+        "writer": writer_stats(),
+        # The sqlite backend counts its rows, so this one runs on the db executor
+        "llm_cache": await run_db(llm_cache_stats),
+        "model_client": model_client_stats(),
+        "recommender": recommender_stats()
+    }
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
-from typing import Optional
+from collections import Counter
+from fastapi import APIRouter, HTTPException, status, Depends
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from api.export import ExportResponse, export_format
+from api.pagination import page_params, paginated_response
+from db.executor import run_db
 from db.query import playedGames as played_games_functions
-from db.query import games as game_functions
 
 router = APIRouter(prefix="/api/played", tags=["played_games"])
 
+# Most games accepted by one batch request
+MAX_BATCH_SIZE = 1000
+
 # Pydantic models
 class PlayedGameCreate(BaseModel):
     game_id: int
@@ -16,95 +22,147 @@ class PlayedGameUpdate(BaseModel):
     rating: Optional[int] = None
     notes: Optional[str] = None
 
-# GET - Get all played games for a user
+class PlayedGameBatchCreate(BaseModel):
+    games: List[PlayedGameCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class PlayedGameIds(BaseModel):
+    game_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+def validate_rating(rating):
+    """400 unless the rating is empty or 1-5, which the played_games CHECK would reject"""
+    if rating is not None and not 1 <= rating <= 5:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rating must be 1-5"
+        )
+
+def batch_response(results):
+    """Per-item results plus a count of each status"""
+    return {
+        "results": results,
+        "summary": dict(Counter(result["status"] for result in results))
+    }
+
+# GET - Get a page of played games for a user
 @router.get("/{user_id}")
-def get_played_games(user_id: int):
-    """Get all games a user has played"""
-    played_games = played_games_functions.get_user_played_games(user_id)
-    return {"played_games": played_games}
+async def get_played_games(
+    user_id: int,
+    sort: str = "-played_at",
+    page: dict = Depends(page_params)
+):
+    """Get the games a user has played, newest first by default"""
+    return await paginated_response(
+        "played_games", page, sort,
+        played_games_functions.list_user_played_games,
+        played_games_functions.count_user_played_games,
+        user_id
+    )
+
+# GET - Stream all of a user's played games as NDJSON or CSV
+@router.get("/{user_id}/export")
+async def export_played_games(user_id: int, format: str = Depends(export_format)):
+    """Download a user's whole played list without paging, newest first"""
+    return ExportResponse(
+        played_games_functions.export_user_played_games(user_id),
+        format,
+        f"played-games-{user_id}"
+    )
 
 # POST - Mark game as played
 @router.post("/{user_id}")
-def mark_as_played(user_id: int, played_game: PlayedGameCreate):
+async def mark_as_played(user_id: int, played_game: PlayedGameCreate):
     """Mark a game as played for a user"""
     
-    # Check if already played
-    if played_games_functions.check_if_played(user_id, played_game.game_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Game already marked as played"
-        )
-    
-    # Check if game exists
-    game = game_functions.get_game(played_game.game_id)
-    if not game:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Game not found"
-        )
-    
-    # Create new played game entry
-    result = played_games_functions.mark_game_as_played(
+    validate_rating(played_game.rating)
+
+    # Insert unless the game is missing or already played, in one statement
+    result = await run_db(played_games_functions.mark_game_as_played,
         user_id,
         played_game.game_id,
         played_game.rating,
         played_game.notes
     )
     
+    if result.get("error") == played_games_functions.GAME_NOT_FOUND:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=result["error"]
+        )
+    if result.get("error") == played_games_functions.ALREADY_PLAYED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
+        )
+    
     return {"message": "Game marked as played", "data": result}
 
+# POST - Mark many games as played in one transaction
+@router.post("/{user_id}/batch")
+async def mark_many_as_played(user_id: int, batch: PlayedGameBatchCreate):
+    """Mark up to MAX_BATCH_SIZE games as played, with a status per game"""
+    results = await run_db(played_games_functions.mark_games_as_played,
+        user_id,
+        [game.model_dump() for game in batch.games]
+    )
+    return batch_response(results)
+
+# POST - Remove many games from played games in one transaction
+@router.post("/{user_id}/batch/unmark")
+async def unmark_many_as_played(user_id: int, batch: PlayedGameIds):
+    """Remove up to MAX_BATCH_SIZE games from the played list, with a status per game"""
+    results = await run_db(played_games_functions.unmark_games_as_played, user_id, batch.game_ids)
+    return batch_response(results)
+
+# POST - Check played status for many games
+@router.post("/{user_id}/batch/check")
+async def check_many_played(user_id: int, batch: PlayedGameIds):
+    """Played status, rating and played_at for each requested game, in request order"""
+    results = await run_db(played_games_functions.check_played_batch, user_id, batch.game_ids)
+    return {"results": results}
+
 # DELETE - Remove from played games
 @router.delete("/{user_id}/{game_id}")
-def unmark_as_played(user_id: int, game_id: int):
+async def unmark_as_played(user_id: int, game_id: int):
     """Remove a game from user's played list"""
     
-    # Check if it exists
-    if not played_games_functions.check_if_played(user_id, game_id):
+    result = await run_db(played_games_functions.unmark_game_as_played, user_id, game_id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Played game record not found"
         )
     
-    result = played_games_functions.unmark_game_as_played(user_id, game_id)
     return result
 
 # PATCH - Update rating/notes
 @router.patch("/{user_id}/{game_id}")
-def update_played_game(
+async def update_played_game(
     user_id: int,
     game_id: int,
     update_data: PlayedGameUpdate
 ):
     """Update rating or notes for a played game"""
     
-    # Check if it exists
-    if not played_games_functions.check_if_played(user_id, game_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Played game record not found"
-        )
-    
-    # Validate rating
-    if update_data.rating is not None:
-        if update_data.rating < 1 or update_data.rating > 5:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Rating must be 1-5"
-            )
+    validate_rating(update_data.rating)
     
-    result = played_games_functions.update_played_game(
+    result = await run_db(played_games_functions.update_played_game,
         user_id,
         game_id,
         update_data.rating,
         update_data.notes
     )
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Played game record not found"
+        )
     
     return result
 
 # GET - Check if game is played
 @router.get("/{user_id}/check/{game_id}")
-def check_if_played(user_id: int, game_id: int):
+async def check_if_played(user_id: int, game_id: int):
     """Check if user has played a specific game"""
     
-    is_played = played_games_functions.check_if_played(user_id, game_id)
+    is_played = await run_db(played_games_functions.check_if_played, user_id, game_id)
     return {"played": is_played}
\ No newline at end of file
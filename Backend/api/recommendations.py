@@ -0,0 +1,36 @@
+import json
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from agents.agent2 import agent2_stream_recommendations
+from agents.model_client import ModelError
+from api.compression import skip_compression
+from api.dependencies import get_current_user
+
+router = APIRouter(prefix="/api", tags=["recommendations"])
+
+def sse_event(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def recommendation_events(query, user_id, count):
+    try:
+        async for event, data in agent2_stream_recommendations(query, user_id, count):
+            yield sse_event(event, data)
+    except ModelError as e:
+        yield sse_event("error", {"detail": str(e)})
+
+# GET /api/recommendations - Stream recommendations for the current user as Server-Sent Events (requires authentication)
+# Events are tiny and must reach the client right away, so they are never compressed
+@router.get("/recommendations")
+@skip_compression
+async def get_recommendations(
+    q: str = Query(..., min_length=1, max_length=500),
+    count: int = Query(5, ge=1, le=10),
+    current_user: dict = Depends(get_current_user)
+):
+    return StreamingResponse(
+        recommendation_events(q, current_user['id'], count),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx-style proxies from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,105 @@
+import os
+from contextvars import ContextVar
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Opt-in: serialize responses with orjson and answer MessagePack to clients
+# that ask for it, instead of jsonable_encoder + stdlib json
+FAST_RESPONSES = os.getenv("API_FAST_RESPONSES", "0") == "1"
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+# Wire format picked for the current request by NegotiationMiddleware
+_wire_format = ContextVar("wire_format", default="json")
+
+def negotiate(accept):
+    """Pick "msgpack" or "json" from an Accept header.
+
+    MessagePack has to be listed, rated above application/json and at
+    least as high as any wildcard; everything else gets JSON.
+    """
+    quality = {"json": 0.0, "msgpack": 0.0, "wildcard": 0.0}
+    for part in (accept or "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            quality["msgpack"] = max(quality["msgpack"], q)
+        elif media_type == "application/json":
+            quality["json"] = max(quality["json"], q)
+        elif media_type in ("application/*", "*/*"):
+            quality["wildcard"] = max(quality["wildcard"], q)
+    preferred = quality["msgpack"] > quality["json"] and quality["msgpack"] >= quality["wildcard"]
+    if msgpack is not None and quality["msgpack"] > 0 and preferred:
+        return "msgpack"
+    return "json"
+
+class NegotiationMiddleware:
+    """ASGI middleware that records the wire format the client's Accept header asks for"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept"), None)
+        token = _wire_format.set(negotiate(accept))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wire_format.reset(token)
+
+class FastResponse(JSONResponse):
+    """JSON rendered with orjson, or MessagePack when the request negotiated it"""
+
+    def __init__(self, content, *args, **kwargs):
+        self.wire_format = _wire_format.get()
+        if self.wire_format == "msgpack":
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+        self.headers.append("Vary", "Accept")
+
+    def render(self, content):
+        if self.wire_format == "msgpack":
+            return msgpack.packb(content, use_bin_type=True)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)
+
+def respond(content, headers=None):
+    """Wrap a plain dict/list result for a hot route, adding `headers`.
+
+    With fast responses on, returning the response directly also skips
+    FastAPI's jsonable_encoder pass; query results are already plain
+    JSON types. Otherwise `content` is returned as-is when there are no
+    headers to add. A result that already is a response just gets the
+    headers.
+    """
+    if isinstance(content, Response):
+        content.headers.update(headers or {})
+        return content
+    if FAST_RESPONSES:
+        return FastResponse(content, headers=headers)
+    if headers:
+        return JSONResponse(jsonable_encoder(content), headers=headers)
+    return content
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from pydantic import BaseModel
-from typing import Optional
+from api.caching import catalog_validators
+from api.dependencies import get_current_user
+from api.pagination import page_params, paginated_response
+from api.responses import respond
+from db.executor import run_db
 from db.query import systems as system_functions
-from db.query import users as user_functions
 
 router = APIRouter(prefix="/api", tags=["systems"])
 
@@ -15,60 +18,40 @@ class UpdateSystemRequest(BaseModel):
     system_name: str
     system_img: str
 
-# Dependency to get current user from token
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
-        )
-    
-    # Expected format: "Bearer <token>"
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user = user_functions.verify_user_token(token)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    return user
-
 # POST /api/systems - Create new system (requires authentication)
 @router.post("/systems")
 async def create_system(
     system_data: CreateSystemRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    new_system = system_functions.create_system(
+    new_system = await run_db(system_functions.create_system,
         system_data.system_name,
         system_data.system_img
     )
     
     return new_system
 
-# GET /api/systems - Get all systems (requires authentication)
+# GET /api/systems - Get a page of systems (requires authentication)
 @router.get("/systems")
-async def get_all_systems(current_user: dict = Depends(get_current_user)):
-    systems = system_functions.get_all_systems()
-    return {"systems": systems}
+async def get_all_systems(
+    request: Request,
+    sort: str = "id",
+    page: dict = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    headers = (await catalog_validators("systems")).check(request)
+    response = await paginated_response(
+        "systems", page, sort,
+        system_functions.list_systems,
+        system_functions.count_systems
+    )
+    return respond(response, headers)
 
 # GET /api/systems/{id} - Get system by ID (requires authentication)
 @router.get("/systems/{id}")
-async def get_system(id: int, current_user: dict = Depends(get_current_user)):
-    system = system_functions.get_system(id)
+async def get_system(id: int, request: Request, current_user: dict = Depends(get_current_user)):
+    validators = await catalog_validators("systems")
+    system = await run_db(system_functions.get_system, id)
     
     if not system:
         raise HTTPException(
@@ -76,7 +59,7 @@ async def get_system(id: int, current_user: dict = Depends(get_current_user)):
             detail="System not found"
         )
     
-    return system
+    return respond(system, validators.check(request, system))
 
 # PUT /api/systems/{id} - Update system (requires authentication)
 @router.put("/systems/{id}")
@@ -85,20 +68,18 @@ async def update_system(
     system_data: UpdateSystemRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if system exists
-    system = system_functions.get_system(id)
-    if not system:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="System not found"
-        )
-    
-    # Update system
-    updated_system = system_functions.update_system(
+    # Update system (None if it doesn't exist)
+    updated_system = await run_db(system_functions.update_system,
         id,
         system_data.system_name,
         system_data.system_img
     )
+
+    if not updated_system:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="System not found"
+        )
     
     return updated_system
 
@@ -108,13 +89,11 @@ async def delete_system(
     id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if system exists
-    system = system_functions.get_system(id)
-    if not system:
+    result = await run_db(system_functions.delete_system, id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="System not found"
         )
     
-    result = system_functions.delete_system(id)
     return result
\ No newline at end of file
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from api.dependencies import get_current_user
+from api.pagination import page_params, paginated_response
+from db.executor import run_db
 from db.query import users as user_functions
+from db.utils.password_utils import PasswordQueueFull, check_password_async, hash_password_async
 
 router = APIRouter(prefix="/api", tags=["users"])
 
@@ -18,57 +21,32 @@ class UpdateUserRequest(BaseModel):
     email: EmailStr
     is_verified: bool
 
-# Dependency to get current user from token
-async def get_current_user(authorization: Optional[str] = Header(None)):
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
-        )
-    
-    # Expected format: "Bearer <token>"
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    
-    user = user_functions.verify_user_token(token)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    
-    return user
-
 # POST /api/register - Create new user (requires authentication)
 @router.post("/register")
 async def register(
     user_data: RegisterRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if user already exists
-    existing_user = user_functions.get_user_by_email(user_data.email)
-    if existing_user:
+    # Hash on the bcrypt pool, not a db worker, so a burst of sign-ups can't stall queries
+    try:
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordQueueFull:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again shortly"
         )
-    
-    # Create new user (always unverified by default)
-    new_user = user_functions.create_user(
+
+    # Create new user (always unverified by default); None means the email is taken
+    new_user = await run_db(user_functions.insert_user,
         user_data.email,
-        user_data.password,
+        hashed_password,
         is_verified=False
     )
+    if not new_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
     
     # Create token for new user
     token = user_functions.create_token({
@@ -88,7 +66,18 @@ async def register(
 # POST /api/login - Authenticate user
 @router.post("/login")
 async def login(credentials: LoginRequest):
-    result = user_functions.login_user(credentials.email, credentials.password)
+    # Only the lookup runs on a db worker; bcrypt is awaited on its own pool
+    user = await run_db(user_functions.get_user_by_email, credentials.email)
+    result = user_functions.login_error(user)
+    if result is None:
+        try:
+            password_ok = await check_password_async(credentials.password, user['password_hash'])
+        except PasswordQueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again shortly"
+            )
+        result = user_functions.login_response(user) if password_ok else {"error": "Invalid email or password"}
     
     if "error" in result:
         raise HTTPException(
@@ -98,16 +87,23 @@ async def login(credentials: LoginRequest):
     
     return result
 
-# GET /api/users - Get all users (requires authentication)
+# GET /api/users - Get a page of users (requires authentication)
 @router.get("/users")
-async def get_all_users(current_user: dict = Depends(get_current_user)):
-    users = user_functions.get_users()
-    return {"users": users}
+async def get_all_users(
+    sort: str = "id",
+    page: dict = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    return await paginated_response(
+        "users", page, sort,
+        user_functions.list_users,
+        user_functions.count_users
+    )
 
 # GET /api/users/{id} - Get user by ID (requires authentication)
 @router.get("/users/{id}")
 async def get_user(id: int, current_user: dict = Depends(get_current_user)):
-    user = user_functions.get_user(id)
+    user = await run_db(user_functions.get_user, id)
     
     if not user:
         raise HTTPException(
@@ -124,20 +120,18 @@ async def update_user(
     user_data: UpdateUserRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if user exists
-    user = user_functions.get_user(id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Update user
-    updated_user = user_functions.update_user(
+    # Update user (None if it doesn't exist)
+    updated_user = await run_db(user_functions.update_user,
         id,
         user_data.email,
         user_data.is_verified
     )
+
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     
     return updated_user
 
@@ -147,15 +141,13 @@ async def delete_user(
     id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    # Check if user exists
-    user = user_functions.get_user(id)
-    if not user:
+    result = await run_db(user_functions.delete_user, id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    result = user_functions.delete_user(id)
     return result
 
 # GET /api/me - Get current authenticated user
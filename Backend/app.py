@@ -1,15 +1,47 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from agents.model_client import close_model_client
 from api import users as user_routes
 from api import systems as system_routes
 from api import games as game_routes
 from api import franchises as franchise_routes
 from api import ping as ping_routes
 from api import playedGames as played_games_routes
+from api import recommendations as recommendation_routes
+from api.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from api.responses import FAST_RESPONSES, FastResponse, NegotiationMiddleware
+from db.catalog_cache import close_catalog_cache
+from db.client import DB_PATH, close_pool
+from db.migrations import migrate
+from db.executor import shutdown_executor
+from db.writer import close_writer
+from db.utils.password_utils import shutdown_hasher
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    if os.getenv("DB_MIGRATE_ON_STARTUP", "1") == "1":
+        migrate(DB_PATH)
+    yield
+    await close_model_client()
+    shutdown_executor()
+    close_writer()
+    shutdown_hasher()
+    close_catalog_cache()
+    close_pool()
+
+if FAST_RESPONSES:
+    app = FastAPI(lifespan=lifespan, default_response_class=FastResponse)
+    app.add_middleware(NegotiationMiddleware)
+else:
+    app = FastAPI(lifespan=lifespan)
+# Added last so it wraps everything else and compresses the final bytes
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
 app.include_router(user_routes.router)
 app.include_router(system_routes.router)
 app.include_router(game_routes.router)
 app.include_router(franchise_routes.router)
 app.include_router(ping_routes.router)
-app.include_router(played_games_routes.router)
\ No newline at end of file
+app.include_router(played_games_routes.router)
+app.include_router(recommendation_routes.router)
@@ -0,0 +1,57 @@
+"""Minimal in-process ASGI client so benchmarks don't need a running server"""
+import asyncio
+import json
+
+async def request(app, method, path, headers=None, body=None, on_chunk=None):
+    """Send one request through the ASGI app and return (status, headers, body)
+
+    With `on_chunk`, each body chunk is passed to it as it arrives instead of
+    being collected, and the returned body is empty.
+    """
+    path, _, query = path.partition("?")
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    response = {"status": None, "headers": {}, "body": b""}
+    sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            if on_chunk is not None:
+                on_chunk(message.get("body", b""))
+            else:
+                response["body"] += message.get("body", b"")
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    finished.set()
+    return response["status"], response["headers"], response["body"]
@@ -0,0 +1,96 @@
+"""
+Catalog read throughput with and without the read-through cache.
+
+Builds a --games row catalog and replays the same skewed read mix
+(single games from a hot set, list pages, systems and franchises) with a
+game update every --write-every reads, once through the cached query
+functions and once through their .uncached originals. Run from Backend/:
+
+    python -m benchmarks.bench_catalog_cache [--games 100000] [--reads 50000]
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from db.catalog_cache import catalog_cache_stats, close_catalog_cache
+from db.client import close_pool
+from db.query import franchises as franchise_functions
+from db.query import games as game_functions
+from db.query import systems as system_functions
+
+def workload(games, reads, seed=1):
+    """(kind, argument) pairs: 70% hot games, 20% list pages, 10% systems/franchises"""
+    rng = random.Random(seed)
+    hot = [rng.randint(1, games) for _ in range(500)]
+    sorts = ["id", "name", "-year"]
+    ops = []
+    for _ in range(reads):
+        roll = rng.random()
+        if roll < 0.7:
+            ops.append(("game", rng.choice(hot)))
+        elif roll < 0.9:
+            ops.append(("games", rng.choice(sorts)))
+        elif roll < 0.95:
+            ops.append(("system", rng.randint(1, 20)))
+        else:
+            ops.append(("franchises", None))
+    return ops, hot
+
+def run(ops, hot, write_every, cached):
+    def call(fn, *args):
+        return fn(*args) if cached else fn.uncached(*args)
+
+    rng = random.Random(2)
+    start = time.perf_counter()
+    for i, (kind, arg) in enumerate(ops, 1):
+        if kind == "game":
+            call(game_functions.get_game, arg)
+        elif kind == "games":
+            call(game_functions.list_games, 100, None, arg)
+        elif kind == "system":
+            call(system_functions.get_system, arg)
+        else:
+            call(franchise_functions.list_franchises, 100)
+        if write_every and i % write_every == 0:
+            game = game_functions.get_game.uncached(rng.choice(hot))
+            game_functions.update_game(
+                game["id"], game["franchise_id"], game["system_id"], game["publisher"],
+                game["game_name"] + "!", game["game_img"], game["genre"],
+                game["release_year"], game["description"]
+            )
+    return len(ops) / (time.perf_counter() - start)
+
+def main(games, reads, write_every):
+    print(f"Building {games} games...")
+    create_catalog_db(DB_FILE, games=games)
+    ops, hot = workload(games, reads)
+
+    uncached = run(ops, hot, write_every, cached=False)
+    close_catalog_cache()
+    cached = run(ops, hot, write_every, cached=True)
+    stats = catalog_cache_stats()
+
+    print(f"\nuncached: {uncached:>9.0f} reads/s")
+    print(f"cached:   {cached:>9.0f} reads/s  ({cached / uncached:.1f}x)")
+    print(f"hit rate {stats['hit_rate']:.1%}, {stats['invalidations']} invalidations, "
+          f"{stats['evictions']} evictions, {stats['size']} entries")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--reads", type=int, default=50000)
+    parser.add_argument("--write-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        main(args.games, args.reads, args.write_every)
+    finally:
+        close_catalog_cache()
+        close_pool()
+        remove_db(DB_FILE)
@@ -0,0 +1,98 @@
+"""
+Response compression: bytes saved vs CPU spent.
+
+Compresses real response bodies (a 100-game page, a 1000-game page, an
+NDJSON export and a MessagePack page) with gzip and brotli at several
+levels, reporting compressed size and compression time, then times
+GET /api/games?limit=100 through the app in-process with each
+Accept-Encoding. Run from Backend/:
+
+    python -m benchmarks.bench_compression [--games 10000]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+import timeit
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ["API_FAST_RESPONSES"] = "1"
+os.environ.setdefault("JWT_SECRET", "bench-compression")
+
+from api.compression import BrotliCompressor, GzipCompressor, brotli
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+from db.utils.jwt_utils import create_token
+
+HEADERS = {"Authorization": "Bearer " + create_token({"user_id": 1})}
+
+def compressors():
+    configs = [(f"gzip {level}", lambda level=level: GzipCompressor(level)) for level in (1, 5, 9)]
+    if brotli is not None:
+        configs += [(f"br {quality}", lambda quality=quality: BrotliCompressor(quality)) for quality in (1, 4, 6, 11)]
+    return configs
+
+async def payloads():
+    async def body(path, headers=None):
+        status, _, content = await request(app, "GET", path, headers=dict(HEADERS, **(headers or {})))
+        assert status == 200, status
+        return content
+
+    return [
+        ("100 games (JSON)", await body("/api/games?limit=100")),
+        ("1000 games (JSON)", await body("/api/games?limit=1000&sort=name")),
+        ("export (NDJSON)", await body("/api/games/export")),
+        ("100 games (msgpack)", await body("/api/games?limit=100", {"Accept": "application/msgpack"})),
+    ]
+
+def compression_table(bodies):
+    print(f"{'payload':>20} {'coding':>8} {'size':>10} {'saved':>7} {'time':>9} {'MB/s':>7}")
+    for label, content in bodies:
+        print(f"{label:>20} {'none':>8} {len(content) / 1000:>8.1f}kB")
+        for name, make in compressors():
+            def compress():
+                compressor = make()
+                return compressor.compress(content, flush=False) + compressor.finish()
+            runs = max(1, 2_000_000 // len(content))
+            elapsed = min(timeit.repeat(compress, number=runs, repeat=3)) / runs
+            size = len(compress())
+            print(f"{'':>20} {name:>8} {size / 1000:>8.1f}kB {1 - size / len(content):>6.0%} "
+                  f"{elapsed * 1000:>7.2f}ms {len(content) / elapsed / 1e6:>7.0f}")
+
+async def end_to_end():
+    path = "/api/games?limit=100"
+    print(f"\nGET {path} (catalog cache warm)")
+    for coding in ["identity", "gzip", "br"] if brotli is not None else ["identity", "gzip"]:
+        headers = dict(HEADERS, **{"Accept-Encoding": coding})
+        _, _, content = await request(app, "GET", path, headers=headers)
+        start = time.perf_counter()
+        for _ in range(500):
+            await request(app, "GET", path, headers=headers)
+        rate = 500 / (time.perf_counter() - start)
+        print(f"{coding:>10}: {rate:>6.0f} req/s, {len(content) / 1000:.1f}kB on the wire")
+
+async def main(games):
+    create_catalog_db(DB_FILE, games=games)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'bench@example.com', 'x')")
+    conn.commit()
+    conn.close()
+
+    compression_table(await payloads())
+    await end_to_end()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=10000)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.games))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
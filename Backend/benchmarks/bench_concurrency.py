@@ -0,0 +1,92 @@
+"""
+Latency of concurrent GET /api/games while logins are running.
+
+Fires --requests concurrent GET /api/games calls at the app in-process while
+--logins login loops keep bcrypt busy, then reports p50/p99. Run from Backend/:
+
+    python -m benchmarks.bench_concurrency [--requests 200] [--logins 4]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+import bcrypt
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+from db.utils.jwt_utils import create_token
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def timed_get(headers, issued_at):
+    # Measured from when the burst was issued, so time spent queued behind a
+    # blocked event loop counts the same as it would for a real client
+    status, _, _ = await request(app, "GET", "/api/games", headers=headers)
+    assert status == 200, status
+    return time.perf_counter() - issued_at
+
+async def login_loop(stop):
+    count = 0
+    while not stop.is_set():
+        status, _, _ = await request(app, "POST", "/api/login", body={"email": EMAIL, "password": PASSWORD})
+        assert status == 200, status
+        count += 1
+        # Yield even if the handler never did, so a blocking app still finishes
+        await asyncio.sleep(0)
+    return count
+
+async def main(requests, logins):
+    headers = {"Authorization": f"Bearer {create_token({'user_id': 1, 'email': EMAIL})}"}
+
+    stop = asyncio.Event()
+    login_tasks = [asyncio.create_task(login_loop(stop)) for _ in range(logins)]
+    await asyncio.sleep(0.1)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_get(headers, start) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    completed_logins = sum(await asyncio.gather(*login_tasks))
+
+    print(f"{requests} x GET /api/games with {logins} concurrent login loops")
+    print(f"  wall time : {elapsed * 1000:8.1f} ms")
+    print(f"  p50       : {percentile(latencies, 50) * 1000:8.1f} ms")
+    print(f"  p99       : {percentile(latencies, 99) * 1000:8.1f} ms")
+    print(f"  logins    : {completed_logins}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=4)
+    parser.add_argument("--games", type=int, default=500)
+    args = parser.parse_args()
+
+    create_catalog_db(DB_FILE, games=args.games)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute(
+        "INSERT INTO users (id, email, password_hash, is_verified) VALUES (1, ?, ?, 1)",
+        [EMAIL, bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")]
+    )
+    conn.commit()
+    conn.close()
+
+    try:
+        asyncio.run(main(args.requests, args.logins))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
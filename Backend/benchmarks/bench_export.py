@@ -0,0 +1,94 @@
+"""
+Whole-catalog export: one list in memory vs the streaming export route.
+
+For each catalog size, builds the full get_all_games list and serializes
+it the way a list endpoint would, then streams GET /api/games/export
+(NDJSON and CSV) through the app in-process, discarding chunks as they
+arrive. Reports time to first byte, total time and peak Python memory
+(tracemalloc, measured in a separate pass). Run from Backend/:
+
+    python -m benchmarks.bench_export [--sizes 10000 100000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import tracemalloc
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("JWT_SECRET", "bench-export")
+
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+from db.query import games as game_functions
+from db.utils.jwt_utils import create_token
+
+HEADERS = {"Authorization": "Bearer " + create_token({"user_id": 1})}
+
+async def whole_list():
+    """What a list endpoint does: load every row, then serialize once"""
+    start = time.perf_counter()
+    body = json.dumps(game_functions.get_all_games.uncached()).encode()
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(body)
+
+async def streamed(format):
+    start = time.perf_counter()
+    first = None
+    size = 0
+
+    def on_chunk(chunk):
+        nonlocal first, size
+        if chunk and first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+
+    status, _, _ = await request(app, "GET", f"/api/games/export?format={format}", headers=HEADERS, on_chunk=on_chunk)
+    assert status == 200, status
+    return first, time.perf_counter() - start, size
+
+async def measure(run):
+    first, total, size = await run()
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, size, peak
+
+async def main(sizes):
+    print(f"{'games':>8} {'path':>12} {'first byte':>11} {'total':>9} {'body':>9} {'peak memory':>12}")
+    for games in sizes:
+        remove_db(DB_FILE)
+        close_pool()
+        create_catalog_db(DB_FILE, games=games)
+        conn = sqlite3.connect(DB_FILE)
+        conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'export@example.com', 'x')")
+        conn.commit()
+        conn.close()
+
+        paths = [
+            ("list", whole_list),
+            ("ndjson", lambda: streamed("ndjson")),
+            ("csv", lambda: streamed("csv")),
+        ]
+        for label, run in paths:
+            first, total, size, peak = await measure(run)
+            print(f"{games:>8} {label:>12} {first * 1000:>9.1f}ms {total * 1000:>7.0f}ms "
+                  f"{size / 1e6:>7.1f}MB {peak / 1e6:>10.1f}MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.sizes))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
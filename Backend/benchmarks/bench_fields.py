@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets: full game rows vs ?fields= projections.
+
+For pages of --rows games, compares every field against a few projections:
+query time with the catalog cache bypassed, bytes fetched from SQLite
+(the summed size of the returned values), serialized JSON size and encode
+time, plus the query plan, to show which joins are skipped. Then times
+GET /api/games?limit=100 through the app in-process with and without
+?fields=. Run from Backend/:
+
+    python -m benchmarks.bench_fields [--rows 100 1000] [--games 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import timeit
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("JWT_SECRET", "bench-fields")
+
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+from db.query import games as game_functions
+from db.utils.jwt_utils import create_token
+
+HEADERS = {"Authorization": "Bearer " + create_token({"user_id": 1})}
+
+PROJECTIONS = [
+    ("all fields", None),
+    ("id,game_name,system_name", ("id", "game_name", "system_name")),
+    ("id,game_name,release_year", ("id", "game_name", "release_year")),
+    ("id,game_name", ("id", "game_name")),
+]
+
+def value_bytes(rows):
+    """Roughly what SQLite hands back: the size of every value in the rows"""
+    return sum(len(str(value).encode()) for row in rows for value in row.values() if value is not None)
+
+def plan(fields):
+    columns, joins = game_functions.build_game_projection(fields)
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        steps = conn.execute(f"EXPLAIN QUERY PLAN SELECT {columns} FROM games g {joins} ORDER BY g.id LIMIT 100").fetchall()
+    finally:
+        conn.close()
+    return "; ".join(step[-1] for step in steps)
+
+def projection_table(sizes):
+    print(f"{'rows':>6} {'fields':>28} {'query':>9} {'fetched':>10} {'json':>10} {'encode':>9}")
+    for rows in sizes:
+        for label, fields in PROJECTIONS:
+            def query():
+                return game_functions.list_games.uncached(limit=rows, fields=fields)["items"]
+            query_time = min(timeit.repeat(query, number=5, repeat=3)) / 5
+            items = query()
+            encode_time = min(timeit.repeat(lambda: json.dumps(items), number=5, repeat=3)) / 5
+            print(f"{rows:>6} {label:>28} {query_time * 1000:>7.2f}ms {value_bytes(items) / 1000:>8.1f}kB "
+                  f"{len(json.dumps(items)) / 1000:>8.1f}kB {encode_time * 1000:>7.2f}ms")
+
+    print("\nquery plans")
+    for label, fields in PROJECTIONS:
+        print(f"{label:>28}: {plan(fields)}")
+
+async def end_to_end():
+    print("\nGET /api/games?limit=100 (catalog cache warm)")
+    for label, fields in PROJECTIONS:
+        path = "/api/games?limit=100" + (f"&fields={','.join(fields)}" if fields else "")
+        _, _, content = await request(app, "GET", path, headers=HEADERS)
+        start = time.perf_counter()
+        for _ in range(500):
+            status, _, _ = await request(app, "GET", path, headers=HEADERS)
+            assert status == 200, status
+        rate = 500 / (time.perf_counter() - start)
+        print(f"{label:>28}: {rate:>6.0f} req/s, {len(content) / 1000:.1f}kB")
+
+def main(sizes, games):
+    create_catalog_db(DB_FILE, games=games)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'bench@example.com', 'x')")
+    conn.commit()
+    conn.close()
+
+    projection_table(sizes)
+    asyncio.run(end_to_end())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--games", type=int, default=20000)
+    args = parser.parse_args()
+
+    try:
+        main(args.rows, args.games)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
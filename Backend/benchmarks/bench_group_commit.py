@@ -0,0 +1,86 @@
+"""
+Write throughput: one commit per write vs the group-commit writer.
+
+--threads worker threads (like the DB executor) each mark --writes games
+as played and then re-rate them, first with every write committing on
+its own pooled connection, then with DB_GROUP_COMMIT routing them
+through db/writer.py. Failed writes ("database is locked" and the like)
+are counted rather than raised. Run from Backend/:
+
+    python -m benchmarks.bench_group_commit [--threads 8] [--writes 500] [--profile default]
+"""
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500, help="games marked (then re-rated) per thread")
+    parser.add_argument("--profile", default="tuned", help="DB_PRAGMA_PROFILE to run under")
+    return parser.parse_args()
+
+ARGS = parse_args()
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ["DB_PRAGMA_PROFILE"] = ARGS.profile
+
+from db import client
+from db.client import close_pool
+from db.query import playedGames as played_functions
+from db.writer import close_writer, writer_stats
+
+def worker(user_id, game_ids):
+    failed = 0
+    for game_id in game_ids:
+        try:
+            played_functions.mark_game_as_played(user_id, game_id, rating=3)
+        except sqlite3.Error:
+            failed += 1
+    for game_id in game_ids:
+        try:
+            played_functions.update_played_game(user_id, game_id, rating=5)
+        except sqlite3.Error:
+            failed += 1
+    return failed
+
+def run(threads, writes, first_user):
+    game_ids = list(range(1, writes + 1))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        failed = sum(pool.map(worker, range(first_user, first_user + threads), [game_ids] * threads))
+    elapsed = time.perf_counter() - start
+    return threads * writes * 2 / elapsed, failed
+
+def main(threads, writes, profile):
+    create_catalog_db(DB_FILE, games=writes)
+    conn = sqlite3.connect(DB_FILE)
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash) VALUES (?, ?, 'x')",
+        [(i, f"writer{i}@example.com") for i in range(1, threads * 2 + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+    client.GROUP_COMMIT = False
+    direct, direct_failed = run(threads, writes, 1)
+    client.GROUP_COMMIT = True
+    grouped, grouped_failed = run(threads, writes, threads + 1)
+    stats = writer_stats()
+
+    print(f"\n{threads} threads x {writes * 2} writes, {profile} PRAGMA profile")
+    print(f"commit per write: {direct:>8.0f} writes/s, {direct_failed} failed")
+    print(f"group commit:     {grouped:>8.0f} writes/s, {grouped_failed} failed  ({grouped / direct:.1f}x)")
+    print(f"{stats['commits']} commits, {stats['avg_group']} writes per commit on average, largest {stats['largest_group']}")
+
+if __name__ == "__main__":
+    try:
+        main(ARGS.threads, ARGS.writes, ARGS.profile)
+    finally:
+        close_writer()
+        close_pool()
+        remove_db(DB_FILE)
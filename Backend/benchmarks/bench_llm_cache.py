@@ -0,0 +1,106 @@
+"""
+LLM completion cache: model calls saved by the memory and SQLite backends.
+
+Replays --requests recommendation requests (two completions each, shaped
+like agent2's prompts) from --users users picking from a handful of
+queries, with some users marking a new game halfway through so their
+prompts change. A local stand-in client answers after --latency seconds
+instead of Groq. Reports wall time, hit rate, model time saved and the
+cost of a cache hit per backend. Run from Backend/:
+
+    python -m benchmarks.bench_llm_cache [--requests 300] [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import time
+import timeit
+
+from benchmarks.fixtures import StandInClient, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from agents.llm_cache import CachedChatClient, LLMCache, MemoryBackend, SQLiteBackend
+from db.client import close_pool
+from db.migrations import migrate
+
+MODEL = "llama-3.3-70b-versatile"
+QUERIES = [
+    "I want a challenging action RPG with great boss fights",
+    "Something relaxing to play with friends",
+    "A story-driven game with great music",
+    "Short games I can finish in a weekend",
+    "Strategy games like Fire Emblem",
+]
+
+def workload(requests, users, rng):
+    played = {user: [f"Played {user}-{i}" for i in range(rng.randint(2, 8))] for user in range(users)}
+    plan = []
+    for i in range(requests):
+        user = rng.randrange(users)
+        if i == requests // 2 and user % 3 == 0:
+            played[user].append(f"Played {user}-new")
+        plan.append((user, rng.choice(QUERIES[: 2 + user % 4]), list(played[user])))
+    return plan
+
+def recommend(client, query, played):
+    """The two completions agent2 makes for one request"""
+    candidates = client.chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": f"""
+Generate 15 game titles that match this request:
+
+User query: "{query}"
+User has played: {', '.join(played)}
+
+Return ONLY a JSON array of titles.
+"""}],
+        temperature=0.7,
+        max_tokens=500,
+    ).choices[0].message.content
+    return client.chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": f"Select 5 games from this list for: \"{query}\"\n\nGames:\n{candidates}"}],
+        temperature=0.3,
+        max_tokens=2000,
+    ).choices[0].message.content
+
+def run(label, make_cache, plan, latency):
+    model = StandInClient(latency)
+    cache = make_cache()
+    client = CachedChatClient(model, cache) if cache is not None else model
+    start = time.perf_counter()
+    for _, query, played in plan:
+        recommend(client, query, played)
+    elapsed = time.perf_counter() - start
+
+    line = f"{label:>8}: {elapsed:>6.2f}s, {model.calls:>4} model calls"
+    if cache is not None:
+        stats = cache.stats()
+        _, query, played = plan[-1]
+        hit = min(timeit.repeat(lambda: recommend(client, query, played), number=200, repeat=3)) / 400
+        line += (f", hit rate {stats['hits'] / (stats['hits'] + stats['misses']):.0%}, "
+                 f"{stats['latency_saved_seconds']:.1f}s of model time saved, {hit * 1e6:.0f}us per hit")
+    print(line)
+
+def main(requests, users, latency):
+    migrate(DB_FILE)
+    plan = workload(requests, users, random.Random(0))
+    print(f"{requests} requests from {users} users, stand-in model answering in {latency * 1000:.0f}ms\n")
+    run("off", lambda: None, plan, latency)
+    run("memory", lambda: LLMCache(MemoryBackend()), plan, latency)
+    run("sqlite", lambda: LLMCache(SQLiteBackend()), plan, latency)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    try:
+        main(args.requests, args.users, args.latency)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
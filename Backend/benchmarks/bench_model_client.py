@@ -0,0 +1,135 @@
+"""
+Async model client vs sequential blocking calls, against benchmarks/fake_openai.py.
+
+Starts the fake API in-process and sends --requests recommendation-shaped
+requests (two dependent completions each, like agent2):
+- sequential: one request after another on a plain httpx.Client with no
+  timeout or retries, the way the sync agents block a worker
+- async, new connection per call: all at once, no connection reuse
+- async client: all at once through AsyncModelClient (concurrency limit,
+  keep-alive pool, deadlines, jittered retries)
+The fake API answers in --latency seconds and injects 503s, 429s and
+responses stalled for --stall seconds. Reports wall time, p50/p99
+latency per request, failed requests, retries and the connections the
+server saw. Run from Backend/:
+
+    python -m benchmarks.bench_model_client [--requests 60] [--error-rate 0.05] [--stall-rate 0.02]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import threading
+import time
+
+os.environ["LLM_CACHE"] = "off"
+
+import httpx
+import uvicorn
+
+from agents.model_client import AsyncModelClient, ModelError
+from benchmarks.fake_openai import create_app
+
+MODEL = "llama-3.3-70b-versatile"
+
+def start_server(args):
+    app = create_app(args.latency, args.latency / 4, args.error_rate, args.rate_limit_rate,
+                     args.stall_rate, args.stall, seed=0)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+def messages(i, step):
+    return [{"role": "user", "content": f"Request {i}, step {step}: recommend games"}]
+
+def payload(i, step):
+    return {"model": MODEL, "messages": messages(i, step), "temperature": 0.7, "max_tokens": 500}
+
+def sequential(base_url, count):
+    latencies, failed = [], 0
+    with httpx.Client(base_url=base_url + "/v1", timeout=None) as client:
+        for i in range(count):
+            start = time.perf_counter()
+            try:
+                for step in (1, 2):
+                    client.post("/chat/completions", json=payload(i, step)).raise_for_status()
+            except httpx.HTTPError:
+                failed += 1
+            latencies.append(time.perf_counter() - start)
+    return latencies, failed, None
+
+async def new_connection_per_call(base_url, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            for step in (1, 2):
+                async with semaphore, httpx.AsyncClient(base_url=base_url + "/v1", timeout=None) as client:
+                    (await client.post("/chat/completions", json=payload(i, step))).raise_for_status()
+            return time.perf_counter() - start, False
+        except httpx.HTTPError:
+            return time.perf_counter() - start, True
+
+    results = await asyncio.gather(*(one(i) for i in range(count)))
+    return [latency for latency, _ in results], sum(failed for _, failed in results), None
+
+async def model_client(base_url, count, args):
+    client = AsyncModelClient(base_url=base_url + "/v1", timeout=args.deadline,
+                              attempt_timeout=args.attempt_timeout, concurrency=args.concurrency)
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            for step in (1, 2):
+                await client.chat(MODEL, messages(i, step), temperature=0.7, max_tokens=500)
+            return time.perf_counter() - start, False
+        except ModelError:
+            return time.perf_counter() - start, True
+
+    try:
+        results = await asyncio.gather(*(one(i) for i in range(count)))
+    finally:
+        await client.close()
+    return [latency for latency, _ in results], sum(failed for _, failed in results), client.stats()
+
+def run(label, args, fn):
+    server, base_url = start_server(args)
+    try:
+        start = time.perf_counter()
+        latencies, failed, stats = fn(base_url)
+        elapsed = time.perf_counter() - start
+        seen = httpx.get(base_url + "/stats").json()
+    finally:
+        server.should_exit = True
+    cuts = statistics.quantiles(latencies, n=100)
+    retries = stats["retries"] if stats else 0
+    print(f"{label:>26}: {elapsed:>6.2f}s  p50 {cuts[49] * 1000:>6.0f}ms  p99 {cuts[98] * 1000:>6.0f}ms  "
+          f"failed {failed:>3}  retries {retries:>3}  connections {seen['connections']:>4}")
+
+def main(args):
+    print(f"{args.requests} requests x 2 completions, {args.latency * 1000:.0f}ms model latency, "
+          f"{args.error_rate:.0%} 503s, {args.rate_limit_rate:.0%} 429s, {args.stall_rate:.0%} stalls of {args.stall:g}s\n")
+    run("sequential (sync)", args, lambda url: sequential(url, args.requests))
+    run("async, connection per call", args,
+        lambda url: asyncio.run(new_connection_per_call(url, args.requests, args.concurrency)))
+    run("AsyncModelClient", args, lambda url: asyncio.run(model_client(url, args.requests, args)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--stall-rate", type=float, default=0.02)
+    parser.add_argument("--stall", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--attempt-timeout", type=float, default=1.0)
+    parser.add_argument("--deadline", type=float, default=10.0)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Page latency for keyset pagination against LIMIT/OFFSET on a large catalog.
+
+Builds a --games row catalog, then times the first page and a page near
+the end for each sort. Run from Backend/:
+
+    python -m benchmarks.bench_pagination [--games 1000000] [--limit 100]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from db.client import close_pool, fetch_all
+from db.query import games as game_functions
+from db.utils.pagination import encode_cursor
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def offset_page(column, descending, offset, limit):
+    direction = "DESC" if descending else "ASC"
+    return fetch_all(
+        f"""
+        SELECT g.*, f.franchise_name, s.system_name
+        FROM games g
+        LEFT JOIN franchises f ON g.franchise_id = f.id
+        LEFT JOIN systems s ON g.system_id = s.id
+        ORDER BY {column} {direction}, g.id {direction}
+        LIMIT ? OFFSET ?
+        """,
+        [limit, offset]
+    )
+
+def main(games, limit, sorts):
+    print(f"Building {games} games...")
+    create_catalog_db(DB_FILE, games=games)
+    depth = games - limit * 2
+
+    print(f"\n{'sort':>8} {'first page':>12} {'keyset @depth':>15} {'offset @depth':>15}")
+    for sort in sorts:
+        column, field = game_functions.GAME_SORTS[sort.lstrip("-")]
+        descending = sort.startswith("-")
+        anchor = offset_page(column, descending, depth - 1, 1)[0]
+        cursor = encode_cursor([sort, anchor[field], anchor["id"]])
+
+        first = timed(lambda: game_functions.list_games.uncached(limit, None, sort))
+        keyset = timed(lambda: game_functions.list_games.uncached(limit, cursor, sort))
+        offset = timed(lambda: offset_page(column, descending, depth, limit), repeat=2)
+        print(f"{sort:>8} {first:>10.2f}ms {keyset:>13.2f}ms {offset:>13.2f}ms")
+
+    exact = timed(lambda: game_functions.count_games.uncached("exact"), repeat=3)
+    approx = timed(lambda: game_functions.count_games.uncached("approx"), repeat=3)
+    print(f"\ncount exact: {exact:.2f}ms  approx: {approx:.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--sorts", default="id,name,-year")
+    args = parser.parse_args()
+
+    try:
+        main(args.games, args.limit, args.sorts.split(","))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
@@ -0,0 +1,79 @@
+"""
+Library import and list rendering: one request per game vs the batch routes.
+
+Marks --games games as played for a fresh user with one POST each, then
+with a single POST /api/played/{user_id}/batch, and does the same for
+played checks. Requests go through the app in-process, so the numbers
+leave out network round trips, which only widen the gap. Run from
+Backend/:
+
+    python -m benchmarks.bench_played_batch [--games 500]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+async def one_by_one_marks(user_id, game_ids):
+    for game_id in game_ids:
+        status, _, _ = await request(app, "POST", f"/api/played/{user_id}", body={"game_id": game_id, "rating": 4})
+        assert status == 200, status
+
+async def batch_marks(user_id, game_ids):
+    body = {"games": [{"game_id": game_id, "rating": 4} for game_id in game_ids]}
+    status, _, _ = await request(app, "POST", f"/api/played/{user_id}/batch", body=body)
+    assert status == 200, status
+
+async def one_by_one_checks(user_id, game_ids):
+    for game_id in game_ids:
+        status, _, _ = await request(app, "GET", f"/api/played/{user_id}/check/{game_id}")
+        assert status == 200, status
+
+async def batch_checks(user_id, game_ids):
+    status, _, _ = await request(app, "POST", f"/api/played/{user_id}/batch/check", body={"game_ids": game_ids})
+    assert status == 200, status
+
+async def main(games):
+    create_catalog_db(DB_FILE, games=games * 2)
+    conn = sqlite3.connect(DB_FILE)
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash) VALUES (?, ?, 'x')",
+        [(1, "single@example.com"), (2, "batch@example.com")]
+    )
+    conn.commit()
+    conn.close()
+    game_ids = list(range(1, games + 1))
+
+    rows = [
+        ("mark", await timed(one_by_one_marks(1, game_ids)), await timed(batch_marks(2, game_ids))),
+        ("check", await timed(one_by_one_checks(1, game_ids)), await timed(batch_checks(2, game_ids))),
+    ]
+    print(f"\n{games} games   {'one request each':>18} {'one batch':>12}")
+    for label, single, batch in rows:
+        print(f"{label:>8}   {single:>16.1f}ms {batch:>10.1f}ms  ({single / batch:.0f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.games))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
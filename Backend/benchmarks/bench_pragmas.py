@@ -0,0 +1,133 @@
+"""
+Mixed read/write throughput for each PRAGMA profile.
+
+Readers run the get_game join while writers insert played_games rows, all
+against the same file. Run from Backend/:
+
+    python -m benchmarks.bench_pragmas [--seconds 5] [--readers 8] [--writers 2]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import partial
+
+from db.client import ConnectionPool, PRAGMA_PROFILES, get_connection
+
+SCHEMA = """
+    CREATE TABLE systems(id INTEGER PRIMARY KEY, system_name TEXT NOT NULL);
+    CREATE TABLE franchises(id INTEGER PRIMARY KEY, franchise_name TEXT NOT NULL);
+    CREATE TABLE games(
+        id INTEGER PRIMARY KEY,
+        franchise_id INTEGER,
+        system_id INTEGER NOT NULL,
+        publisher TEXT NOT NULL,
+        game_name TEXT NOT NULL,
+        genre TEXT,
+        description TEXT
+    );
+    CREATE TABLE played_games(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        game_id INTEGER NOT NULL,
+        rating INTEGER
+    );
+"""
+
+READ_SQL = """
+    SELECT g.*, f.franchise_name, s.system_name
+    FROM games g
+    LEFT JOIN franchises f ON g.franchise_id = f.id
+    LEFT JOIN systems s ON g.system_id = s.id
+    WHERE g.id = ?
+"""
+
+WRITE_SQL = "INSERT INTO played_games (user_id, game_id, rating) VALUES (?, ?, ?)"
+
+def build_database(path, games):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO systems VALUES (?, ?)", [(i, f"System {i}") for i in range(1, 21)])
+    conn.executemany("INSERT INTO franchises VALUES (?, ?)", [(i, f"Franchise {i}") for i in range(1, 201)])
+    conn.executemany(
+        "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (i, i % 200 + 1, i % 20 + 1, "Publisher", f"Game {i}", "RPG", "x" * 200)
+            for i in range(1, games + 1)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def run_profile(profile, seconds, readers, writers, games):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    build_database(path, games)
+
+    pool = ConnectionPool(
+        connect=partial(get_connection, path, PRAGMA_PROFILES[profile]),
+        size=readers + writers,
+    )
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        done = 0
+        while time.perf_counter() < deadline:
+            with pool.connection() as conn:
+                conn.execute(READ_SQL, [random.randint(1, games)]).fetchone()
+            done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with pool.connection() as conn:
+                    conn.execute(WRITE_SQL, [random.randint(1, 1000), random.randint(1, games), 5])
+                    conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    pool.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return {
+        "reads/s": counts["reads"] / seconds,
+        "writes/s": counts["writes"] / seconds,
+        "locked": counts["errors"],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--games", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers / {args.writers} writers, {args.games} games, {args.seconds}s per profile\n")
+    for profile in ("default", "tuned"):
+        result = run_profile(profile, args.seconds, args.readers, args.writers, args.games)
+        print(
+            f"{profile:>8}: {result['reads/s']:>10.0f} reads/s "
+            f"{result['writes/s']:>8.0f} writes/s  ({result['locked']} locked errors)"
+        )
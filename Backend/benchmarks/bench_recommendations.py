@@ -0,0 +1,95 @@
+"""
+Recommendations: time to first result, whole pipeline vs Server-Sent Events.
+
+Runs the recommendation pipeline --runs times against the fake model API
+(benchmarks/fake_openai.py, answering in --latency seconds) two ways:
+awaiting agent2_generate_recommendations_async, which returns once both
+completions are done, and GET /api/recommendations through the app
+in-process, timing the first event, the first recommendation and the
+end of the stream. The LLM cache is off so every run calls the model.
+Run from Backend/:
+
+    python -m benchmarks.bench_recommendations [--latency 1.0] [--runs 5]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ["LLM_CACHE"] = "off"
+os.environ.setdefault("JWT_SECRET", "bench-recommendations")
+
+import agents.model_client as model_client
+from agents.agent2 import agent2_generate_recommendations_async
+from app import app
+from benchmarks.asgi import request
+from benchmarks.bench_model_client import start_server
+from db.client import close_pool
+from db.utils.jwt_utils import create_token
+
+HEADERS = {"Authorization": "Bearer " + create_token({"user_id": 1})}
+QUERY = "I want a challenging action RPG with great boss fights"
+
+async def whole_pipeline():
+    start = time.perf_counter()
+    await agent2_generate_recommendations_async(QUERY, 1)
+    return time.perf_counter() - start
+
+async def streamed():
+    start = time.perf_counter()
+    marks = {}
+
+    def on_chunk(chunk):
+        now = time.perf_counter() - start
+        marks.setdefault("first event", now)
+        if b"event: recommendation" in chunk:
+            marks.setdefault("first recommendation", now)
+
+    status, _, _ = await request(app, "GET", f"/api/recommendations?q={QUERY}", headers=HEADERS, on_chunk=on_chunk)
+    assert status == 200, status
+    marks["last event"] = time.perf_counter() - start
+    return marks
+
+async def measure(runs):
+    whole = [await whole_pipeline() for _ in range(runs)]
+    streams = [await streamed() for _ in range(runs)]
+    await model_client.close_model_client()
+
+    print(f"{'whole pipeline':>24}: {statistics.median(whole) * 1000:>6.0f}ms")
+    for mark in ("first event", "first recommendation", "last event"):
+        print(f"{'SSE ' + mark:>24}: {statistics.median(stream[mark] for stream in streams) * 1000:>6.0f}ms")
+
+def main(latency, runs):
+    create_catalog_db(DB_FILE, games=10000)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'bench@example.com', 'x')")
+    conn.executemany("INSERT INTO played_games (user_id, game_id) VALUES (1, ?)", [(i,) for i in range(1, 6)])
+    conn.commit()
+    conn.close()
+
+    args = argparse.Namespace(latency=latency, error_rate=0.0, rate_limit_rate=0.0, stall_rate=0.0, stall=0.0)
+    server, base_url = start_server(args)
+    model_client._model_client = model_client.AsyncModelClient(base_url=base_url + "/v1")
+    print(f"fake model answering in ~{latency * 1000:.0f}ms per completion (median of {runs} runs)\n")
+    try:
+        asyncio.run(measure(runs))
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        main(args.latency, args.runs)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
@@ -0,0 +1,130 @@
+"""
+Local content-based recommender: build and update cost, and recommendation latency with and without the model.
+
+On a --games catalog, times the full build (vectors plus every game's
+nearest neighbors), a restart (loading the memory-mapped files and
+checking them against the table), an incremental update after --writes
+game writes and a single recommend() call. Then runs the recommendation
+pipeline against the fake model API (benchmarks/fake_openai.py,
+answering in --latency seconds):
+- llm candidates: two completions, like before (AGENT2_CANDIDATES=llm)
+- local candidates: the recommender, then one completion to pick and explain
+- local, model down: the recommender's picks with their own reasons
+The LLM cache is off so every run calls the model. Run from Backend/:
+
+    python -m benchmarks.bench_recommender [--games 10000] [--latency 1.0] [--writes 100]
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.fixtures import create_catalog_db, game_description, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ["LLM_CACHE"] = "off"
+
+import agents.model_client as model_client
+import agents.recommender as recommender
+from agents import agent2
+from benchmarks.bench_model_client import start_server
+from db.client import close_pool
+from db.query import games as game_functions
+
+QUERY = "I want a challenging action RPG with great boss fights"
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def reset():
+    recommender._recommender = None
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def build_and_update(writes):
+    reset()
+    built, build_ms = timed(recommender.get_recommender)
+    print(f"{'full build':>24}: {build_ms:>8.1f}ms  ({len(built)} games, {built.k} neighbors each, "
+          f"{directory_size(recommender.RECOMMENDER_DIR) / 1e6:.1f} MB on disk)")
+
+    reset()
+    _, load_ms = timed(recommender.get_recommender)
+    print(f"{'restart (load + check)':>24}: {load_ms:>8.1f}ms")
+
+    rng = random.Random(0)
+    for game_id in rng.sample(range(1, len(built) + 1), writes):
+        game = game_functions.get_game(game_id)
+        game_functions.update_game(game_id, game['franchise_id'], game['system_id'], game['publisher'], game['game_name'],
+                                   game['game_img'], game['genre'], game['release_year'], game_description(-game_id))
+    _, update_ms = timed(recommender.get_recommender)
+    print(f"{f'update after {writes} writes':>24}: {update_ms:>8.1f}ms")
+
+    current = recommender.get_recommender()
+    played = {1: 1.0, 2: 2 / 3, 3: 2 / 3}
+    runs = [timed(current.recommend, played, QUERY, 10)[1] for _ in range(50)]
+    print(f"{'recommend()':>24}: {statistics.median(runs):>8.2f}ms")
+
+async def pipeline(runs):
+    async def once():
+        start = time.perf_counter()
+        # The agent narrates every step; keep the table readable
+        with redirect_stdout(io.StringIO()):
+            await agent2.agent2_generate_recommendations_async(QUERY, 1)
+        return (time.perf_counter() - start) * 1000
+
+    print()
+    for label, candidates in (("llm candidates", "llm"), ("local candidates", "local")):
+        agent2.CANDIDATES = candidates
+        times = [await once() for _ in range(runs)]
+        print(f"{label:>24}: {statistics.median(times):>8.0f}ms")
+    await model_client.close_model_client()
+
+    # Nothing listening: every model call fails straight away
+    model_client._model_client = model_client.AsyncModelClient(base_url="http://127.0.0.1:9/v1", max_retries=0)
+    times = [await once() for _ in range(runs)]
+    print(f"{'local, model down':>24}: {statistics.median(times):>8.0f}ms")
+    await model_client.close_model_client()
+
+def main(args):
+    create_catalog_db(DB_FILE, games=args.games)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'bench@example.com', 'x')")
+    conn.executemany("INSERT INTO played_games (user_id, game_id, rating) VALUES (1, ?, ?)", [(1, 5), (2, 4), (3, 4)])
+    conn.commit()
+    conn.close()
+
+    build_and_update(args.writes)
+
+    server_args = argparse.Namespace(latency=args.latency, error_rate=0.0, rate_limit_rate=0.0, stall_rate=0.0, stall=0.0)
+    server, base_url = start_server(server_args)
+    model_client._model_client = model_client.AsyncModelClient(base_url=base_url + "/v1")
+    print(f"\nfake model answering in ~{args.latency * 1000:.0f}ms per completion (median of {args.runs} runs)", end="")
+    try:
+        asyncio.run(pipeline(args.runs))
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--writes", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        main(args)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
+        shutil.rmtree(recommender.RECOMMENDER_DIR, ignore_errors=True)
@@ -0,0 +1,60 @@
+"""
+Latency of GET /api/games/search queries at catalog scale.
+
+Builds a --games row catalog (the FTS index is filled by the migration
+triggers) and reports median/p95 latency of search_games for a mix of
+selective and broad queries. Run from Backend/:
+
+    python -m benchmarks.bench_search [--games 500000]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from db.client import close_pool
+from db.query import games as game_functions
+
+QUERIES = [
+    "crystal knight odyssey",
+    "phantom blade 4242",
+    "drag",
+    "ninja roguelike",
+    "permadeath tactical",
+    "legend",
+]
+
+def main(games, limit, repeat):
+    print(f"Building {games} games...")
+    create_catalog_db(DB_FILE, games=games)
+    for query in QUERIES:
+        game_functions.search_games.uncached(query, limit)
+
+    print(f"\n{'query':>24} {'hits':>6} {'median':>9} {'p95':>9}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = game_functions.search_games.uncached(query, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{query:>24} {len(result['items']):>6} {statistics.median(timings):>7.2f}ms {p95:>7.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=500000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        main(args.games, args.limit, args.repeat)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
@@ -0,0 +1,111 @@
+"""
+Response encoding: FastAPI's default path vs orjson vs MessagePack.
+
+Encodes lists of --rows game rows (with franchise and system names, as
+GET /api/games returns them) the way each response class would:
+jsonable_encoder + JSONResponse, FastResponse as JSON (orjson), and
+FastResponse as MessagePack. Then times GET /api/games?limit=100
+through the app in-process with API_FAST_RESPONSES off and on. Run from
+Backend/:
+
+    python -m benchmarks.bench_serialization [--rows 100 1000 10000]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+import timeit
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+os.environ["API_FAST_RESPONSES"] = "1"
+os.environ.setdefault("JWT_SECRET", "bench-serialization")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api import responses
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+from db.query import games as game_functions
+from db.utils.jwt_utils import create_token
+
+HEADERS = {"Authorization": "Bearer " + create_token({"user_id": 1})}
+
+def encoders():
+    """(label, encode function) for each path a response can take"""
+    def default(content):
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def fast(wire_format):
+        def encode(content):
+            token = responses._wire_format.set(wire_format)
+            try:
+                return responses.FastResponse(content).body
+            finally:
+                responses._wire_format.reset(token)
+        return encode
+
+    paths = [("jsonable_encoder + json", default)]
+    if responses.orjson is not None:
+        paths.append(("orjson", fast("json")))
+    if responses.msgpack is not None:
+        paths.append(("msgpack", fast("msgpack")))
+    return paths
+
+def encode_times(all_games, sizes):
+    print(f"{'rows':>6} {'path':>24} {'encode':>10} {'payload':>10}")
+    for rows in sizes:
+        content = {"games": all_games[:rows], "next_cursor": None}
+        baseline = None
+        for label, encode in encoders():
+            runs = max(3, 20000 // rows)
+            elapsed = min(timeit.repeat(lambda: encode(content), number=runs, repeat=3)) / runs
+            baseline = baseline or elapsed
+            print(f"{rows:>6} {label:>24} {elapsed * 1000:>8.2f}ms {len(encode(content)) / 1000:>8.1f}kB"
+                  f"  ({baseline / elapsed:.1f}x)")
+
+async def requests_per_second(headers, count=500):
+    path = "/api/games?limit=100"
+    await request(app, "GET", path, headers=headers)
+    start = time.perf_counter()
+    for _ in range(count):
+        status, _, _ = await request(app, "GET", path, headers=headers)
+        assert status == 200, status
+    return count / (time.perf_counter() - start)
+
+async def end_to_end():
+    responses.FAST_RESPONSES = False
+    default = await requests_per_second(HEADERS)
+    responses.FAST_RESPONSES = True
+    fast = await requests_per_second(HEADERS)
+    packed = await requests_per_second(dict(HEADERS, Accept=responses.MSGPACK_MEDIA_TYPE))
+    print("\nGET /api/games?limit=100 (catalog cache warm)")
+    print(f"{'default':>10}: {default:>6.0f} req/s")
+    print(f"{'orjson':>10}: {fast:>6.0f} req/s  ({fast / default:.1f}x)")
+    print(f"{'msgpack':>10}: {packed:>6.0f} req/s  ({packed / default:.1f}x)")
+
+def main(sizes):
+    create_catalog_db(DB_FILE, games=max(sizes))
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (1, 'bench@example.com', 'x')")
+    conn.commit()
+    conn.close()
+
+    encode_times(game_functions.get_all_games.uncached(), sizes)
+    asyncio.run(end_to_end())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    try:
+        main(args.rows)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
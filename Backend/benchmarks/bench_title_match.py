@@ -0,0 +1,113 @@
+"""
+Title matching: agent2's substring scan vs agents.title_matcher.
+
+Builds a catalog of --games games and resolves batches of 15 names, as
+one recommendation request does, the way agent2 used to (every name
+against every game with bidirectional `in` checks) and with TitleMatcher.
+Names are variants of catalog titles (exact, recased with punctuation,
+with a subtitle, a word missing, a typo) plus titles the catalog doesn't
+have. Reports index build time and size, time per request and how many
+names each approach resolved to the right game. Run from Backend/:
+
+    python -m benchmarks.bench_title_match [--games 100000] [--requests 20]
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from benchmarks.fixtures import create_catalog_db, game_title, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from agents.title_matcher import TitleMatcher
+from db.client import close_pool
+from db.query import games as game_functions
+
+def variants(game_id, rng):
+    """(name, expected game id) pairs written the way a model might"""
+    title = game_title(game_id)
+    words = title.split()
+    typo = list(words[0])
+    i = rng.randrange(1, len(typo) - 1)
+    typo[i], typo[i + 1] = typo[i + 1], typo[i]
+    return [
+        (title, game_id),
+        (f"{words[0].upper()}: {' '.join(words[1:])}!", game_id),
+        (f"{title}: Definitive Edition", game_id),
+        (" ".join(words[1:]), game_id),
+        (" ".join(["".join(typo)] + words[1:]), game_id),
+        (f"Hollow {words[0]} Saga", None),
+    ]
+
+def make_requests(games, count, rng):
+    names = []
+    for game_id in rng.sample(range(1, games + 1), count * 3):
+        names += variants(game_id, rng)
+    rng.shuffle(names)
+    return [names[i:i + 15] for i in range(0, count * 15, 15)]
+
+def substring_scan(all_games, names):
+    """Step 3 of agent2 before the title index"""
+    found = []
+    for candidate in names:
+        for db_game in all_games:
+            if candidate.lower() in db_game['game_name'].lower() or db_game['game_name'].lower() in candidate.lower():
+                found.append(db_game['id'])
+                break
+        else:
+            found.append(None)
+    return found
+
+def title_index(matcher, names):
+    found = []
+    for candidate in names:
+        match = matcher.match(candidate)
+        found.append(match[0] if match else None)
+    return found
+
+def run(label, resolve, requests):
+    correct = total = 0
+    start = time.perf_counter()
+    for batch in requests:
+        found = resolve([name for name, _ in batch])
+        correct += sum(got == expected for got, (_, expected) in zip(found, batch))
+        total += len(batch)
+    elapsed = (time.perf_counter() - start) / len(requests)
+    print(f"{label:>16}: {elapsed * 1000:>9.2f}ms per request  {correct}/{total} names right")
+    return elapsed
+
+def main(games, count):
+    create_catalog_db(DB_FILE, games=games)
+    rng = random.Random(0)
+    requests = make_requests(games, count, rng)
+
+    all_games = game_functions.get_all_games.uncached()
+    titles = game_functions.get_game_titles()
+    start = time.perf_counter()
+    matcher = TitleMatcher(titles)
+    build = time.perf_counter() - start
+    tracemalloc.start()
+    measured = TitleMatcher(titles)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+    print(f"{games} games: index built in {build * 1000:.0f}ms, {size / 1e6:.1f}MB\n")
+
+    scan = run("substring scan", lambda names: substring_scan(all_games, names), requests[:max(1, count // 4)])
+    indexed = run("title index", lambda names: title_index(matcher, names), requests)
+    print(f"\n{scan / indexed:.0f}x faster per request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        main(args.games, args.requests)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
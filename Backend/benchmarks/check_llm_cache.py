@@ -0,0 +1,153 @@
+"""
+Correctness checks for the LLM completion cache.
+
+Sends requests through CachedChatClient to a local stand-in client
+(benchmarks/fixtures.py) and counts the calls that reach it. For both
+backends: prompts differing only in whitespace share an entry, while a
+different model, prompt, temperature or parameter does not, and
+transport options (timeout, extra headers) don't matter; entries
+expire after the TTL; and the hit, miss and model-time-saved counters
+match what was sent. The memory backend must evict the least recently
+used entry past its entry count, the SQLite backend the least recently
+used entries past LLM_CACHE_MAX_BYTES. Exits non-zero on any failure.
+Run from Backend/:
+
+    python -m benchmarks.check_llm_cache
+"""
+import os
+import sys
+import time
+
+from benchmarks.fixtures import StandInClient, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from agents.llm_cache import CachedChatClient, LLMCache, MemoryBackend, SQLiteBackend
+from db.client import close_pool, fetch_all
+from db.migrations import migrate
+
+MODEL = "llama-3.3-70b-versatile"
+LATENCY = 0.02
+TTL = 0.5
+
+failures = []
+
+def check(label, ok, detail=""):
+    print(f"{'ok' if ok else 'FAIL'}: {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        failures.append(label)
+
+def ask(client, prompt, model=MODEL, temperature=0.7, **params):
+    return client.chat.completions.create(
+        model=model, messages=[{"role": "user", "content": prompt}], temperature=temperature, **params
+    ).choices[0].message.content
+
+def setup(backend):
+    model = StandInClient(LATENCY)
+    cache = LLMCache(backend)
+    return model, cache, CachedChatClient(model, cache)
+
+def check_keys(label, backend):
+    model, _, client = setup(backend)
+    first = ask(client, "Recommend\n    an RPG\n\n")
+    again = ask(client, "  Recommend an   RPG")
+    check(f"{label}: whitespace-only changes hit", model.calls == 1 and again == first, f"{model.calls} model calls")
+
+    for name, kwargs in (
+        ("model", {"model": "other-model"}),
+        ("prompt", {"prompt": "Recommend a platformer"}),
+        ("temperature", {"temperature": 0.3}),
+        ("parameter", {"max_tokens": 100}),
+    ):
+        calls = model.calls
+        ask(client, **dict({"prompt": "Recommend an RPG"}, **kwargs))
+        check(f"{label}: a different {name} misses", model.calls == calls + 1)
+
+    calls = model.calls
+    ask(client, "Recommend an RPG", timeout=5)
+    ask(client, "Recommend an RPG", timeout=10, extra_headers={"X-Request": "1"})
+    check(f"{label}: a different timeout or extra header hits", model.calls == calls, f"{model.calls - calls} misses")
+
+def check_ttl(label, backend):
+    model, _, client = setup(backend)
+    ask(client, "Recommend an RPG")
+    ask(client, "Recommend an RPG")
+    time.sleep(TTL + 0.1)
+    ask(client, "Recommend an RPG")
+    check(f"{label}: entries expire after the TTL", model.calls == 2, f"{model.calls} model calls, expected 2")
+
+def check_counters(label, backend):
+    model, cache, client = setup(backend)
+    ask(client, "Recommend an RPG")
+    ask(client, "Recommend an RPG")
+    ask(client, "Recommend an RPG")
+    ask(client, "Recommend a platformer")
+    stats = cache.stats()
+    check(f"{label}: hits and misses counted",
+          (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 0.5),
+          f"hits {stats['hits']}, misses {stats['misses']}, hit rate {stats['hit_rate']}")
+    # Each hit saves the model time its entry took to produce (LATENCY plus overhead)
+    saved = stats["latency_saved_seconds"]
+    check(f"{label}: model time saved counted", 2 * LATENCY <= saved < 2 * LATENCY + 0.05, f"{saved}s")
+
+def check_memory_lru():
+    model, cache, client = setup(MemoryBackend(maxsize=3, ttl=60))
+    for prompt in ("a", "b", "c"):
+        ask(client, prompt)
+    ask(client, "a")  # a is now the most recently used
+    ask(client, "d")  # evicts b
+    calls = model.calls
+    ask(client, "a")
+    ask(client, "c")
+    ask(client, "d")
+    check("memory: most recently used entries kept", model.calls == calls, f"{model.calls - calls} misses")
+    ask(client, "b")
+    check("memory: least recently used entry evicted", model.calls == calls + 1)
+    check("memory: size stays within maxsize", cache.stats()["size"] == 3, f"size {cache.stats()['size']}")
+
+def check_sqlite_bytes():
+    backend = SQLiteBackend(max_bytes=250, ttl=60)
+    backend.clear()
+    for key in ("a", "b"):
+        backend.set(key, MODEL, "x" * 100, 1.0)
+        time.sleep(0.01)
+    backend.get("a")  # a is now the most recently used
+    time.sleep(0.01)
+    backend.set("c", MODEL, "x" * 100, 1.0)  # 300 bytes: evicts b
+
+    keys = {row["key"] for row in fetch_all("SELECT key FROM llm_cache")}
+    check("sqlite: least recently used entry evicted past max_bytes", keys == {"a", "c"}, f"left {sorted(keys)}")
+    stats = backend.stats()
+    check("sqlite: bytes stay within max_bytes", stats["bytes"] <= 250, f"{stats['bytes']} bytes")
+    check("sqlite: evictions counted", stats["evictions"] == 1, f"{stats['evictions']} evictions")
+
+    backend.set("big", MODEL, "x" * 300, 1.0)
+    check("sqlite: a response larger than max_bytes is not kept", backend.get("big") is None)
+
+def main():
+    migrate(DB_FILE)
+    for label, make in (
+        ("memory", lambda ttl=60: MemoryBackend(ttl=ttl)),
+        ("sqlite", lambda ttl=60: SQLiteBackend(ttl=ttl)),
+    ):
+        for check_backend in (check_keys, check_counters):
+            backend = make()
+            backend.clear()
+            check_backend(label, backend)
+        backend = make(TTL)
+        backend.clear()
+        check_ttl(label, backend)
+    check_memory_lru()
+    check_sqlite_bytes()
+
+    print("OK" if not failures else f"FAILED: {len(failures)} check(s)")
+    return not failures
+
+if __name__ == "__main__":
+    try:
+        ok = main()
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,116 @@
+"""
+EXPLAIN QUERY PLAN checks for the GET /api/games filters.
+
+Runs list_games for every combination of filters, sort and direction,
+first page and cursor page, traces the SQL it issues and checks each
+plan: with any filter set, games must be reached through an index SEARCH,
+never a SCAN. Unfiltered pages may only scan in sort order (no temp
+b-tree), so LIMIT stops them early. Plans are checked with and without
+ANALYZE statistics. Exits non-zero if any plan fails. Run from
+Backend/:
+
+    python -m benchmarks.check_query_plans [--games 50000]
+"""
+import argparse
+import itertools
+import os
+import sys
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from db.client import close_pool, connection
+from db.query import games as game_functions
+from db.utils.pagination import encode_cursor
+
+FILTER_VALUES = {
+    "franchise_id": 7,
+    "system_id": 3,
+    "genre": "RPG",
+    "publisher": "Capcom",
+    "year_min": 1995,
+    "year_max": 2000,
+}
+
+def traced_statements(fn, *args, **kwargs):
+    """Call fn and return (result, SELECT statements it ran, parameters expanded)"""
+    statements = []
+    with connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            conn.set_trace_callback(None)
+    return result, [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+def query_plan(sql):
+    with connection() as conn:
+        return [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+def plan_problem(plan, filtered, paged):
+    games = [detail for detail in plan if detail.startswith(("SCAN g", "SEARCH g"))]
+    if not games:
+        return "games table not found in plan"
+    if filtered:
+        if not games[0].startswith("SEARCH g USING INDEX"):
+            return "filtered query does not SEARCH a filter index"
+    elif paged:
+        if not games[0].startswith("SEARCH g "):
+            return "cursor query does not SEARCH an index"
+    elif any("TEMP B-TREE" in detail for detail in plan):
+        return "unfiltered scan has to sort every row"
+    return None
+
+def check(label, anchor):
+    """Check every combination; `anchor` is the row the cursor pages start after"""
+    checked = 0
+    failed = 0
+    names = list(FILTER_VALUES)
+    for size in range(len(names) + 1):
+        for combo in itertools.combinations(names, size):
+            filters = {name: FILTER_VALUES[name] for name in combo}
+            for key, descending in itertools.product(game_functions.GAME_SORTS, (False, True)):
+                sort = f"-{key}" if descending else key
+                field = game_functions.GAME_SORTS[key][1]
+                cursor = encode_cursor([sort, anchor[field], anchor["id"]])
+                for after in (None, cursor):
+                    _, statements = traced_statements(game_functions.list_games.uncached, 5, after, sort, filters)
+                    for sql in statements:
+                        plan = query_plan(sql)
+                        problem = plan_problem(plan, bool(filters), after is not None)
+                        checked += 1
+                        if problem:
+                            failed += 1
+                            print(f"[{label}] {problem}: filters={filters} sort={sort} after={after}")
+                            print("  " + " ".join(sql.split()))
+                            for detail in plan:
+                                print(f"    {detail}")
+    print(f"[{label}] {checked - failed}/{checked} plans OK")
+    return failed == 0
+
+def main(games):
+    print(f"Building {games} games...")
+    create_catalog_db(DB_FILE, games=games)
+    anchor = game_functions.get_game(games // 2)
+    ok = check("no stats", anchor)
+    if ok:
+        with connection() as conn:
+            conn.execute("ANALYZE")
+            conn.commit()
+        close_pool()
+        ok = check("analyzed", anchor)
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=50000)
+    args = parser.parse_args()
+
+    try:
+        ok = main(args.games)
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
+    sys.exit(0 if ok else 1)
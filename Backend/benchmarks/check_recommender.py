@@ -0,0 +1,55 @@
+"""
+Checks that placeholder franchises don't count as a series.
+
+Loads the seed catalog (db/seed), where franchise 1 is the "Standalone"
+placeholder shared by unrelated games. Standalone games must get no
+franchise feature in the recommender, and a standalone pick must not be
+explained as being in the "same series" as a standalone played game,
+while games of a real franchise still are. Exits non-zero on any
+failure. Run from Backend/:
+
+    python -m benchmarks.check_recommender
+"""
+import json
+import os
+import sys
+
+from agents.agent2 import describe_pick
+from agents.recommender import game_blocks, series_id
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "seed")
+
+failures = []
+
+def check(label, ok, detail=""):
+    print(f"{'ok' if ok else 'FAIL'}: {label}" + (f" ({detail})" if detail and not ok else ""))
+    if not ok:
+        failures.append(label)
+
+def seed_games():
+    """Seed games by name, with franchise_name filled in as get_game_features() does"""
+    with open(os.path.join(SEED_DIR, "franchises.json")) as f:
+        franchises = {franchise["id"]: franchise["franchise_name"] for franchise in json.load(f)}
+    with open(os.path.join(SEED_DIR, "games.json")) as f:
+        return {game["game_name"]: dict(game, franchise_name=franchises.get(game["franchise_id"])) for game in json.load(f)}
+
+def main():
+    games = seed_games()
+    hades, undertale = games["Hades"], games["Undertale"]
+
+    check("standalone games have no series", series_id(hades) is None and series_id(undertale) is None)
+    check("standalone games get no franchise feature",
+          "franchise" not in game_blocks(hades) and "franchise" not in game_blocks(undertale))
+    for name in ("Undertale", "Stardew Valley"):
+        reason = describe_pick(games[name], hades, "")
+        check(f"{name} after Hades is not the same series", "same series" not in reason, reason)
+
+    reason = describe_pick(games["Bloodborne"], games["Elden Ring"], "")
+    check("a real franchise is still the same series", "same series" in reason, reason)
+    check("a real franchise keeps its feature", "franchise" in game_blocks(games["Bloodborne"]))
+
+    print("OK" if not failures else f"FAILED: {len(failures)} check(s)")
+    return not failures
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,108 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions API.
+
+Answers POST /v1/chat/completions after --latency seconds and can inject
+failures: 503s, 429s with Retry-After, and stalls far longer than any
+client timeout. With "stream": true the answer is sent as server-sent
+event chunks spread over the latency. Prompts listing games ("title":
+"...") get picks from that list, like agent2's final step; anything else
+gets a JSON array of made-up titles. GET /stats reports requests served, distinct client
+connections (to check keep-alive) and injected faults. Point the model
+client at it with MODEL_BASE_URL=http://127.0.0.1:8001/v1. Run from
+Backend/:
+
+    python -m benchmarks.fake_openai [--port 8001] [--latency 0.2] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+def answer(prompt):
+    titles = re.findall(r'"title": "([^"]+)"', prompt)
+    if titles:
+        return json.dumps([
+            {"title": title, "why_recommended": f"Matches what you asked for, like {title} fans expect."}
+            for title in titles[:5]
+        ], indent=2)
+    return json.dumps([f"Game {(sum(map(ord, prompt)) + i) % 997}" for i in range(15)])
+
+async def stream_answer(content, model, latency):
+    """OpenAI-style chunks of a few characters; the first after a third of the latency"""
+    pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+    await asyncio.sleep(latency / 3)
+    for i, piece in enumerate(pieces):
+        chunk = {"object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if i < len(pieces) - 1:
+            await asyncio.sleep(latency * 2 / 3 / len(pieces))
+    yield "data: [DONE]\n\n"
+
+def create_app(latency=0.2, jitter=0.05, error_rate=0.0, rate_limit_rate=0.0, stall_rate=0.0, stall=30.0, seed=None):
+    app = FastAPI()
+    rng = random.Random(seed)
+    counters = {"requests": 0, "errors": 0, "rate_limited": 0, "stalled": 0}
+    connections = set()
+
+    # POST /v1/chat/completions - Fake completion, whole or streamed
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["requests"] += 1
+        connections.add(tuple(request.scope["client"]))
+
+        roll = rng.random()
+        if roll < error_rate:
+            counters["errors"] += 1
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+        if roll < error_rate + rate_limit_rate:
+            counters["rate_limited"] += 1
+            return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"Retry-After": "0.1"})
+        if roll < error_rate + rate_limit_rate + stall_rate:
+            counters["stalled"] += 1
+            await asyncio.sleep(stall)
+
+        delay = max(0.0, rng.gauss(latency, jitter))
+        prompt = body["messages"][-1]["content"]
+        content = answer(prompt)
+        if body.get("stream"):
+            return StreamingResponse(stream_answer(content, body["model"], delay), media_type="text/event-stream")
+
+        await asyncio.sleep(delay)
+        return {
+            "id": f"chatcmpl-{counters['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 60, "total_tokens": len(prompt) // 4 + 60},
+        }
+
+    # GET /stats - Requests served, client connections seen and faults injected
+    @app.get("/stats")
+    async def stats():
+        return dict(counters, connections=len(connections))
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.stall_rate),
+        host="127.0.0.1", port=args.port
+    )
@@ -0,0 +1,98 @@
+"""Throwaway databases and a stand-in model client for benchmarks"""
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+
+from db.migrations import migrate
+
+GENRES = ["RPG", "Platformer", "Strategy", "Action", "Adventure", "Racing", "Puzzle", "Shooter"]
+PUBLISHERS = ["Nintendo", "Square Enix", "Capcom", "Sega", "Konami", "Atlus", "FromSoftware", "Sony"]
+TITLE_WORDS = [
+    "Legend", "Crystal", "Shadow", "Dragon", "Star", "Kingdom", "Knight", "Quest",
+    "Fantasy", "Chronicle", "Storm", "Blade", "Souls", "Kart", "Galaxy", "Tactics",
+    "Emblem", "Hearts", "Odyssey", "Frontier", "Racer", "Ninja", "Metal", "Spirit",
+    "Ocean", "Forest", "Echo", "Paper", "Iron", "Phantom", "Rising", "Origins",
+]
+DESCRIPTION_WORDS = [
+    "open", "world", "turn", "based", "combat", "boss", "fights", "puzzle", "story",
+    "driven", "multiplayer", "co-op", "platforming", "exploration", "tactical",
+    "dungeon", "crawler", "remake", "classic", "challenging", "relaxing", "stealth",
+    "racing", "sandbox", "pixel", "art", "soundtrack", "permadeath", "roguelike",
+    "characters", "magic", "sci-fi", "horror", "arcade", "strategy", "rhythm",
+]
+
+def game_title(i):
+    """Deterministic, varied title such as 'Crystal Knight Odyssey 1234'"""
+    rng = random.Random(i)
+    return f"{' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 3)))} {i}"
+
+def game_description(i):
+    rng = random.Random(-i)
+    return " ".join(rng.choices(DESCRIPTION_WORDS, k=12)).capitalize()
+
+def temp_db_path():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.remove(path)
+    return path
+
+def remove_db(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def create_catalog_db(path, games=1000, systems=20, franchises=200):
+    """Create the schema and fill it with synthetic systems, franchises and games"""
+    migrate(path)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO systems (id, system_name) VALUES (?, ?)",
+        [(i, f"System {i}") for i in range(1, systems + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO franchises (id, system_id, franchise_name) VALUES (?, ?, ?)",
+        [(i, i % systems + 1, f"Franchise {i}") for i in range(1, franchises + 1)]
+    )
+    conn.executemany(
+        """
+        INSERT INTO games
+        (id, franchise_id, system_id, publisher, game_name, genre, release_year, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                i,
+                i % franchises + 1,
+                i % systems + 1,
+                PUBLISHERS[i % len(PUBLISHERS)],
+                game_title(i),
+                GENRES[i % len(GENRES)],
+                1985 + i % 40,
+                game_description(i),
+            )
+            for i in range(1, games + 1)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+class StandInClient:
+    """Answers chat completions locally after a fixed delay, counting calls"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature=1.0, **params):
+        # Imported here: db.client reads DB_PATH on import, before callers have set it
+        from agents.llm_cache import completion
+
+        self.calls += 1
+        time.sleep(self.latency)
+        seed = sum(map(ord, messages[-1]["content"]))
+        return completion(json.dumps([f"Game {seed % 97 + i}" for i in range(15)]))
@@ -0,0 +1,116 @@
+"""
+Concurrency check for the played-games write routes.
+
+Hammers one (user, game) pair through the app in-process: first a burst
+of concurrent POSTs, then a random storm of POST/PATCH/DELETE. Every
+response must be an expected status (never a 500 from a UNIQUE
+violation), exactly one POST in the burst may win, and the number of
+successful marks minus successful unmarks must match the row left in
+the table. Exits non-zero on any violation. Run from Backend/:
+
+    python -m benchmarks.stress_played_games [--burst 200] [--storm 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+from collections import Counter
+
+from benchmarks.fixtures import create_catalog_db, remove_db, temp_db_path
+
+DB_FILE = temp_db_path()
+os.environ["DB_PATH"] = DB_FILE
+
+from app import app
+from benchmarks.asgi import request
+from db.client import close_pool
+
+USER_ID = 1
+GAME_ID = 7
+
+EXPECTED = {
+    "POST": {200, 400},
+    "PATCH": {200, 404},
+    "DELETE": {200, 404},
+}
+
+async def send(method, rng):
+    if method == "POST":
+        path, body = f"/api/played/{USER_ID}", {"game_id": GAME_ID, "rating": rng.randint(1, 5)}
+    elif method == "PATCH":
+        path, body = f"/api/played/{USER_ID}/{GAME_ID}", {"rating": rng.randint(1, 5), "notes": "stress"}
+    else:
+        path, body = f"/api/played/{USER_ID}/{GAME_ID}", None
+    try:
+        status, _, _ = await request(app, method, path, body=body)
+    except Exception as e:
+        print(f"{method} raised {type(e).__name__}: {e}")
+        status = 500
+    return method, status
+
+def row_count():
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM played_games WHERE user_id = ? AND game_id = ?", [USER_ID, GAME_ID]
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+def report(label, results):
+    counts = Counter(results)
+    print(f"{label}: " + ", ".join(f"{method} {status} x{n}" for (method, status), n in sorted(counts.items())))
+    unexpected = [(method, status) for method, status in counts if status not in EXPECTED[method]]
+    return counts, unexpected
+
+async def main(burst, storm):
+    rng = random.Random(1)
+    create_catalog_db(DB_FILE, games=50)
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("INSERT INTO users (id, email, password_hash) VALUES (?, 'stress@example.com', 'x')", [USER_ID])
+    conn.commit()
+    conn.close()
+    ok = True
+
+    results = await asyncio.gather(*(send("POST", rng) for _ in range(burst)))
+    counts, unexpected = report("burst", results)
+    if unexpected or counts[("POST", 200)] != 1:
+        print("FAIL: expected exactly one successful POST and no other statuses than 400")
+        ok = False
+
+    methods = [rng.choice(["POST", "PATCH", "DELETE"]) for _ in range(storm)]
+    results = await asyncio.gather(*(send(method, rng) for method in methods))
+    counts, unexpected = report("storm", results)
+    if unexpected:
+        print(f"FAIL: unexpected statuses {unexpected}")
+        ok = False
+
+    marked = 1 + counts[("POST", 200)] - counts[("DELETE", 200)]
+    rows = row_count()
+    print(f"marks - unmarks = {marked}, rows left = {rows}")
+    if marked != rows or rows not in (0, 1):
+        print("FAIL: successful marks and unmarks don't add up to the table contents")
+        ok = False
+
+    missing = await request(app, "POST", f"/api/played/{USER_ID}", body={"game_id": 999999})
+    if missing[0] != 404:
+        print(f"FAIL: unknown game returned {missing[0]}")
+        ok = False
+
+    print("OK" if ok else "FAILED")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--storm", type=int, default=2000)
+    args = parser.parse_args()
+
+    try:
+        ok = asyncio.run(main(args.burst, args.storm))
+    finally:
+        close_pool()
+        remove_db(DB_FILE)
+    sys.exit(0 if ok else 1)
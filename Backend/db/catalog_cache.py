@@ -0,0 +1,221 @@
+"""
+Read-through cache for catalog reads (games, systems, franchises).
+
+Catalog rows are read on almost every request and written rarely. Query
+functions decorated with @cached(table) keep their results in a bounded
+TTL/LRU cache keyed by function and arguments.
+
+Writes made by this process call invalidate() right after they commit,
+so the next read sees them. Writes from other processes sharing the
+database (more uvicorn workers, seed scripts) are detected with PRAGMA
+data_version, which changes whenever another connection commits; the
+per-table counters in catalog_versions (migration 5) then tell which
+tables actually changed, so played games and user writes leave the cache
+alone.
+"""
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from db import client
+from db.utils.lru_cache import TTLCache, MISSING
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "2048"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_CHECK_INTERVAL = float(os.getenv("CATALOG_CACHE_CHECK_INTERVAL", "0"))
+
+# Tables whose cached results include rows of the key table (through joins)
+DEPENDENTS = {
+    "systems": ("systems", "franchises", "games"),
+    "franchises": ("franchises", "games"),
+    "games": ("games",),
+}
+
+# Key kind for single-row lookups, which invalidate(table, row_id) drops one at a time
+ROW = "row"
+
+class CatalogCache:
+    """TTL/LRU cache of catalog query results with write invalidation.
+
+    Cached values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL,
+                 check_interval=CATALOG_CACHE_CHECK_INTERVAL, connect=client.get_connection):
+        self.check_interval = check_interval
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._data_version = None
+        self._versions = {}
+        self._checked_at = 0.0
+        self._generations = {table: 0 for table in DEPENDENTS}
+        self.invalidations = 0
+        self.data_version_invalidations = 0
+
+    def get_or_load(self, table, key, loader):
+        """Return the cached value for (table, *key), calling loader() on a miss"""
+        self.check()
+        cache_key = (table,) + key
+        value = self._cache.get(cache_key)
+        if value is not MISSING:
+            return value
+
+        generation = self._generations[table]
+        value = loader()
+        with self._lock:
+            # Skip the store if a write landed while we were loading; the
+            # value may predate it
+            if self._generations[table] == generation:
+                self._cache.set(cache_key, value)
+        return value
+
+    def invalidate(self, table, row_id=None):
+        """Drop results affected by a single-row write to `table`.
+
+        With row_id, only that row's single-row entry (plus every list and
+        count) is dropped from `table`; tables that join it are dropped
+        entirely. If the table's counter moved by exactly one since the
+        last check, that was this write and check() has nothing left to
+        drop; otherwise another process wrote too and check() drops the
+        table.
+        """
+        with self._lock:
+            self._drop(table, row_id)
+            self.invalidations += 1
+            try:
+                row = self._watcher_connection().execute(
+                    "SELECT version FROM catalog_versions WHERE table_name = ?", [table]
+                ).fetchone()
+            except sqlite3.Error:
+                return
+            seen = self._versions.get(table)
+            if row and seen is not None and row[0] == seen + 1:
+                self._versions[table] = row[0]
+
+    def check(self):
+        """Drop tables changed by other processes since the last check"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                watcher = self._watcher_connection()
+                data_version = watcher.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version:
+                    return
+                self._data_version = data_version
+                versions = dict(watcher.execute("SELECT table_name, version FROM catalog_versions").fetchall())
+            except sqlite3.Error:
+                # No catalog_versions yet (unmigrated database); assume everything changed
+                versions = {}
+
+            changed = [table for table in DEPENDENTS if table not in versions or versions[table] != self._versions.get(table)]
+            self._versions = versions
+            if changed and len(self._cache):
+                self.data_version_invalidations += 1
+            for table in changed:
+                self._drop(table)
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["check_interval"] = self.check_interval
+        stats["invalidations"] = self.invalidations
+        stats["data_version_invalidations"] = self.data_version_invalidations
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+    def _watcher_connection(self):
+        # A connection of our own: data_version only moves for commits made
+        # through other connections, which includes this process's pool
+        if self._watcher is None:
+            self._watcher = self._connect()
+        return self._watcher
+
+    def _drop(self, table, row_id=None):
+        affected = DEPENDENTS[table]
+        for name in affected:
+            self._generations[name] += 1
+
+        def matches(key):
+            key_table, kind, args = key
+            if key_table not in affected:
+                return False
+            if key_table == table and row_id is not None and kind == ROW:
+                return args == (row_id,)
+            return True
+
+        self._cache.pop_where(matches)
+
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+def get_catalog_cache():
+    global _catalog_cache
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = CatalogCache()
+    return _catalog_cache
+
+def invalidate(table, row_id=None):
+    """Invalidate cached catalog results after a write to `table` has committed"""
+    get_catalog_cache().invalidate(table, row_id)
+
+def catalog_versions():
+    """{table: {"version", "updated_at"}} for every catalog table, read fresh from the database"""
+    rows = client.fetch_all("SELECT table_name, version, updated_at FROM catalog_versions")
+    return {row['table_name']: row for row in rows}
+
+def catalog_cache_stats():
+    """Cache counters, or None until the first cached read"""
+    with _catalog_cache_lock:
+        return _catalog_cache.stats() if _catalog_cache is not None else None
+
+def close_catalog_cache():
+    global _catalog_cache
+    with _catalog_cache_lock:
+        if _catalog_cache is not None:
+            _catalog_cache.close()
+            _catalog_cache = None
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def cached(table, row=False):
+    """Cache a query function's results under `table`.
+
+    row=True marks a single-row lookup taking the row id as its only
+    argument. The undecorated function stays available as `.uncached`.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if row:
+                key = (ROW, args)
+            else:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (fn.__name__, _freeze(bound.arguments))
+            return get_catalog_cache().get_or_load(table, key, lambda: fn(*args, **kwargs))
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
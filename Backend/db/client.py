@@ -1,34 +1,388 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 
-def get_connection():
-    conn = sqlite3.connect('db/games.db')
+DB_PATH = os.getenv("DB_PATH", "db/games.db")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_HEALTHCHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", "30"))
+# Send writes through the group-commit writer thread (db/writer.py)
+GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "0") == "1"
+# Rows fetched per round trip by RowStream
+EXPORT_BATCH_SIZE = int(os.getenv("DB_EXPORT_BATCH_SIZE", "500"))
+
+# PRAGMAs applied to every new connection. "tuned" lets readers proceed while
+# a write is in progress (WAL) and only fsyncs at checkpoints; "default"
+# mirrors SQLite's out-of-the-box settings.
+PRAGMA_PROFILES = {
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "default": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+def load_pragma_profile(name=None):
+    """Build the PRAGMA set from DB_PRAGMA_PROFILE plus DB_<PRAGMA> overrides"""
+    name = name or os.getenv("DB_PRAGMA_PROFILE", "tuned")
+    if name not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown DB_PRAGMA_PROFILE: {name}")
+
+    pragmas = dict(PRAGMA_PROFILES[name])
+    for pragma in pragmas:
+        override = os.getenv(f"DB_{pragma.upper()}")
+        if override is None:
+            continue
+        if pragma in _PRAGMA_CHOICES:
+            override = override.upper()
+            if override not in _PRAGMA_CHOICES[pragma]:
+                raise ValueError(f"Invalid value for DB_{pragma.upper()}: {override}")
+            pragmas[pragma] = override
+        else:
+            pragmas[pragma] = int(override)
+    return pragmas
+
+PRAGMAS = load_pragma_profile()
+
+def get_connection(path=None, pragmas=None):
+    """Open a new connection and apply the PRAGMA profile"""
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma, value in (PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
     return conn
 
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    At most `size` connections exist at once. A thread that already holds a
+    connection gets the same one back from `connection()`, so nested query
+    helpers never need a second slot. Idle connections are pinged before
+    reuse once they have been idle longer than `healthcheck_interval`.
+    """
+
+    def __init__(self, connect=get_connection, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 healthcheck_interval=POOL_HEALTHCHECK_INTERVAL):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._checked_out = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._discarded = 0
+        self._closed = False
+
+    def acquire(self):
+        """Check out a connection, blocking while the pool is exhausted"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        waited = 0.0
+        if not self._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+            if not acquired:
+                raise TimeoutError("Timed out waiting for a database connection")
+
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self._open += 1
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if it is unusable"""
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._lock:
+            self._checked_out -= 1
+            if discard or self._closed:
+                self._open -= 1
+                self._discarded += discard
+        if discard or self._closed:
+            conn.close()
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, checking one out if needed"""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        broken = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            broken = not isinstance(e, (sqlite3.IntegrityError, sqlite3.ProgrammingError))
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self.release(conn, discard=broken and not _is_alive(conn))
+
+    def holds_connection(self):
+        """True if the calling thread is inside connection()"""
+        return getattr(self._local, "conn", None) is not None
+
+    def depth(self):
+        """How many connection() blocks the calling thread is nested in"""
+        return getattr(self._local, "depth", 0)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": self._idle.qsize(),
+                "checked_out": self._checked_out,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time": round(self._wait_time, 6),
+                "max_wait_time": round(self._max_wait_time, 6),
+                "discarded": self._discarded,
+            }
+
+    def close(self):
+        """Close every idle connection; checked-out ones close on release"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+    def _take_idle(self):
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - idle_since < self.healthcheck_interval or _is_alive(conn):
+                return conn
+            conn.close()
+            with self._lock:
+                self._open -= 1
+                self._discarded += 1
+
+def _is_alive(conn):
+    try:
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def close_pool():
+    """Close the process-wide pool so the next query opens a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def pool_stats():
+    """Pool counters, or None until the first query opens the pool"""
+    with _pool_lock:
+        return _pool.stats() if _pool is not None else None
+
+def connection():
+    """Context manager yielding a pooled connection"""
+    return get_pool().connection()
+
+@contextmanager
+def transaction(immediate=False):
+    """Pooled connection whose statements commit together, or roll back on error.
+
+    immediate=True takes the write lock up front, so reads made before the
+    first write can't be invalidated by another writer. A transaction()
+    opened while the thread's connection is already in a transaction runs
+    in a SAVEPOINT instead: an error rolls back only its own statements,
+    and nothing commits until the outermost transaction does (a nested
+    immediate=True only gets the write lock the outer one already holds).
+    """
+    with connection() as conn:
+        if conn.in_transaction:
+            savepoint = f"nested_{get_pool().depth()}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield conn
+            except BaseException:
+                # Some errors already rolled back the whole transaction
+                if conn.in_transaction:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                raise
+            conn.execute(f"RELEASE {savepoint}")
+            return
+
+        # An explicit BEGIN, so a nested transaction() sees this one even
+        # before its first write
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def run_write(fn, immediate=False):
+    """Run fn(conn) in a write transaction and return its result once committed.
+
+    With DB_GROUP_COMMIT=1 the write is handed to the group-commit writer,
+    which batches it with other pending writes into one commit. A thread
+    already holding a pooled connection keeps writing on it, so a write
+    nested in transaction() commits or rolls back with that transaction.
+    """
+    if GROUP_COMMIT and not get_pool().holds_connection():
+        from db.writer import get_writer
+        return get_writer().submit(fn)
+    with transaction(immediate) as conn:
+        return fn(conn)
+
 def fetch_all(sql, params=None):
     """Execute query and return all results"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, params or [])
-    results = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        results = conn.execute(sql, params or []).fetchall()
     return [dict(row) for row in results]
 
 def fetch_one(sql, params=None):
     """Execute query and return one result"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, params or [])
-    result = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        result = conn.execute(sql, params or []).fetchone()
     return dict(result) if result else None
 
+class RowStream:
+    """A query's results fetched in batches instead of all at once.
+
+    open() runs the query and returns the column names; each fetch()
+    returns up to `batch_size` row tuples, and [] once the rows run out.
+    The pooled connection is held from open() until the rows run out or
+    close() is called. It isn't tied to a thread, so each call may come
+    from a different worker, and close() waits for a fetch in progress.
+    """
+
+    def __init__(self, sql, params=None, batch_size=EXPORT_BATCH_SIZE):
+        self.sql = sql
+        self.params = params or []
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cursor = None
+        self._closed = False
+
+    def open(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Row stream is closed")
+            self._conn = get_pool().acquire()
+            try:
+                self._cursor = self._conn.execute(self.sql, self.params)
+            except BaseException:
+                self._release()
+                raise
+            return [column[0] for column in self._cursor.description]
+
+    def fetch(self):
+        with self._lock:
+            if self._cursor is None:
+                return []
+            try:
+                rows = self._cursor.fetchmany(self.batch_size)
+            except BaseException:
+                self._release()
+                raise
+            if not rows:
+                self._release()
+            return [tuple(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._release()
+
+    def _release(self):
+        self._closed = True
+        if self._conn is not None:
+            self._cursor = None
+            get_pool().release(self._conn)
+            self._conn = None
+
 def execute_query(sql, params=None):
     """Execute INSERT/UPDATE/DELETE and return lastrowid"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, params or [])
-    conn.commit()
-    last_id = cursor.lastrowid
-    conn.close()
-    return last_id
\ No newline at end of file
+    return run_write(lambda conn: conn.execute(sql, params or []).lastrowid)
+
+def execute_returning(sql, params=None):
+    """Execute INSERT/UPDATE/DELETE ... RETURNING and return the first row, or None if no row matched"""
+    rows = run_write(lambda conn: conn.execute(sql, params or []).fetchall())
+    return dict(rows[0]) if rows else None
@@ -1,12 +1,13 @@
-import sqlite3
+import os
+import sys
 
-with open('schema.sql', 'r') as f:
-    schema = f.read()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.migrations import migrate
 
-conn = sqlite3.connect('game_storage.db')
-cursor = conn.cursor()
-cursor.executescript(schema)
-conn.commit()
-conn.close()
+DB_FILE = 'games.db'
 
-print("Database created successfully!")
\ No newline at end of file
+# Build the schema through the migrations; an existing database keeps its
+# data and only gets the migrations it hasn't applied yet
+migrate(DB_FILE)
+
+print("Database created successfully!")
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from db.client import POOL_SIZE
+
+# One worker per pooled connection. Running exports (api/export.py) each
+# hold a connection outside the workers, so while they run up to
+# EXPORT_CONCURRENCY workers can wait on the pool for one
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the thread pool that runs blocking database calls"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking db.query function off the event loop and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
@@ -0,0 +1,311 @@
+"""
+Versioned schema migrations.
+
+schema.sql is the baseline (migration 1); every later change to tables or
+indexes is appended to MIGRATIONS and never edited once released. The
+applied version is stored in PRAGMA user_version, so migrate() is cheap and
+safe to run on every startup. Run by hand from Backend/:
+
+    python -m db.migrations [path/to/games.db]
+"""
+import os
+import sqlite3
+import sys
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
+
+def _split_statements(sql):
+    """Split a script into statements, keeping trigger bodies intact"""
+    statements = []
+    current = ""
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ""
+    if current.strip():
+        raise ValueError(f"Incomplete SQL statement in migration: {current.strip()[:80]}")
+    return statements
+
+def _columns(conn, table):
+    return {row[1]: row for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _rebuild_table(conn, table):
+    """Recreate `table` from schema.sql, keeping rows, indexes and triggers.
+
+    Follows SQLite's documented order (new table, copy, drop, rename the new
+    one) rather than renaming the old table away: since 3.26 that rename
+    also rewrites other tables' foreign keys to the old name. Foreign keys
+    are off on the migration connection, so dropping the table is safe.
+    """
+    with open(SCHEMA_PATH, "r") as f:
+        create = next(
+            statement for statement in _split_statements(f.read())
+            if f"TABLE IF NOT EXISTS {table}(" in statement
+        )
+    extras = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        [table]
+    )]
+    conn.execute(create.replace(f"TABLE IF NOT EXISTS {table}(", f"TABLE {table}_new(", 1))
+    shared = ", ".join(column for column in _columns(conn, f"{table}_new") if column in _columns(conn, table))
+    conn.execute(f"INSERT INTO {table}_new ({shared}) SELECT {shared} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    for statement in extras:
+        conn.execute(statement)
+
+def _baseline(conn):
+    """Create the baseline schema and bring older databases up to it.
+
+    Databases created by earlier versions of seed.py or schema.sql are
+    missing some columns (or call password_hash "password"); add them in
+    place so existing data survives.
+    """
+    with open(SCHEMA_PATH, "r") as f:
+        for statement in _split_statements(f.read()):
+            conn.execute(statement)
+
+    users = _columns(conn, "users")
+    if "password_hash" not in users and "password" in users:
+        conn.execute("ALTER TABLE users RENAME COLUMN password TO password_hash")
+    if "username" not in users:
+        conn.execute("ALTER TABLE users ADD COLUMN username TEXT")
+        # ADD COLUMN can't carry schema.sql's UNIQUE
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+    if "is_verified" not in users:
+        conn.execute("ALTER TABLE users ADD COLUMN is_verified BOOLEAN DEFAULT 0")
+    if "created_at" not in users:
+        conn.execute("ALTER TABLE users ADD COLUMN created_at TIMESTAMP")
+    if "username" in users and users["username"][3]:
+        # seed.py used to declare username NOT NULL, which create_user can't satisfy
+        _rebuild_table(conn, "users")
+
+    if "system_id" not in _columns(conn, "franchises"):
+        conn.execute("ALTER TABLE franchises ADD COLUMN system_id INTEGER REFERENCES systems(id)")
+
+# (version, name, SQL script or callable taking the connection)
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "secondary indexes", """
+        CREATE INDEX IF NOT EXISTS idx_games_franchise ON games(franchise_id);
+        CREATE INDEX IF NOT EXISTS idx_games_system ON games(system_id);
+        CREATE INDEX IF NOT EXISTS idx_games_genre ON games(genre);
+        CREATE INDEX IF NOT EXISTS idx_games_publisher ON games(publisher);
+        CREATE INDEX IF NOT EXISTS idx_games_name ON games(game_name);
+        CREATE INDEX IF NOT EXISTS idx_games_year ON games(release_year);
+        CREATE INDEX IF NOT EXISTS idx_franchises_system ON franchises(system_id);
+        CREATE INDEX IF NOT EXISTS idx_franchises_name ON franchises(franchise_name);
+        CREATE INDEX IF NOT EXISTS idx_systems_name ON systems(system_name);
+        CREATE INDEX IF NOT EXISTS idx_played_user_played_at ON played_games(user_id, played_at);
+        CREATE INDEX IF NOT EXISTS idx_played_user_rating ON played_games(user_id, rating);
+        CREATE INDEX IF NOT EXISTS idx_played_game ON played_games(game_id);
+    """),
+    (3, "games full-text search", """
+        CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5(
+            game_name, description, publisher, genre,
+            content='games', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS games_fts_insert AFTER INSERT ON games BEGIN
+            INSERT INTO games_fts (rowid, game_name, description, publisher, genre)
+            VALUES (new.id, new.game_name, new.description, new.publisher, new.genre);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS games_fts_delete AFTER DELETE ON games BEGIN
+            INSERT INTO games_fts (games_fts, rowid, game_name, description, publisher, genre)
+            VALUES ('delete', old.id, old.game_name, old.description, old.publisher, old.genre);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS games_fts_update
+        AFTER UPDATE OF game_name, description, publisher, genre ON games BEGIN
+            INSERT INTO games_fts (games_fts, rowid, game_name, description, publisher, genre)
+            VALUES ('delete', old.id, old.game_name, old.description, old.publisher, old.genre);
+            INSERT INTO games_fts (rowid, game_name, description, publisher, genre)
+            VALUES (new.id, new.game_name, new.description, new.publisher, new.genre);
+        END;
+
+        INSERT INTO games_fts (games_fts) VALUES ('rebuild');
+    """),
+    (4, "composite game filter indexes", """
+        DROP INDEX IF EXISTS idx_games_franchise;
+        DROP INDEX IF EXISTS idx_games_system;
+        DROP INDEX IF EXISTS idx_games_genre;
+        CREATE INDEX IF NOT EXISTS idx_games_franchise_year ON games(franchise_id, release_year);
+        CREATE INDEX IF NOT EXISTS idx_games_system_year ON games(system_id, release_year);
+        CREATE INDEX IF NOT EXISTS idx_games_genre_year ON games(genre, release_year);
+        CREATE INDEX IF NOT EXISTS idx_games_publisher_year ON games(publisher, release_year);
+        CREATE INDEX IF NOT EXISTS idx_games_upload_date ON games(upload_date);
+    """),
+    (5, "catalog change counters", """
+        CREATE TABLE IF NOT EXISTS catalog_versions(
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO catalog_versions (table_name) VALUES ('games'), ('systems'), ('franchises');
+
+        CREATE TRIGGER IF NOT EXISTS games_version_insert AFTER INSERT ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'games';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS games_version_update AFTER UPDATE ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'games';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS games_version_delete AFTER DELETE ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'games';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS systems_version_insert AFTER INSERT ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'systems';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS systems_version_update AFTER UPDATE ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'systems';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS systems_version_delete AFTER DELETE ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'systems';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS franchises_version_insert AFTER INSERT ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'franchises';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS franchises_version_update AFTER UPDATE ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'franchises';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS franchises_version_delete AFTER DELETE ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1 WHERE table_name = 'franchises';
+        END;
+    """),
+    (6, "catalog change timestamps", """
+        ALTER TABLE catalog_versions ADD COLUMN updated_at TEXT;
+        UPDATE catalog_versions SET updated_at = CURRENT_TIMESTAMP;
+
+        DROP TRIGGER IF EXISTS games_version_insert;
+        CREATE TRIGGER games_version_insert AFTER INSERT ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'games';
+        END;
+
+        DROP TRIGGER IF EXISTS games_version_update;
+        CREATE TRIGGER games_version_update AFTER UPDATE ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'games';
+        END;
+
+        DROP TRIGGER IF EXISTS games_version_delete;
+        CREATE TRIGGER games_version_delete AFTER DELETE ON games BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'games';
+        END;
+
+        DROP TRIGGER IF EXISTS systems_version_insert;
+        CREATE TRIGGER systems_version_insert AFTER INSERT ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'systems';
+        END;
+
+        DROP TRIGGER IF EXISTS systems_version_update;
+        CREATE TRIGGER systems_version_update AFTER UPDATE ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'systems';
+        END;
+
+        DROP TRIGGER IF EXISTS systems_version_delete;
+        CREATE TRIGGER systems_version_delete AFTER DELETE ON systems BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'systems';
+        END;
+
+        DROP TRIGGER IF EXISTS franchises_version_insert;
+        CREATE TRIGGER franchises_version_insert AFTER INSERT ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'franchises';
+        END;
+
+        DROP TRIGGER IF EXISTS franchises_version_update;
+        CREATE TRIGGER franchises_version_update AFTER UPDATE ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'franchises';
+        END;
+
+        DROP TRIGGER IF EXISTS franchises_version_delete;
+        CREATE TRIGGER franchises_version_delete AFTER DELETE ON franchises BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name = 'franchises';
+        END;
+    """),
+    (7, "llm response cache", """
+        CREATE TABLE IF NOT EXISTS llm_cache(
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            latency REAL NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at);
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at);
+    """),
+]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(path, migrations=MIGRATIONS):
+    """Apply every pending migration to the database at `path`.
+
+    Returns the list of versions applied. The whole run happens inside one
+    BEGIN IMMEDIATE transaction, so concurrent workers starting together
+    serialize on the write lock and all but the first find nothing to do.
+    """
+    conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+    applied = []
+    try:
+        if schema_version(conn) >= migrations[-1][0]:
+            return applied
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations(
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            current = schema_version(conn)
+            for version, name, step in migrations:
+                if version <= current:
+                    continue
+                if callable(step):
+                    step(conn)
+                else:
+                    for statement in _split_statements(step):
+                        conn.execute(statement)
+                conn.execute(
+                    "INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (?, ?)",
+                    [version, name]
+                )
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                applied.append(version)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if applied:
+            # Let SQLite decide which new indexes need statistics. A blanket
+            # ANALYZE on a fresh database records every table (including the
+            # FTS shadow tables) as empty and leads to poor plans as it fills.
+            conn.execute("PRAGMA analysis_limit = 1000")
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    return applied
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else os.getenv("DB_PATH", "db/games.db")
+    done = migrate(target)
+    if done:
+        print(f"Applied migrations {done} to {target}")
+    else:
+        print(f"{target} is up to date (version {MIGRATIONS[-1][0]})")
@@ -1,14 +1,30 @@
-from db.client import fetch_all, fetch_one, execute_query
+from db.catalog_cache import cached, invalidate
+from db.client import fetch_all, fetch_one, execute_returning
+from db.utils.pagination import fetch_page, count_rows, DEFAULT_PAGE_SIZE
+
+FRANCHISE_SORTS = {
+    "id": ("f.id", "id"),
+    "name": ("f.franchise_name", "franchise_name"),
+}
+
+# Written row in the same shape as get_franchise, so writes need no follow-up read
+FRANCHISE_RETURNING = """
+    RETURNING
+        *,
+        (SELECT system_name FROM systems WHERE systems.id = franchises.system_id) AS system_name
+"""
 
 def create_franchise(system_id, franchise_name, franchise_img):
     SQL = """
         INSERT INTO franchises
         (system_id, franchise_name, franchise_img)
         VALUES (?, ?, ?)
-    """
-    franchise_id = execute_query(SQL, [system_id, franchise_name, franchise_img])
-    return get_franchise(franchise_id)
+    """ + FRANCHISE_RETURNING
+    franchise = execute_returning(SQL, [system_id, franchise_name, franchise_img])
+    invalidate("franchises", franchise["id"])
+    return franchise
 
+@cached("franchises")
 def get_all_franchises():
     SQL = """
         SELECT
@@ -19,6 +35,22 @@ def get_all_franchises():
     """
     return fetch_all(SQL)
 
+@cached("franchises")
+def list_franchises(limit=DEFAULT_PAGE_SIZE, after=None, sort="id"):
+    SQL = """
+        SELECT
+            f.*,
+            s.system_name
+        FROM franchises f
+        LEFT JOIN systems s ON f.system_id = s.id
+    """
+    return fetch_page(SQL, FRANCHISE_SORTS, sort, after, limit)
+
+@cached("franchises")
+def count_franchises(mode="exact"):
+    return count_rows("franchises", mode)
+
+@cached("franchises", row=True)
 def get_franchise(id):
     SQL = """
         SELECT
@@ -31,6 +63,7 @@ def get_franchise(id):
     return fetch_one(SQL, [id])
 
 def update_franchise(id, system_id, franchise_name, franchise_img):
+    """Update a franchise and return the new row, or None if it doesn't exist"""
     SQL = """
         UPDATE franchises
         SET
@@ -38,14 +71,20 @@ def update_franchise(id, system_id, franchise_name, franchise_img):
             franchise_name = ?,
             franchise_img = ?
         WHERE id = ?
-    """
-    execute_query(SQL, [system_id, franchise_name, franchise_img, id])
-    return get_franchise(id)
+    """ + FRANCHISE_RETURNING
+    franchise = execute_returning(SQL, [system_id, franchise_name, franchise_img, id])
+    if franchise:
+        invalidate("franchises", id)
+    return franchise
 
 def delete_franchise(franchise_id):
+    """Delete a franchise; returns None if it doesn't exist"""
     SQL = """
         DELETE FROM franchises
         WHERE id = ?
+        RETURNING id
     """
-    execute_query(SQL, [franchise_id])
+    if not execute_returning(SQL, [franchise_id]):
+        return None
+    invalidate("franchises", franchise_id)
     return {"message": "franchise deleted"}
\ No newline at end of file
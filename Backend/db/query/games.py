@@ -1,14 +1,110 @@
-from db.client import fetch_all, fetch_one, execute_query
+import os
+import re
+from db.catalog_cache import cached, invalidate
+from db.client import fetch_all, fetch_one, execute_returning, RowStream
+from db.utils.batch import chunked, placeholders
+from db.utils.pagination import fetch_page, count_rows, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
+
+# Matches ranked per search: broad terms match far more rows than anyone
+# pages through, and scoring them all is what makes those searches slow
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+
+GAME_SORTS = {
+    "id": ("g.id", "id"),
+    "name": ("g.game_name", "game_name"),
+    "publisher": ("g.publisher", "publisher"),
+    "year": ("g.release_year", "release_year"),
+    "uploaded": ("g.upload_date", "upload_date"),
+}
+
+# Filter name -> WHERE condition; every condition is backed by an index
+GAME_FILTERS = {
+    "franchise_id": "g.franchise_id = ?",
+    "system_id": "g.system_id = ?",
+    "genre": "g.genre = ?",
+    "publisher": "g.publisher = ?",
+    "year_min": "g.release_year >= ?",
+    "year_max": "g.release_year <= ?",
+}
+
+# Field name -> column for sparse fieldsets; the joined names need a join
+GAME_FIELDS = {
+    "id": "g.id",
+    "franchise_id": "g.franchise_id",
+    "system_id": "g.system_id",
+    "publisher": "g.publisher",
+    "game_name": "g.game_name",
+    "game_img": "g.game_img",
+    "genre": "g.genre",
+    "release_year": "g.release_year",
+    "upload_date": "g.upload_date",
+    "description": "g.description",
+    "franchise_name": "f.franchise_name",
+    "system_name": "s.system_name",
+}
+
+GAME_JOINS = {
+    "franchise_name": "LEFT JOIN franchises f ON g.franchise_id = f.id",
+    "system_name": "LEFT JOIN systems s ON g.system_id = s.id",
+}
+
+def build_game_projection(fields=None, required=("id",)):
+    """Turn ("id", "game_name", ...) into (columns, joins) for a query over games g.
+
+    None selects every field. Only names in GAME_FIELDS are accepted;
+    `required` fields are always included, and the franchise/system joins
+    are only added when their name is asked for.
+    """
+    if fields is None:
+        names = list(GAME_FIELDS)
+    else:
+        unknown = set(fields) - set(GAME_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported field: {', '.join(sorted(unknown))}")
+        names = [name for name in GAME_FIELDS if name in fields or name in required]
+
+    columns = ", ".join(f"{GAME_FIELDS[name]} AS {name}" for name in names)
+    joins = " ".join(GAME_JOINS[name] for name in names if name in GAME_JOINS)
+    return columns, joins
+
+def build_game_filters(filters=None):
+    """Turn {"genre": "RPG", "year_min": 1995, ...} into (where, params).
+
+    Only names in GAME_FILTERS are accepted and values are always bound as
+    parameters; filters set to None are ignored.
+    """
+    filters = filters or {}
+    unknown = set(filters) - set(GAME_FILTERS)
+    if unknown:
+        raise ValueError(f"Unsupported filter: {', '.join(sorted(unknown))}")
+
+    where = []
+    params = []
+    for name, condition in GAME_FILTERS.items():
+        if filters.get(name) is not None:
+            where.append(condition)
+            params.append(filters[name])
+    return where, params
+
+# Written row in the same shape as get_game, so writes need no follow-up read
+GAME_RETURNING = """
+    RETURNING
+        *,
+        (SELECT franchise_name FROM franchises WHERE franchises.id = games.franchise_id) AS franchise_name,
+        (SELECT system_name FROM systems WHERE systems.id = games.system_id) AS system_name
+"""
 
 def create_game(franchise_id, system_id, publisher, game_name, game_img=None, genre=None, release_year=None, description=None):
     SQL = """
         INSERT INTO games
         (franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    game_id = execute_query(SQL, [franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description])
-    return get_game(game_id)
+    """ + GAME_RETURNING
+    game = execute_returning(SQL, [franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description])
+    invalidate("games", game["id"])
+    return game
 
+@cached("games")
 def get_all_games():
     SQL = """
         SELECT
@@ -20,7 +116,50 @@ def get_all_games():
         LEFT JOIN systems s ON g.system_id = s.id
     """
     return fetch_all(SQL)
+
+def get_game_titles():
+    """(id, game_name) of every game in id order, for agents.title_matcher"""
+    return fetch_all("SELECT id, game_name FROM games ORDER BY id")
+
+def get_game_features():
+    """Every game's content columns in id order, for agents.recommender"""
+    SQL = """
+        SELECT g.id, g.franchise_id, f.franchise_name, g.system_id, g.publisher, g.game_name, g.genre,
+               g.release_year, g.description
+        FROM games g
+        LEFT JOIN franchises f ON g.franchise_id = f.id
+        ORDER BY g.id
+    """
+    return fetch_all(SQL)
+
+@cached("games")
+def list_games(limit=DEFAULT_PAGE_SIZE, after=None, sort="id", filters=None, fields=None):
+    """One keyset page of games matching `filters`, ordered by `sort` ("name", "-year", ...).
+
+    `fields` limits the columns returned; the sort column is always kept
+    because the cursor is built from it.
+    """
+    sort_field = GAME_SORTS.get(sort.lstrip("-"), (None, "id"))[1]
+    columns, joins = build_game_projection(fields, required=("id", sort_field))
+    SQL = f"SELECT {columns} FROM games g {joins}"
+    where, params = build_game_filters(filters)
+    return fetch_page(SQL, GAME_SORTS, sort, after, limit, where, params, filter_first=True)
+
+@cached("games")
+def count_games(mode="exact", filters=None):
+    where, params = build_game_filters(filters)
+    return count_rows("games", mode, where, params, alias="g")
     
+def export_games(filters=None, fields=None):
+    """Stream every game matching `filters` in id order; see RowStream"""
+    columns, joins = build_game_projection(fields)
+    SQL = f"SELECT {columns} FROM games g {joins}"
+    where, params = build_game_filters(filters)
+    if where:
+        SQL += " WHERE " + " AND ".join(where)
+    return RowStream(SQL + " ORDER BY g.id", params)
+
+@cached("games", row=True)
 def get_game(id):
     SQL = """
         SELECT
@@ -34,6 +173,78 @@ def get_game(id):
     """
     return fetch_one(SQL, [id])
 
+def get_games_by_ids(ids, fields=None):
+    """Games for `ids` in request order (duplicates kept); ids that don't exist are skipped"""
+    columns, joins = build_game_projection(fields)
+    found = {}
+    for chunk in chunked(list(dict.fromkeys(ids))):
+        SQL = f"""
+            SELECT {columns}
+            FROM games g {joins}
+            WHERE g.id IN ({placeholders(len(chunk))})
+        """
+        for row in fetch_all(SQL, chunk):
+            found[row['id']] = row
+    return [found[id] for id in ids if id in found]
+
+def build_search_query(text):
+    """Turn free text into an FTS5 MATCH expression with prefix matching.
+
+    Every word becomes a quoted prefix term, so FTS5 operators typed by the
+    user ("OR", "NEAR", "-", ...) are matched literally instead of parsed.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+@cached("games")
+def search_games(text, limit=DEFAULT_PAGE_SIZE, after=None, fields=None):
+    """Full-text search over name, description, publisher and genre, best match first.
+
+    Only the first SEARCH_MAX_CANDIDATES matches (in id order) are ranked,
+    so a broad search returns the best of those rather than of every match.
+    """
+    columns, joins = build_game_projection(fields)
+    match = build_search_query(text)
+    if not match:
+        return {"items": [], "next_cursor": None}
+
+    offset = 0
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 3 or values[0] != "search" or values[1] != text or not isinstance(values[2], int):
+            raise ValueError("Cursor does not match this search")
+        offset = values[2]
+
+    # Rank a capped set of matches inside the FTS index first, then join only
+    # the rows on this page. bm25 weights: name, description, publisher, genre
+    SQL = f"""
+        SELECT
+            {columns},
+            hits.score
+        FROM (
+            SELECT rowid, score
+            FROM (
+                SELECT rowid, bm25(games_fts, 10.0, 1.0, 2.0, 3.0) AS score
+                FROM games_fts
+                WHERE games_fts MATCH ?
+                LIMIT ?
+            )
+            ORDER BY score
+            LIMIT ? OFFSET ?
+        ) hits
+        JOIN games g ON g.id = hits.rowid
+        {joins}
+        ORDER BY hits.score
+    """
+    rows = fetch_all(SQL, [match, SEARCH_MAX_CANDIDATES, limit + 1, offset])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(["search", text, offset + limit])
+    return {"items": rows, "next_cursor": next_cursor}
+
+@cached("games")
 def get_games_by_franchise(franchise_id):
     SQL = """
         SELECT
@@ -47,6 +258,7 @@ def get_games_by_franchise(franchise_id):
     """
     return fetch_all(SQL, [franchise_id])
 
+@cached("games")
 def get_games_by_genre(genre):
     SQL = """
         SELECT
@@ -61,6 +273,7 @@ def get_games_by_genre(genre):
     return fetch_all(SQL, [genre])
 
 def update_game(id, franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description):
+    """Update a game and return the new row, or None if it doesn't exist"""
     SQL = """
     UPDATE games
     SET 
@@ -73,14 +286,20 @@ def update_game(id, franchise_id, system_id, publisher, game_name, game_img, gen
         release_year = ?,
         description = ?
     WHERE id = ?
-    """
-    execute_query(SQL, [franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description, id])
-    return get_game(id)
+    """ + GAME_RETURNING
+    game = execute_returning(SQL, [franchise_id, system_id, publisher, game_name, game_img, genre, release_year, description, id])
+    if game:
+        invalidate("games", id)
+    return game
 
 def delete_game(game_id):
+    """Delete a game; returns None if it doesn't exist"""
     SQL = """
         DELETE FROM games
         WHERE id = ?
+        RETURNING id
     """
-    execute_query(SQL, [game_id])
+    if not execute_returning(SQL, [game_id]):
+        return None
+    invalidate("games", game_id)
     return {"message": "Game deleted"}
\ No newline at end of file
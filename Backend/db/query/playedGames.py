@@ -1,4 +1,16 @@
-from db.client import fetch_all, fetch_one, execute_query
+from db.client import fetch_all, fetch_one, execute_returning, run_write, RowStream
+from db.utils.batch import chunked, placeholders
+from db.utils.pagination import fetch_page, count_rows, DEFAULT_PAGE_SIZE
+
+# Errors returned by mark_game_as_played
+GAME_NOT_FOUND = "Game not found"
+ALREADY_PLAYED = "Game already marked as played"
+
+PLAYED_SORTS = {
+    "id": ("pg.id", "id"),
+    "played_at": ("pg.played_at", "played_at"),
+    "rating": ("pg.rating", "rating"),
+}
 
 def get_user_played_games(user_id):
     """Get all games a user has played"""
@@ -15,14 +27,64 @@ def get_user_played_games(user_id):
     """
     return fetch_all(SQL, [user_id])
 
+def export_user_played_games(user_id):
+    """Stream all of a user's played games, newest first; see RowStream"""
+    SQL = """
+        SELECT 
+            pg.*,
+            g.game_name,
+            g.genre,
+            g.game_img
+        FROM played_games pg
+        JOIN games g ON pg.game_id = g.id
+        WHERE pg.user_id = ?
+        ORDER BY pg.played_at DESC
+    """
+    return RowStream(SQL, [user_id])
+
+def list_user_played_games(user_id, limit=DEFAULT_PAGE_SIZE, after=None, sort="-played_at"):
+    """One keyset page of a user's played games, newest first by default"""
+    SQL = """
+        SELECT 
+            pg.*,
+            g.game_name,
+            g.genre,
+            g.game_img
+        FROM played_games pg
+        JOIN games g ON pg.game_id = g.id
+    """
+    return fetch_page(SQL, PLAYED_SORTS, sort, after, limit, where=["pg.user_id = ?"], params=[user_id])
+
+def count_user_played_games(user_id, mode="exact"):
+    return count_rows("played_games", mode, where=["user_id = ?"], params=[user_id])
+
 def mark_game_as_played(user_id, game_id, rating=None, notes=None):
-    """Mark a game as played for a user"""
+    """Mark a game as played for a user.
+
+    Returns the new row, or {"error": GAME_NOT_FOUND | ALREADY_PLAYED}.
+    The insert only selects the game if it exists and leaves an existing
+    (user_id, game_id) row alone, so concurrent calls for the same pair
+    can't race past a check; only a failed insert needs the follow-up
+    query, inside the same transaction, to say why.
+    """
     SQL = """
         INSERT INTO played_games (user_id, game_id, rating, notes)
-        VALUES (?, ?, ?, ?)
+        SELECT ?, id, ?, ?
+        FROM games
+        WHERE id = ?
+        ON CONFLICT(user_id, game_id) DO NOTHING
+        RETURNING
+            *,
+            (SELECT game_name FROM games WHERE games.id = played_games.game_id) AS game_name
     """
-    played_id = execute_query(SQL, [user_id, game_id, rating, notes])
-    return get_played_game(played_id)
+    def mark(conn):
+        row = conn.execute(SQL, [user_id, rating, notes, game_id]).fetchone()
+        if row:
+            return dict(row)
+        game = conn.execute("SELECT 1 FROM games WHERE id = ?", [game_id]).fetchone()
+        return {"error": ALREADY_PLAYED if game else GAME_NOT_FOUND}
+
+    return run_write(mark)
 
 def get_played_game(played_id):
     """Get a single played game record"""
@@ -47,53 +109,154 @@ def check_if_played(user_id, game_id):
     return result['count'] > 0 if result else False
 
 def unmark_game_as_played(user_id, game_id):
-    """Remove a game from user's played list"""
+    """Remove a game from user's played list; returns None if it wasn't there"""
     SQL = """
         DELETE FROM played_games
         WHERE user_id = ? AND game_id = ?
+        RETURNING id
     """
-    execute_query(SQL, [user_id, game_id])
+    if not execute_returning(SQL, [user_id, game_id]):
+        return None
     return {"message": "Game removed from played list"}
 
 def update_played_game(user_id, game_id, rating=None, notes=None):
-    """Update rating or notes for a played game"""
-    updates = []
-    params = []
-    
-    if rating is not None:
-        updates.append("rating = ?")
-        params.append(rating)
-    
-    if notes is not None:
-        updates.append("notes = ?")
-        params.append(notes)
-    
-    if not updates:
-        return None
-    
-    params.extend([user_id, game_id])
-    
-    SQL = f"""
+    """Update rating or notes for a played game; returns None if it wasn't there.
+
+    Fields left as None keep their current value.
+    """
+    SQL = """
         UPDATE played_games
-        SET {', '.join(updates)}
+        SET
+            rating = COALESCE(?, rating),
+            notes = COALESCE(?, notes)
         WHERE user_id = ? AND game_id = ?
+        RETURNING *
     """
-    execute_query(SQL, params)
-    return {"message": "Played game updated"}
+    row = execute_returning(SQL, [rating, notes, user_id, game_id])
+    if not row:
+        return None
+    return {"message": "Played game updated", "data": row}
 
 def get_games_batch_with_played_status(game_ids, user_id):
     """Get multiple games with their played status for a user - for Agent 1"""
-    placeholders = ','.join(['?' for _ in game_ids])
-    SQL = f"""
-        SELECT 
-            g.*,
-            f.franchise_name,
-            s.system_name,
-            CASE WHEN pg.id IS NOT NULL THEN 1 ELSE 0 END as played
-        FROM games g
-        LEFT JOIN franchises f ON g.franchise_id = f.id
-        LEFT JOIN systems s ON g.system_id = s.id
-        LEFT JOIN played_games pg ON g.id = pg.game_id AND pg.user_id = ?
-        WHERE g.id IN ({placeholders})
+    results = []
+    for chunk in chunked(list(game_ids)):
+        SQL = f"""
+            SELECT 
+                g.*,
+                f.franchise_name,
+                s.system_name,
+                CASE WHEN pg.id IS NOT NULL THEN 1 ELSE 0 END as played
+            FROM games g
+            LEFT JOIN franchises f ON g.franchise_id = f.id
+            LEFT JOIN systems s ON g.system_id = s.id
+            LEFT JOIN played_games pg ON g.id = pg.game_id AND pg.user_id = ?
+            WHERE g.id IN ({placeholders(len(chunk))})
+        """
+        results += fetch_all(SQL, [user_id] + chunk)
+    return results
+
+def check_played_batch(user_id, game_ids):
+    """Played status for many games, one {"game_id", "played", "rating", "played_at"} per id, in order"""
+    played = {}
+    unique_ids = list(dict.fromkeys(game_ids))
+    for chunk in chunked(unique_ids):
+        SQL = f"""
+            SELECT game_id, rating, played_at
+            FROM played_games
+            WHERE user_id = ? AND game_id IN ({placeholders(len(chunk))})
+        """
+        for row in fetch_all(SQL, [user_id] + chunk):
+            played[row['game_id']] = row
+
+    results = []
+    for game_id in game_ids:
+        row = played.get(game_id)
+        results.append({
+            "game_id": game_id,
+            "played": row is not None,
+            "rating": row['rating'] if row else None,
+            "played_at": row['played_at'] if row else None,
+        })
+    return results
+
+def _existing_ids(conn, sql, ids, params=None):
+    """Run `sql` (ending in "IN ({})") over `ids` in chunks and collect the first column"""
+    found = set()
+    for chunk in chunked(ids):
+        rows = conn.execute(sql.format(placeholders(len(chunk))), list(params or []) + chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+def mark_games_as_played(user_id, items):
+    """Mark many games as played in one transaction.
+
+    `items` is a list of {"game_id", "rating", "notes"}. Returns one
+    {"game_id", "status"} per item, in order, where status is "created",
+    "already_played", "not_found" or "invalid_rating". The write lock is
+    taken before the lookups, so the statuses match what was written.
+    """
+    game_ids = list(dict.fromkeys(item['game_id'] for item in items))
+
+    def mark_all(conn):
+        games = _existing_ids(conn, "SELECT id FROM games WHERE id IN ({})", game_ids)
+        already = _existing_ids(
+            conn,
+            "SELECT game_id FROM played_games WHERE user_id = ? AND game_id IN ({})",
+            game_ids, [user_id]
+        )
+
+        results = []
+        rows = []
+        for item in items:
+            game_id = item['game_id']
+            rating = item.get('rating')
+            if rating is not None and not 1 <= rating <= 5:
+                status = "invalid_rating"
+            elif game_id not in games:
+                status = "not_found"
+            elif game_id in already:
+                status = "already_played"
+            else:
+                status = "created"
+                already.add(game_id)
+                rows.append([user_id, game_id, rating, item.get('notes')])
+            results.append({"game_id": game_id, "status": status})
+
+        conn.executemany("""
+            INSERT INTO played_games (user_id, game_id, rating, notes)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, game_id) DO NOTHING
+        """, rows)
+        return results
+
+    return run_write(mark_all, immediate=True)
+
+def unmark_games_as_played(user_id, game_ids):
+    """Remove many games from a user's played list in one transaction.
+
+    Returns one {"game_id", "status"} per id, in order, where status is
+    "removed" or "not_found".
     """
-    return fetch_all(SQL, [user_id] + game_ids)
\ No newline at end of file
+    unique_ids = list(dict.fromkeys(game_ids))
+
+    def unmark_all(conn):
+        played = _existing_ids(
+            conn,
+            "SELECT game_id FROM played_games WHERE user_id = ? AND game_id IN ({})",
+            unique_ids, [user_id]
+        )
+        conn.executemany(
+            "DELETE FROM played_games WHERE user_id = ? AND game_id = ?",
+            [[user_id, game_id] for game_id in unique_ids if game_id in played]
+        )
+        return played
+
+    played = run_write(unmark_all, immediate=True)
+
+    results = []
+    for game_id in game_ids:
+        status = "removed" if game_id in played else "not_found"
+        played.discard(game_id)
+        results.append({"game_id": game_id, "status": status})
+    return results
\ No newline at end of file
@@ -1,14 +1,24 @@
-from db.client import fetch_all, fetch_one, execute_query
+from db.catalog_cache import cached, invalidate
+from db.client import fetch_all, fetch_one, execute_returning
+from db.utils.pagination import fetch_page, count_rows, DEFAULT_PAGE_SIZE
+
+SYSTEM_SORTS = {
+    "id": ("id", "id"),
+    "name": ("system_name", "system_name"),
+}
 
 def create_system(system_name, system_img):
     SQL = """
         INSERT INTO systems
         (system_name, system_img)
         VALUES (?, ?)
+        RETURNING *
     """
-    system_id = execute_query(SQL, [system_name, system_img])
-    return get_system(system_id)
+    system = execute_returning(SQL, [system_name, system_img])
+    invalidate("systems", system["id"])
+    return system
 
+@cached("systems")
 def get_all_systems():
     SQL = """
         SELECT *
@@ -16,6 +26,19 @@ def get_all_systems():
     """
     return fetch_all(SQL)
 
+@cached("systems")
+def list_systems(limit=DEFAULT_PAGE_SIZE, after=None, sort="id"):
+    SQL = """
+        SELECT *
+        FROM systems
+    """
+    return fetch_page(SQL, SYSTEM_SORTS, sort, after, limit)
+
+@cached("systems")
+def count_systems(mode="exact"):
+    return count_rows("systems", mode)
+
+@cached("systems", row=True)
 def get_system(id):
     SQL = """
         SELECT *
@@ -25,20 +48,28 @@ def get_system(id):
     return fetch_one(SQL, [id])
 
 def update_system(id, system_name, system_img):
+    """Update a system and return the new row, or None if it doesn't exist"""
     SQL = """
         UPDATE systems
         SET
             system_name = ?,
             system_img = ?
         WHERE id = ?
+        RETURNING *
     """
-    execute_query(SQL, [system_name, system_img, id])
-    return get_system(id)
+    system = execute_returning(SQL, [system_name, system_img, id])
+    if system:
+        invalidate("systems", id)
+    return system
 
 def delete_system(system_id):
+    """Delete a system; returns None if it doesn't exist"""
     SQL = """
         DELETE FROM systems
         WHERE id = ?
+        RETURNING id
     """
-    execute_query(SQL, [system_id])
+    if not execute_returning(SQL, [system_id]):
+        return None
+    invalidate("systems", system_id)
     return {"message": "System deleted"}
\ No newline at end of file
@@ -1,20 +1,41 @@
-import bcrypt
-from db.client import fetch_all, fetch_one, execute_query
+import os
+import threading
+import time
+from db.client import fetch_all, fetch_one, execute_returning
 from db.utils.jwt_utils import create_token, verify_token
+from db.utils.lru_cache import TTLCache, MISSING
+from db.utils.pagination import fetch_page, count_rows, DEFAULT_PAGE_SIZE
+from db.utils.password_utils import hash_password, check_password
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# Decoded JWT payloads by token, and user rows by id, for verify_user_token
+_token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+_user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+# Bumped by every user write; a row loaded across a bump may predate it and isn't cached
+_user_cache_lock = threading.Lock()
+_user_cache_generation = 0
+
+USER_SORTS = {
+    "id": ("id", "id"),
+    "email": ("email", "email"),
+}
 
 def create_user(email, password, is_verified):
-    hashed_password = bcrypt.hashpw(
-        password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    """Create a user and return the new row, or None if the email is taken"""
+    return insert_user(email, hash_password(password), is_verified)
 
+def insert_user(email, hashed_password, is_verified):
+    """create_user with the password already hashed, so routes can hash off the db executor"""
     SQL = """
         INSERT INTO users (email, password_hash, is_verified)
         VALUES (?, ?, ?)
+        ON CONFLICT(email) DO NOTHING
+        RETURNING *
     """
     
-    user_id = execute_query(SQL, [email, hashed_password, is_verified])
-    return get_user(user_id)
+    return execute_returning(SQL, [email, hashed_password, is_verified])
 
 def get_users():
     SQL = """
@@ -23,6 +44,16 @@ def get_users():
     """
     return fetch_all(SQL)
 
+def list_users(limit=DEFAULT_PAGE_SIZE, after=None, sort="id"):
+    SQL = """
+        SELECT *
+        FROM users
+    """
+    return fetch_page(SQL, USER_SORTS, sort, after, limit)
+
+def count_users(mode="exact"):
+    return count_rows("users", mode)
+
 def get_user(id):
     SQL = """
         SELECT *
@@ -41,61 +72,121 @@ def get_user_by_email(email):
     return fetch_one(SQL, [email])
 
 def update_user(id, email, is_verified):
+    """Update a user and return the new row, or None if it doesn't exist"""
     SQL = """
         UPDATE users
         SET
             email = ?,
             is_verified = ?
         WHERE id = ?
+        RETURNING *
     """
-    execute_query(SQL, [email, is_verified, id])
-    return get_user(id)
+    user = execute_returning(SQL, [email, is_verified, id])
+    invalidate_user(id)
+    return user
 
 def delete_user(user_id):
+    """Delete a user; returns None if it doesn't exist"""
     SQL = """
         DELETE FROM users
         WHERE id = ?
+        RETURNING id
     """
-    execute_query(SQL, [user_id])
+    deleted = execute_returning(SQL, [user_id])
+    invalidate_user(user_id)
+    if not deleted:
+        return None
     return {"message": "User deleted"}
 
 def login_user(email, password):
     """Authenticate user and return token"""
     user = get_user_by_email(email)
+    error = login_error(user)
+    if error:
+        return error
+
+    if check_password(password, user['password_hash']):
+        return login_response(user)
     
+    return {"error": "Invalid email or password"}
+
+def login_error(user):
+    """Why `user` (a get_user_by_email row or None) can't log in before its password is checked, or None"""
     if not user:
         return {"error": "Invalid email or password"}
-    
 
     if not user['is_verified']:
         return {"error": "Account not verified"}
-    
 
-    if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-
-        token = create_token({
-            "user_id": user['id'],
-            "email": user['email']
-        })
-        
-
-        return {
-            "token": token,
-            "user": {
-                "id": user['id'],
-                "email": user['email'],
-                "is_verified": user['is_verified']
-            }
+    return None
+
+def login_response(user):
+    """Token and public fields for a user whose password checked out"""
+    token = create_token({
+        "user_id": user['id'],
+        "email": user['email']
+    })
+
+    return {
+        "token": token,
+        "user": {
+            "id": user['id'],
+            "email": user['email'],
+            "is_verified": user['is_verified']
         }
-    
-    return {"error": "Invalid email or password"}
+    }
 
 def verify_user_token(token):
-    """Verify JWT token and return user data"""
-    payload = verify_token(token)
-    
-    if not payload:
+    """Verify JWT token and return user data, served from cache when possible"""
+    payload = _token_cache.get(token)
+    if payload is MISSING:
+        payload = verify_token(token)
+        if not payload:
+            return None
+        # Never keep a token cached past its own expiry
+        _token_cache.set(token, payload, ttl=payload['exp'] - time.time())
+
+    user = _user_cache.get(payload['user_id'])
+    if user is MISSING:
+        generation = _user_cache_generation
+        user = get_user(payload['user_id'])
+        if user:
+            with _user_cache_lock:
+                # Skip the store if a user write landed while we were loading;
+                # the row may predate it
+                if _user_cache_generation == generation:
+                    _user_cache.set(payload['user_id'], user)
+
+    return user
+
+def invalidate_user(user_id):
+    """Drop a cached user row after a write by this process.
+
+    Other workers keep their copy until it expires (AUTH_CACHE_TTL).
+    """
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        _user_cache.pop(user_id)
+
+def get_cached_token_user(token):
+    """Return the user for a token only if both are already cached, else None.
+
+    Misses aren't counted here: the caller falls back to verify_user_token,
+    which looks both up again and counts the outcome once.
+    """
+    payload = _token_cache.get(token, count=False)
+    if payload is MISSING:
         return None
-    
+    user = _user_cache.get(payload['user_id'], count=False)
+    if user is MISSING:
+        return None
+    _token_cache.record_hit()
+    _user_cache.record_hit()
+    return user
 
-    return get_user(payload['user_id'])
\ No newline at end of file
+def auth_cache_stats():
+    return {
+        "tokens": _token_cache.stats(),
+        "users": _user_cache.stats()
+    }
\ No newline at end of file
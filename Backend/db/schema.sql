@@ -1,28 +1,26 @@
-DROP TABLE IF EXISTS users;
-DROP TABLE IF EXISTS systems;
-DROP TABLE IF EXISTS franchises;
-DROP TABLE IF EXISTS games;
-
-CREATE TABLE users(
-    id INTEGER PRIMARY KEY,
+CREATE TABLE IF NOT EXISTS users(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE,
     email TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL,
-    is_verified BOOLEAN DEFAULT 0
+    password_hash TEXT NOT NULL,
+    is_verified BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE systems(
+CREATE TABLE IF NOT EXISTS systems(
     id INTEGER PRIMARY KEY,
     system_name TEXT NOT NULL,
     system_img TEXT
 );
 
-CREATE TABLE franchises(
+CREATE TABLE IF NOT EXISTS franchises(
     id INTEGER PRIMARY KEY,
+    system_id INTEGER REFERENCES systems(id),
     franchise_name TEXT NOT NULL,
     franchise_img TEXT
 );
 
-CREATE TABLE games(
+CREATE TABLE IF NOT EXISTS games(
     id INTEGER PRIMARY KEY,
     franchise_id INTEGER REFERENCES franchises(id),
     system_id INTEGER REFERENCES systems(id) NOT NULL,
@@ -35,7 +33,7 @@ CREATE TABLE games(
     description TEXT
 );
 
-CREATE TABLE played_games(
+CREATE TABLE IF NOT EXISTS played_games(
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER REFERENCES users(id) NOT NULL,
     game_id INTEGER REFERENCES games(id) NOT NULL,
@@ -43,4 +41,4 @@ CREATE TABLE played_games(
     rating INTEGER CHECK(rating >= 1 AND rating <= 5),
     notes TEXT,
     UNIQUE(user_id, game_id)
-);
\ No newline at end of file
+);
@@ -1,69 +1,22 @@
 # seed_database.py
+import os
+import sys
 import sqlite3
 import json
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.migrations import migrate
+
 def seed_database():
+    # Create or upgrade tables
+    print("Applying migrations...")
+    migrate('games.db')
+    
     # Connect to database
     conn = sqlite3.connect('games.db')
     cur = conn.cursor()
     
-    # Create tables
-    print("Creating tables...")
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS systems(
-            id INTEGER PRIMARY KEY,
-            system_name TEXT NOT NULL,
-            system_img TEXT
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS franchises(
-            id INTEGER PRIMARY KEY,
-            franchise_name TEXT NOT NULL,
-            franchise_img TEXT
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS games(
-            id INTEGER PRIMARY KEY,
-            franchise_id INTEGER REFERENCES franchises(id),
-            system_id INTEGER REFERENCES systems(id) NOT NULL,
-            publisher TEXT NOT NULL,
-            game_name TEXT NOT NULL,
-            game_img TEXT,
-            genre TEXT,
-            release_year INTEGER,
-            upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            description TEXT
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS played_games(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER REFERENCES users(id) NOT NULL,
-            game_id INTEGER REFERENCES games(id) NOT NULL,
-            played_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            rating INTEGER CHECK(rating >= 1 AND rating <= 5),
-            notes TEXT,
-            UNIQUE(user_id, game_id)
-        )
-    """)
-    
     # Load and insert systems
     print("Seeding systems...")
     with open('seed/systems.json', 'r') as f:
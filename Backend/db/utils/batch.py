@@ -0,0 +1,13 @@
+"""Helpers for running one statement over many ids"""
+
+# Stay well below SQLite's bound-parameter limit (999 before 3.32)
+MAX_IDS_PER_QUERY = 500
+
+def chunked(items, size=MAX_IDS_PER_QUERY):
+    """Split a list into consecutive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def placeholders(count):
+    """"?,?,?" for an IN (...) list of `count` values"""
+    return ",".join("?" * count)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    `get` returns MISSING (not None) on a miss so None can be cached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=MISSING, count=True):
+        """Value for key, or default; count=False leaves the hit/miss counters alone"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += count
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += count
+                return default
+            self._data.move_to_end(key)
+            self.hits += count
+            return value
+
+    def record_hit(self):
+        """Count a hit for a lookup made with count=False"""
+        with self._lock:
+            self.hits += 1
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return MISSING if entry is None else entry[0]
+
+    def pop_where(self, predicate):
+        """Drop every entry whose key matches predicate; returns how many"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,133 @@
+import base64
+import json
+import sqlite3
+from db.client import fetch_all, fetch_one
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+def parse_sort(sort, sorts):
+    """Turn "name" / "-name" into (key, column, row field, descending)"""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in sorts:
+        raise ValueError(f"Unsupported sort '{key}', expected one of: {', '.join(sorts)}")
+    column, field = sorts[key]
+    return key, column, field, descending
+
+def keyset_segments(column, id_column, descending, value, last_id):
+    """WHERE clauses selecting rows strictly after (value, last_id), in sort order.
+
+    SQLite sorts NULLs first ascending and last descending, and row values
+    never match NULL, so a nullable sort column needs a separate NULL
+    segment. Each segment is a single index range; OR-ing them together
+    would make SQLite fall back to scanning.
+    """
+    if column == id_column:
+        return [(f"{id_column} {'<' if descending else '>'} ?", [last_id])]
+
+    if value is None:
+        if descending:
+            return [(f"{column} IS NULL AND {id_column} < ?", [last_id])]
+        return [
+            (f"{column} IS NULL AND {id_column} > ?", [last_id]),
+            (f"{column} IS NOT NULL", []),
+        ]
+
+    if descending:
+        return [
+            (f"({column}, {id_column}) < (?, ?)", [value, last_id]),
+            (f"{column} IS NULL", []),
+        ]
+    return [(f"({column}, {id_column}) > (?, ?)", [value, last_id])]
+
+def fetch_page(sql, sorts, sort="id", after=None, limit=DEFAULT_PAGE_SIZE, where=None, params=None, filter_first=False):
+    """Run `sql` (a SELECT ... FROM ... without WHERE/ORDER BY) as one keyset page.
+
+    `sorts` maps sort keys to (column, row field) and must contain "id".
+    With `filter_first`, SQLite may not walk a sort index and test every
+    row against `where` (a full scan when little matches): sort columns the
+    filters don't constrain are wrapped in unary +, so only the filter
+    indexes are usable and the matches are sorted.
+    Returns {"items": [...], "next_cursor": str or None}.
+    """
+    key, column, field, descending = parse_sort(sort, sorts)
+    id_column, id_field = sorts["id"]
+    if filter_first and where and not any(column in condition for condition in where):
+        column, id_column = f"+{column}", f"+{id_column}"
+
+    segments = [(None, [])]
+    if after:
+        values = decode_cursor(after)
+        if len(values) != 3 or values[0] != sort:
+            raise ValueError("Cursor does not match the requested sort")
+        segments = keyset_segments(column, id_column, descending, values[1], values[2])
+
+    direction = "DESC" if descending else "ASC"
+    order = [f"{column} {direction}"]
+    if column != id_column:
+        order.append(f"{id_column} {direction}")
+
+    # One extra row tells us whether another page exists
+    rows = []
+    for condition, condition_params in segments:
+        conditions = list(where or [])
+        if condition:
+            conditions.append(condition)
+        segment_sql = sql
+        if conditions:
+            segment_sql += " WHERE " + " AND ".join(conditions)
+        segment_sql += f" ORDER BY {', '.join(order)} LIMIT ?"
+        needed = limit + 1 - len(rows)
+        rows += fetch_all(segment_sql, list(params or []) + condition_params + [needed])
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([sort, last[field], last[id_field]])
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+def count_rows(table, mode, where=None, params=None, alias=None):
+    """Total row count: "exact" runs COUNT(*), "approx" reads planner stats.
+
+    approx only applies to unfiltered tables; it uses sqlite_stat1 when
+    ANALYZE has run and falls back to MAX(rowid), which ignores gaps.
+    `alias` names the table in `where` conditions such as "g.genre = ?".
+    """
+    if mode is None:
+        return None
+
+    if mode == "approx" and not where:
+        try:
+            stat = fetch_one("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", [table])
+        except sqlite3.OperationalError:
+            stat = None
+        if stat:
+            return int(stat['stat'].split()[0])
+        result = fetch_one(f"SELECT IFNULL(MAX(rowid), 0) AS total FROM {table}")
+        return result['total']
+
+    sql = f"SELECT COUNT(*) AS total FROM {table}"
+    if alias:
+        sql += f" {alias}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return fetch_one(sql, params)['total']
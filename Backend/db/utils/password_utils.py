@@ -0,0 +1,167 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "32"))
+
+class PasswordQueueFull(Exception):
+    """Raised when too many hash/verify jobs are already waiting"""
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+        }
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool (bcrypt releases the GIL).
+
+    At most `workers` hashes run at once and at most `queue_limit` more may
+    wait for a worker; beyond that, calls fail fast with PasswordQueueFull
+    instead of piling up behind a login burst. Route handlers await
+    hash_async()/check_async(), so no other thread (such as a database
+    worker) is held while bcrypt runs.
+    """
+
+    def __init__(self, workers=PASSWORD_WORKERS, queue_limit=PASSWORD_QUEUE_LIMIT, rounds=BCRYPT_ROUNDS):
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._queue_wait = _Timing()
+        self._timings = {"hash": _Timing(), "check": _Timing()}
+        self.workers = workers
+        self.queue_limit = queue_limit
+
+    def hash(self, password):
+        """Hash a password with the configured work factor"""
+        return self._run("hash", _hashpw, password, self.rounds)
+
+    def check(self, password, password_hash):
+        """Return True if the password matches the stored hash"""
+        return self._run("check", _checkpw, password, password_hash)
+
+    async def hash_async(self, password):
+        """hash() awaited on the event loop"""
+        return await asyncio.wrap_future(self._submit("hash", _hashpw, password, self.rounds))
+
+    async def check_async(self, password, password_hash):
+        """check() awaited on the event loop"""
+        return await asyncio.wrap_future(self._submit("check", _checkpw, password, password_hash))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "rounds": self.rounds,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "queue_wait": self._queue_wait.as_dict(),
+                "hash": self._timings["hash"].as_dict(),
+                "check": self._timings["check"].as_dict(),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _run(self, kind, fn, *args):
+        return self._submit(kind, fn, *args).result()
+
+    def _submit(self, kind, fn, *args):
+        """Queue a job and return its future; the slot is freed when it finishes"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordQueueFull("Too many password operations in progress")
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._queue_wait.add(started - submitted)
+                    self._timings[kind].add(finished - started)
+
+        def done(future):
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            done(None)
+            raise
+        future.add_done_callback(done)
+        return future
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+def hash_password(password):
+    """Hash a password on the shared bcrypt pool"""
+    return get_hasher().hash(password)
+
+def check_password(password, password_hash):
+    """Verify a password on the shared bcrypt pool"""
+    return get_hasher().check(password, password_hash)
+
+async def hash_password_async(password):
+    """hash_password for route handlers: awaits the bcrypt pool without holding a thread"""
+    return await get_hasher().hash_async(password)
+
+async def check_password_async(password, password_hash):
+    """check_password for route handlers: awaits the bcrypt pool without holding a thread"""
+    return await get_hasher().check_async(password, password_hash)
+
+def password_stats():
+    """Hasher counters, or None until the first password is hashed or checked"""
+    with _hasher_lock:
+        return _hasher.stats() if _hasher is not None else None
+
+def shutdown_hasher():
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from db.client import get_connection
+
+# How long the writer waits for more writes after the first one arrives,
+# and the most writes it puts in one transaction. With no window a group
+# is whatever queued up while the previous commit was running, which
+# costs no latency; a window only pays off with many more concurrent
+# writers than usually overlap and slow (fsync-bound) commits
+GROUP_COMMIT_WINDOW = float(os.getenv("DB_GROUP_COMMIT_WINDOW_MS", "0")) / 1000
+GROUP_COMMIT_MAX = int(os.getenv("DB_GROUP_COMMIT_MAX", "256"))
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """Single background thread that applies writes in group commits.
+
+    `submit(fn)` queues fn(conn) and blocks until it has been committed.
+    The writer takes whatever is queued (plus stragglers arriving within
+    `window` seconds, at most `max_batch` writes), runs each one inside
+    its own SAVEPOINT within one BEGIN IMMEDIATE transaction and commits
+    once. A write that raises is rolled back alone and its caller gets the
+    exception; the rest of the group still commits. If the thread dies
+    (say, its connection can't be opened), queued and later writes fail
+    with RuntimeError instead of waiting forever.
+    """
+
+    def __init__(self, connect=get_connection, window=GROUP_COMMIT_WINDOW, max_batch=GROUP_COMMIT_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self._connect = connect
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._commits = 0
+        self._failed = 0
+        self._max_group = 0
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        """Run fn(conn) on the writer connection and return its result once committed"""
+        if threading.current_thread() is self._thread:
+            return fn(self._conn)
+        future = Future()
+        # Checked and queued under the lock, so a dying thread can't miss the write
+        with self._lock:
+            if self._closed:
+                raise self._stopped_error()
+            self._queue.put((fn, future))
+        return future.result()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_group": self.max_batch,
+                "queued": self._queue.qsize(),
+                "writes": self._writes,
+                "commits": self._commits,
+                "failed": self._failed,
+                "avg_group": round(self._writes / self._commits, 2) if self._commits else 0.0,
+                "largest_group": self._max_group,
+            }
+
+    def close(self):
+        """Commit everything already queued, then stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            self._conn = self._connect()
+            self._conn.isolation_level = None
+            try:
+                while True:
+                    group, stop = self._collect()
+                    if group:
+                        self._commit(group)
+                    if stop:
+                        return
+            finally:
+                self._conn.close()
+        except BaseException as e:
+            self._error = e
+            raise
+        finally:
+            with self._lock:
+                self._closed = True
+            self._fail_pending()
+
+    def _stopped_error(self):
+        if self._error is None:
+            return RuntimeError("Group-commit writer is closed")
+        return RuntimeError(f"Group-commit writer stopped: {self._error!r}")
+
+    def _fail_pending(self):
+        """Fail the writes still queued when the thread exits"""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not _STOP:
+                job[1].set_exception(self._stopped_error())
+
+    def _collect(self):
+        """Block for the first write, then gather more until the window closes"""
+        job = self._queue.get()
+        if job is _STOP:
+            return [], True
+        group = [job]
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return group, True
+            group.append(job)
+        return group, False
+
+    def _commit(self, group):
+        conn = self._conn
+        results = []
+        failed = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in group:
+                conn.execute("SAVEPOINT write")
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((future, None, e))
+                    failed += 1
+            conn.execute("COMMIT")
+        except Exception as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            finally:
+                # Even if the rollback fails and stops the thread
+                for _, future in group:
+                    future.set_exception(e)
+                with self._lock:
+                    self._failed += len(group)
+            return
+
+        with self._lock:
+            self._writes += len(group)
+            self._commits += 1
+            self._failed += failed
+            self._max_group = max(self._max_group, len(group))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide writer, starting its thread on first use"""
+    global _writer
+    if _writer is None or not _writer.is_alive():
+        with _writer_lock:
+            # A writer whose thread died is replaced rather than failing every write
+            if _writer is None or not _writer.is_alive():
+                _writer = GroupCommitWriter()
+    return _writer
+
+def close_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+def writer_stats():
+    """Writer counters, or None while no write has gone through it"""
+    with _writer_lock:
+        return _writer.stats() if _writer is not None else None